@@ -0,0 +1,55 @@
+# backend/ajustes_servidor.py
+
+import os
+
+# --- Ajustes del servidor HTTP ---
+# Igual que ajustes_sqlite.py: cada clave se puede sobrescribir en el dict de
+# configuración o con una variable de entorno FACTURAAPP_<CLAVE>
+# (ej: FACTURAAPP_SERVIDOR_MODO=produccion FACTURAAPP_SERVIDOR_HOST=0.0.0.0).
+AJUSTES_SERVIDOR_POR_DEFECTO = {
+    'SERVIDOR_MODO': 'escritorio',      # 'escritorio' (ventana + werkzeug) o 'produccion' (waitress, sin ventana)
+    'SERVIDOR_HOST': '127.0.0.1',       # '0.0.0.0' para atender a otros equipos de la red
+    'SERVIDOR_PUERTO': 5001,
+    'SERVIDOR_HILOS': 8,                # Hilos de waitress que atienden peticiones
+    'SERVIDOR_BACKLOG': 1024,           # Conexiones en espera en la cola de listen()
+    'SERVIDOR_KEEPALIVE_S': 120,        # Segundos que se mantiene abierta una conexión inactiva
+    'SERVIDOR_MAX_CONEXIONES': 200,     # Conexiones abiertas a la vez (el resto espera en el backlog)
+}
+
+MODOS_SERVIDOR = {'escritorio', 'produccion'}
+
+# Conexiones del pool de SQLAlchemy además de una por hilo (tareas en segundo plano)
+CONEXIONES_EXTRA = 4
+
+def cargar_ajustes_servidor(config):
+    """Completa config con los ajustes del servidor (config > entorno > defecto). ValueError si no son válidos."""
+    for clave, por_defecto in AJUSTES_SERVIDOR_POR_DEFECTO.items():
+        valor = config.get(clave, os.environ.get(f'FACTURAAPP_{clave}', por_defecto))
+        if clave == 'SERVIDOR_MODO':
+            valor = str(valor).lower()
+            if valor not in MODOS_SERVIDOR:
+                raise ValueError(f"{clave} no válido: {valor}")
+        elif clave != 'SERVIDOR_HOST':
+            try:
+                valor = int(valor)
+            except (ValueError, TypeError):
+                raise ValueError(f"{clave} debe ser un número entero: {valor}")
+            if valor <= 0:
+                raise ValueError(f"{clave} debe ser positivo: {valor}")
+        config[clave] = valor
+
+def opciones_engine(config):
+    """
+    Tamaño del pool de conexiones acorde a los hilos de waitress (modo
+    produccion): cada hilo usa como mucho una conexión (la sesión es por
+    petición), así ningún hilo espera por una conexión y no se abren más de
+    las que se pueden usar. En modo escritorio werkzeug (threaded=True) no
+    limita los hilos: se deja el pool por defecto de SQLAlchemy.
+    """
+    if config['SERVIDOR_MODO'] != 'produccion':
+        return {}
+    return {
+        'pool_size': config['SERVIDOR_HILOS'],
+        'max_overflow': CONEXIONES_EXTRA,
+        'pool_timeout': 30,
+    }
@@ -0,0 +1,60 @@
+# backend/ajustes_sqlite.py
+
+import os
+from sqlalchemy import event
+
+# --- Valores por defecto de los PRAGMA de SQLite ---
+# Cada clave se puede sobrescribir en app.config o con una variable de entorno
+# FACTURAAPP_<CLAVE> (ej: FACTURAAPP_SQLITE_JOURNAL_MODE=DELETE).
+AJUSTES_POR_DEFECTO = {
+    'SQLITE_JOURNAL_MODE': 'WAL',       # Lectores y un escritor a la vez, sin bloquearse
+    'SQLITE_SYNCHRONOUS': 'NORMAL',     # Seguro con WAL; evita un fsync por cada commit
+    'SQLITE_MMAP_SIZE': 268435456,      # 256 MB de lectura mapeada en memoria
+    'SQLITE_CACHE_SIZE': -65536,        # Negativo = KiB -> 64 MB de caché de páginas
+    'SQLITE_TEMP_STORE': 'MEMORY',      # Tablas temporales y ordenaciones en memoria
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,     # Espera al lock de escritura en vez de fallar al momento
+}
+
+_VALORES_PERMITIDOS = {
+    'SQLITE_JOURNAL_MODE': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'SQLITE_SYNCHRONOUS': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'SQLITE_TEMP_STORE': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+def cargar_ajustes(config):
+    """
+    Completa config con los ajustes de SQLite (config > entorno > defecto)
+    y los valida. Lanza ValueError si alguno no es válido.
+    """
+    for clave, por_defecto in AJUSTES_POR_DEFECTO.items():
+        valor = config.get(clave, os.environ.get(f'FACTURAAPP_{clave}', por_defecto))
+        if clave in _VALORES_PERMITIDOS:
+            valor = str(valor).upper()
+            if valor not in _VALORES_PERMITIDOS[clave]:
+                raise ValueError(f"{clave} no válido: {valor}")
+        else:
+            try:
+                valor = int(valor)
+            except (ValueError, TypeError):
+                raise ValueError(f"{clave} debe ser un número entero: {valor}")
+        config[clave] = valor
+
+def registrar_pragmas(engine, config):
+    """Aplica los PRAGMA configurados a cada conexión nueva del engine."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA mmap_size = {config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA cache_size = {config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA temp_store = {config['SQLITE_TEMP_STORE']}",
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -1,13 +1,28 @@
 # backend/app.py
 import os
-from flask import Flask, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
+import sys
+import arranque
+from flask import Flask
 from flask_cors import CORS
-from flask_migrate import Migrate
 from models import db
+from ajustes_sqlite import cargar_ajustes, registrar_pragmas
+from ajustes_servidor import cargar_ajustes_servidor, opciones_engine
 from routes.clientes import clientes_bp
 from routes.productos import productos_bp
 from routes.facturas import facturas_bp
+from routes.reportes import reportes_bp
+from routes.metricas import metricas_bp
+from routes.exportaciones import exportaciones_bp
+from reportes import reconstruir_reportes_comando
+from esquema import preparar_base_de_datos
+from versiones import registrar_eventos
+from catalogo import registrar_invalidacion
+from serializadores import ProveedorJSON
+from metricas import registrar_metricas
+from estaticos import Manifiesto, comprimir_estaticos_comando
+from importacion import importar_csv_comando
+from archivo import archivar_facturas_comando
+arranque.marcar('importar módulos')
 
 # --- Nombre de la App (para la carpeta de datos) ---
 APP_NAME_FOLDER = "FacturaApp" # Usa el mismo nombre que diste a PyInstaller
@@ -23,7 +38,8 @@ def get_app_support_dir(app_name):
     # ¡Asegúrate de que esta ruta sea correcta para macOS!
     return os.path.join(home, "Library", "Application Support", app_name)
 
-app_support_dir = get_app_support_dir(APP_NAME_FOLDER)
+# FACTURAAPP_DATA_DIR permite usar otra carpeta de datos (benchmarks, pruebas)
+app_support_dir = os.environ.get('FACTURAAPP_DATA_DIR') or get_app_support_dir(APP_NAME_FOLDER)
 db_name = 'database.db'
 db_path = os.path.join(app_support_dir, db_name)
 
@@ -32,9 +48,10 @@ os.makedirs(app_support_dir, exist_ok=True)
 print(f"Usando base de datos en: {db_path}") # Útil para depuración
 
 # --- App Flask ---
-app = Flask(__name__,
-            static_folder=static_folder_path,
-            static_url_path='')
+# Sin carpeta estática de Flask: el frontend lo sirve serve_react_app con el manifiesto
+app = Flask(__name__, static_folder=None)
+app.config['STATIC_DIR'] = static_folder_path
+app.json = ProveedorJSON(app) # orjson si está disponible; fechas siempre en ISO 8601
 
 # --- CORS ---
 CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -42,35 +59,77 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 # --- Base de Datos (Usando la nueva ruta) ---
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path # <-- ¡Usa la nueva ruta!
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['APP_DATA_DIR'] = app_support_dir # Caché de PDFs y otros ficheros generados
+cargar_ajustes(app.config) # PRAGMA de SQLite (WAL, synchronous, mmap, caché...)
+cargar_ajustes_servidor(app.config) # Modo e hilos del servidor (main.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_engine(app.config) # Pool acorde a los hilos de waitress
 
 # --- Extensiones ---
 db.init_app(app)
-migrate = Migrate(app, db) # Migrate seguirá funcionando con esta ruta
+with app.app_context():
+    registrar_pragmas(db.engine, app.config) # Antes de abrir la primera conexión
+    registrar_metricas(app, db.engine) # Latencia y consultas SQL por petición (/api/_metrics)
+registrar_eventos(db.session) # Contadores de versión por tabla (ETag de las rutas GET)
+registrar_invalidacion(db.session) # Caché de clientes y productos para crear facturas
+
+# Flask-Migrate (y alembic) solo hacen falta para 'flask db'; el lanzador
+# (main.py) los omite para arrancar antes
+if not os.environ.get('FACTURAAPP_LANZADOR'):
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db) # Migrate seguirá funcionando con esta ruta
 
 # --- Blueprints (API) ---
 app.register_blueprint(clientes_bp)
 app.register_blueprint(productos_bp)
 app.register_blueprint(facturas_bp)
+app.register_blueprint(reportes_bp)
+app.register_blueprint(metricas_bp)
+app.register_blueprint(exportaciones_bp)
+
+# --- Comandos CLI ---
+app.cli.add_command(reconstruir_reportes_comando) # flask reconstruir-reportes
+app.cli.add_command(comprimir_estaticos_comando) # flask comprimir-estaticos (tras cada build)
+app.cli.add_command(importar_csv_comando) # flask importar-csv clientes|productos fichero.csv
+app.cli.add_command(archivar_facturas_comando) # flask archivar-facturas [AÑO] (ejercicios cerrados)
 
 # --- Ruta para Servir Frontend React ---
+# La carpeta static se recorre una vez aquí; assets/ se cachea como inmutable
+# y se usan las variantes .br/.gz si existen (flask comprimir-estaticos)
+manifiesto_estaticos = Manifiesto(static_folder_path)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_react_app(path):
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    return manifiesto_estaticos.servir(path)
+
+arranque.marcar('configurar app')
+
+def ejecutando_flask_db():
+    """True si el proceso es 'flask db ...' (o 'python -m flask db ...')."""
+    programa = os.path.normpath(sys.argv[0]).split(os.sep)
+    if 'flask' not in (programa[-1], programa[-2] if len(programa) > 1 else None):
+        return False
+    argumentos = iter(sys.argv[1:])
+    for argumento in argumentos:
+        if argumento in ('--app', '-A', '--env-file', '-e'):
+            next(argumentos, None) # Opción con valor
+        elif not argumento.startswith('-'):
+            return argumento == 'db'
+    return False
 
 # --- Inicializar la BD si es necesario (dentro del contexto de la app) ---
 # Esto asegura que las tablas se creen la primera vez que se ejecute
-# en una nueva ubicación.
-with app.app_context():
-    try:
-        # Intenta crear las tablas. Si ya existen, no hará nada.
-        db.create_all()
-        print("Tablas de la base de datos verificadas/creadas.")
-    except Exception as e:
-        print(f"Error al verificar/crear tablas: {e}")
+# en una nueva ubicación. Si el esquema ya está al día (PRAGMA user_version)
+# solo cuesta una lectura. Con 'flask db' el esquema lo dejan las migraciones:
+# si se creara aquí, 'flask db upgrade' encontraría las tablas ya hechas.
+if not ejecutando_flask_db():
+    with app.app_context():
+        try:
+            if preparar_base_de_datos():
+                print("Tablas de la base de datos verificadas/creadas.")
+        except Exception as e:
+            print(f"Error al verificar/crear tablas: {e}")
+    arranque.marcar('comprobar esquema')
 
 
 # --- Ejecución Directa (Solo pruebas) ---
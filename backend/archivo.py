@@ -0,0 +1,409 @@
+# backend/archivo.py
+
+import os
+import threading
+from datetime import datetime
+from urllib.request import pathname2url
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Column, Index, MetaData, Table, delete, func, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from models import db, Factura, DetalleFactura, ArchivoAnual
+
+# --- Archivo de facturas por año ---
+# 'flask archivar-facturas AÑO' mueve las facturas (y sus líneas) anteriores a
+# AÑO a un fichero SQLite por año en <carpeta de datos>/archivo. La base de
+# datos principal conserva solo los ejercicios abiertos, así sus tablas e
+# índices no crecen sin límite. Los ficheros se adjuntan (ATTACH) en modo solo
+# lectura cuando una consulta los necesita: el listado y el detalle de
+# facturas los leen de forma transparente. Los resúmenes de reportes no
+# cambian al archivar: siguen incluyendo las facturas archivadas.
+#
+# Con EJERCICIOS_ABIERTOS (FACTURAAPP_EJERCICIOS_ABIERTOS=2, por ejemplo) la
+# app de escritorio archiva los años cerrados en segundo plano al arrancar (y
+# 'flask archivar-facturas' sin año hace lo mismo), así la base de datos
+# principal solo guarda el catálogo (clientes, productos, resúmenes) y las
+# facturas de los ejercicios abiertos. No es un almacenamiento particionado:
+# todas las escrituras, también las de los ejercicios abiertos, van a la base
+# de datos principal; los ficheros por año solo reciben años ya cerrados.
+
+CARPETA_ARCHIVO = 'archivo'
+# SQLite admite 10 bases de datos adjuntas por conexión; una queda libre
+# para el fichero que se está escribiendo al archivar. Las consultas que
+# abarcan más años los recorren por lotes (lotes_archivo)
+MAX_ADJUNTOS = 9
+# Ejercicios que se quedan en la base de datos principal (el actual y los
+# anteriores que aún admiten cambios). 0 = sin archivado automático
+EJERCICIOS_ABIERTOS_POR_DEFECTO = 0
+# Copias de un año que se repiten si cambia mientras se archiva (_archivar_anio)
+INTENTOS_ARCHIVADO = 5
+
+_metadata = MetaData()
+_tablas = {}
+_bloqueo = threading.Lock()
+
+def esquema_archivo(anio):
+    """Nombre con el que se adjunta el fichero de un año (archivo_2023.factura)."""
+    return f"archivo_{anio}"
+
+def ruta_archivo(fichero):
+    return os.path.join(current_app.config['APP_DATA_DIR'], CARPETA_ARCHIVO, fichero)
+
+def tabla_archivo(modelo, esquema):
+    """
+    Tabla del modelo (Factura o DetalleFactura) dentro de la base de datos
+    adjunta 'esquema': mismas columnas e índices, sin claves foráneas (los
+    clientes y productos siguen en la base de datos principal).
+    """
+    clave = (esquema, modelo.__tablename__)
+    with _bloqueo:
+        if clave not in _tablas:
+            origen = modelo.__table__
+            tabla = Table(origen.name, _metadata,
+                          *[Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+                            for c in origen.columns],
+                          schema=esquema)
+            for indice in origen.indexes:
+                Index(indice.name, *[tabla.c[c.name] for c in indice.columns])
+            _tablas[clave] = tabla
+        return _tablas[clave]
+
+def tablas_archivo(archivado):
+    """(factura, detalle_factura) de un año archivado, tal como se leen una vez adjuntado."""
+    esquema = esquema_archivo(archivado.anio)
+    return tabla_archivo(Factura, esquema), tabla_archivo(DetalleFactura, esquema)
+
+# --- Lectura ---
+
+def archivos(desde=None, hasta=None):
+    """Años archivados cuyo rango de fechas se solapa con [desde, hasta], del más reciente al más antiguo."""
+    consulta = select(ArchivoAnual).order_by(ArchivoAnual.anio.desc())
+    if desde is not None:
+        consulta = consulta.where(ArchivoAnual.fecha_max >= desde)
+    if hasta is not None:
+        consulta = consulta.where(ArchivoAnual.fecha_min <= hasta)
+    return db.session.scalars(consulta).all()
+
+def archivos_con_id(factura_id):
+    """Años archivados cuyo rango de ids incluye factura_id (normalmente uno o ninguno)."""
+    return db.session.scalars(select(ArchivoAnual).where(
+        ArchivoAnual.id_min <= factura_id, ArchivoAnual.id_max >= factura_id)).all()
+
+def fuentes_facturas(desde=None, hasta=None):
+    """
+    (factura, detalle_factura, año archivado o None) de cada fichero con
+    facturas en [desde, hasta): los años archivados del más antiguo al más
+    reciente y luego la base de datos principal. Para recorridos por lotes
+    (exportaciones, paquetes de PDF): cada año hay que adjuntarlo antes de cada
+    consulta, porque entre lotes la sesión puede cambiar de conexión.
+    """
+    fuentes = [(*tablas_archivo(a), a) for a in reversed(archivos(desde, hasta))]
+    return fuentes + [(Factura.__table__, DetalleFactura.__table__, None)]
+
+def en_rango(factura, desde=None, hasta=None):
+    """Condiciones fecha >= desde y fecha < hasta (las que no sean None) sobre una tabla de facturas."""
+    condiciones = []
+    if desde is not None:
+        condiciones.append(factura.c.fecha >= desde)
+    if hasta is not None:
+        condiciones.append(factura.c.fecha < hasta)
+    return condiciones
+
+def contar_facturas(desde=None, hasta=None):
+    """Facturas en [desde, hasta) de la base de datos principal y los años archivados."""
+    total = 0
+    for factura, _, archivado in fuentes_facturas(desde, hasta):
+        if archivado is not None:
+            adjuntar([archivado])
+        total += db.session.execute(
+            select(func.count()).select_from(factura).where(*en_rango(factura, desde, hasta))).scalar()
+    db.session.rollback()
+    return total
+
+def adjuntar(archivados):
+    """
+    Adjunta en solo lectura, en la conexión de la sesión actual, los ficheros
+    de los años indicados que no lo estén ya. Si no caben, suelta antes los
+    adjuntos que esta consulta no usa. Lanza ValueError si se piden más de
+    MAX_ADJUNTOS años a la vez (para más, lotes_archivo).
+    """
+    if len(archivados) > MAX_ADJUNTOS:
+        raise ValueError(f"No se pueden adjuntar más de {MAX_ADJUNTOS} años archivados a la vez")
+    conexion = db.session.connection()
+    adjuntos = {fila[1] for fila in conexion.exec_driver_sql("PRAGMA database_list")
+                if fila[1].startswith('archivo_')}
+    necesarios = {esquema_archivo(a.anio): a for a in archivados}
+
+    sobrantes = adjuntos - set(necesarios)
+    if len(adjuntos | set(necesarios)) > MAX_ADJUNTOS:
+        for esquema in sobrantes:
+            conexion.exec_driver_sql(f"DETACH DATABASE {esquema}")
+
+    for esquema, archivo in necesarios.items():
+        if esquema not in adjuntos:
+            ruta = ruta_archivo(archivo.fichero)
+            if not os.path.exists(ruta):
+                raise RuntimeError(f"Falta el fichero de archivo del año {archivo.anio}: {ruta}")
+            conexion.exec_driver_sql(f"ATTACH DATABASE ? AS {esquema}", (f"file:{pathname2url(ruta)}?mode=ro",))
+
+def lotes_archivo(archivados):
+    """Los años archivados en grupos de como mucho MAX_ADJUNTOS, en el mismo orden."""
+    for inicio in range(0, len(archivados), MAX_ADJUNTOS):
+        yield archivados[inicio:inicio + MAX_ADJUNTOS]
+
+def facturas_archivadas(archivados):
+    """
+    Entidad Factura (aliased) sobre la unión (UNION ALL) de las tablas de los
+    años archivados indicados (como mucho MAX_ADJUNTOS), que quedan adjuntados.
+    Se usa igual que Factura en select(), where() y order_by().
+    """
+    adjuntar(archivados)
+    partes = [select(*tabla_archivo(Factura, esquema_archivo(a.anio)).c) for a in archivados]
+    union = union_all(*partes) if len(partes) > 1 else partes[0]
+    # Columnas por nombre: las tablas archivadas son copias, no la tabla del modelo
+    return aliased(Factura, union.subquery('facturas'), adapt_on_names=True)
+
+def entidades_facturas(archivados):
+    """
+    Factura y luego, por lotes (lotes_archivo), la unión de los años archivados
+    indicados. Cada lote se adjunta al pedirlo: para consultas que se suman o
+    combinan fuente a fuente (totales, resúmenes).
+    """
+    yield Factura
+    for lote in lotes_archivo(archivados):
+        yield facturas_archivadas(lote)
+
+def primeras_facturas(consulta, archivados, limite):
+    """
+    Las 'limite' primeras filas, en orden (fecha, id) descendente, de la
+    tabla principal y los años archivados indicados. consulta(entidad) debe
+    devolver el SELECT ordenado así (con columnas fecha e id) para una entidad
+    Factura; se ejecuta sobre la principal y sobre cada lote de años, y las
+    filas se mezclan por (fecha, id). Los lotes van del año más reciente al
+    más antiguo: cuando ya hay 'limite' filas posteriores a todo el lote
+    siguiente, no se consultan más.
+    """
+    filas = db.session.execute(consulta(Factura).limit(limite)).all()
+    for lote in lotes_archivo(sorted(archivados, key=lambda a: a.fecha_max, reverse=True)):
+        if len(filas) >= limite and lote[0].fecha_max < filas[-1].fecha:
+            break
+        filas += db.session.execute(consulta(facturas_archivadas(lote)).limit(limite)).all()
+        filas.sort(key=lambda fila: (fila.fecha, fila.id), reverse=True)
+        del filas[limite:]
+    return filas
+
+def ejercicios_archivados():
+    """Años archivados (conjunto). Sus ficheros son de solo lectura: no admiten facturas nuevas."""
+    return set(db.session.scalars(select(ArchivoAnual.anio)))
+
+def referenciado_en_archivo(columna, valor):
+    """
+    True si alguna factura o línea archivada tiene columna == valor (columna
+    de Factura o DetalleFactura, ej: Factura.cliente_id). Las claves foráneas
+    no cruzan ficheros: antes de borrar un cliente o un producto hay que
+    mirar también en los años archivados.
+    """
+    for lote in lotes_archivo(archivos()):
+        adjuntar(lote)
+        for archivado in lote:
+            tabla = tabla_archivo(columna.class_, esquema_archivo(archivado.anio))
+            if db.session.execute(select(tabla.c.id).where(tabla.c[columna.key] == valor).limit(1)).first():
+                return True
+    return False
+
+# --- Archivado ---
+
+def archivar(anio_corte, informar=print):
+    """
+    Mueve las facturas con fecha anterior al 1 de enero de anio_corte a sus
+    ficheros de archivo (uno por año). Devuelve {año: facturas movidas}.
+    Lanza ValueError si el corte incluye el año en curso o la factura con el
+    id más alto (SQLite reutilizaría ids ya archivados).
+    """
+    if anio_corte > datetime.utcnow().year:
+        raise ValueError("No se puede archivar el año en curso")
+    corte = datetime(anio_corte, 1, 1)
+
+    # Los ids nuevos son max(id) + 1: si se archivara la última factura (o línea)
+    # una factura nueva podría recibir un id que ya existe en el archivo
+    ultima = db.session.execute(select(Factura.id, Factura.fecha).order_by(Factura.id.desc()).limit(1)).first()
+    ultima_linea = db.session.execute(
+        select(DetalleFactura.factura_id, Factura.fecha).join(Factura, DetalleFactura.factura_id == Factura.id)
+        .order_by(DetalleFactura.id.desc()).limit(1)).first()
+    for fila in filter(None, (ultima, ultima_linea)):
+        if fila.fecha < corte:
+            raise ValueError(f"La factura {fila[0]} (la última creada) es anterior a {anio_corte}: "
+                             f"no se archiva para no reutilizar sus ids")
+
+    anio = func.cast(func.strftime('%Y', Factura.fecha), db.Integer)
+    anios = db.session.scalars(select(anio).where(Factura.fecha < corte).distinct().order_by(anio)).all()
+    db.session.rollback()
+
+    os.makedirs(os.path.join(current_app.config['APP_DATA_DIR'], CARPETA_ARCHIVO), exist_ok=True)
+    movidas = {}
+    for a in anios:
+        movidas[a] = _archivar_anio(a)
+        informar(f"{a}: {movidas[a]} facturas archivadas")
+    return movidas
+
+def _huella_anio(conexion, en_anio):
+    """(número de facturas, id más alto) de un año en la base de datos principal: cambia si se crea o borra alguna."""
+    return tuple(conexion.execute(select(func.count(), func.max(Factura.id)).where(en_anio)).one())
+
+def _archivar_anio(anio):
+    """
+    Copia y borra las facturas de un año. Una transacción que escribe en dos
+    ficheros no es atómica en modo WAL, así que van por separado:
+
+    1. La copia se confirma en el fichero de archivo sin bloquear la base de
+       datos principal (solo la lee), así las facturas se siguen creando y
+       borrando mientras tanto.
+    2. Con la escritura reservada (BEGIN IMMEDIATE) solo lo justo: se
+       comprueba que el año no ha cambiado desde la copia (_huella_anio), se
+       borra de la principal y se registra el año. Si cambió, se vuelve a copiar.
+
+    Si se interrumpe entre las dos, el año aún no está en archivo_anual (nadie
+    lee la copia) y repetirlo la rehace.
+    """
+    fichero = f"facturas-{anio}.db"
+    en_anio = (Factura.fecha >= datetime(anio, 1, 1)) & (Factura.fecha < datetime(anio + 1, 1, 1))
+    ids = select(Factura.id).where(en_anio)
+
+    with db.engine.connect() as principal, db.engine.connect() as conexion:
+        # Conexión propia para la copia: ATTACH y DETACH tienen que ir en la misma conexión
+        conexion.exec_driver_sql("ATTACH DATABASE ? AS archivando", (ruta_archivo(fichero),))
+        try:
+            for _ in range(INTENTOS_ARCHIVADO):
+                huella, valores = _copiar_anio(conexion, anio, en_anio, ids)
+                valores['fichero'] = fichero
+
+                principal.exec_driver_sql("BEGIN IMMEDIATE")
+                try:
+                    if _huella_anio(principal, en_anio) != huella:
+                        continue # Se creó o borró una factura del año durante la copia
+                    ultima = principal.execute(select(func.max(Factura.id))).scalar()
+                    if huella[1] is not None and huella[1] == ultima:
+                        raise ValueError(f"La factura {ultima} (la última creada) es del año {anio}: "
+                                         f"no se archiva para no reutilizar sus ids")
+                    principal.execute(delete(DetalleFactura).where(DetalleFactura.factura_id.in_(ids)))
+                    movidas = principal.execute(delete(Factura).where(en_anio)).rowcount
+                    stmt = sqlite_insert(ArchivoAnual).values(anio=anio, **valores)
+                    principal.execute(stmt.on_conflict_do_update(index_elements=['anio'], set_=valores))
+                    principal.commit()
+                    return movidas
+                finally:
+                    principal.rollback()
+            raise RuntimeError(f"Las facturas de {anio} cambian mientras se archivan: inténtalo más tarde")
+        finally:
+            conexion.rollback()
+            conexion.exec_driver_sql("DETACH DATABASE archivando")
+
+def _copiar_anio(conexion, anio, en_anio, ids):
+    """
+    Copia las facturas (y sus líneas) del año al fichero adjuntado como
+    'archivando' y confirma. Solo escribe en ese fichero. Devuelve la huella
+    del año en la principal (leída en la misma transacción que la copia) y
+    los valores para archivo_anual.
+    """
+    factura_archivo = tabla_archivo(Factura, 'archivando')
+    detalle_archivo = tabla_archivo(DetalleFactura, 'archivando')
+    factura_archivo.create(conexion, checkfirst=True)
+    detalle_archivo.create(conexion, checkfirst=True)
+    huella = _huella_anio(conexion, en_anio)
+
+    # Un año sin registrar solo tiene la copia de un intento anterior: se rehace
+    # entera (sin las facturas borradas desde entonces). Uno ya registrado se completa
+    if conexion.execute(select(ArchivoAnual.anio).where(ArchivoAnual.anio == anio)).first() is None:
+        conexion.execute(delete(detalle_archivo))
+        conexion.execute(delete(factura_archivo))
+    conexion.execute(factura_archivo.insert().prefix_with('OR REPLACE').from_select(
+        [c.name for c in Factura.__table__.c], select(*Factura.__table__.c).where(en_anio)))
+    conexion.execute(detalle_archivo.insert().prefix_with('OR REPLACE').from_select(
+        [c.name for c in DetalleFactura.__table__.c],
+        select(*DetalleFactura.__table__.c).where(DetalleFactura.factura_id.in_(ids))))
+    num, id_min, id_max, fecha_min, fecha_max = conexion.execute(select(
+        func.count(), func.min(factura_archivo.c.id), func.max(factura_archivo.c.id),
+        func.min(factura_archivo.c.fecha), func.max(factura_archivo.c.fecha))).one()
+    conexion.commit()
+    return huella, {'num_facturas': num, 'id_min': id_min, 'id_max': id_max,
+                    'fecha_min': fecha_min, 'fecha_max': fecha_max}
+
+def corte_ejercicios_abiertos(config):
+    """
+    Primer año que se queda en la base de datos principal según
+    EJERCICIOS_ABIERTOS (los N últimos ejercicios), o None si es 0.
+    """
+    try:
+        abiertos = int(config.get('EJERCICIOS_ABIERTOS',
+                                  os.environ.get('FACTURAAPP_EJERCICIOS_ABIERTOS', EJERCICIOS_ABIERTOS_POR_DEFECTO)))
+    except (ValueError, TypeError):
+        raise ValueError("EJERCICIOS_ABIERTOS debe ser un número entero")
+    if abiertos <= 0:
+        return None
+    return datetime.utcnow().year - abiertos + 1
+
+def archivar_ejercicios_cerrados(config, informar=print):
+    """
+    Archivado automático: con EJERCICIOS_ABIERTOS = N > 0 archiva los años
+    anteriores a los N últimos. Normalmente no hay nada que mover y cuesta una
+    consulta; al empezar un ejercicio nuevo mueve el que se cierra.
+    """
+    corte = corte_ejercicios_abiertos(config)
+    if corte is None:
+        return {}
+    if db.session.execute(select(Factura.id).where(Factura.fecha < datetime(corte, 1, 1)).limit(1)).first() is None:
+        db.session.rollback()
+        return {}
+    try:
+        return archivar(corte, informar)
+    except ValueError as e:
+        informar(f"No se archivan los ejercicios anteriores a {corte}: {e}")
+        return {}
+
+def archivar_en_segundo_plano(app):
+    """
+    Lanza archivar_ejercicios_cerrados en un hilo aparte (main.py, con el
+    servidor ya escuchando): mover un año entero puede tardar, y ni el
+    arranque ni los comandos flask tienen que esperarlo. Las peticiones siguen
+    atendiéndose mientras tanto; cada año se registra en archivo_anual en la
+    misma transacción que borra sus facturas de la base de datos principal.
+    """
+    def ejecutar():
+        with app.app_context():
+            try:
+                archivar_ejercicios_cerrados(app.config)
+            except Exception as e:
+                print(f"Error al archivar ejercicios cerrados: {e}")
+
+    hilo = threading.Thread(target=ejecutar, name='archivado', daemon=True)
+    hilo.start()
+    return hilo
+
+@click.command('archivar-facturas')
+@click.argument('anio_corte', type=int, required=False)
+@click.option('--sin-vacuum', is_flag=True, help="No compactar la base de datos al terminar")
+@with_appcontext
+def archivar_facturas_comando(anio_corte, sin_vacuum):
+    """
+    Mueve las facturas anteriores a ANIO_CORTE a ficheros de archivo por año.
+    Sin ANIO_CORTE archiva los ejercicios cerrados según EJERCICIOS_ABIERTOS.
+    """
+    try:
+        if anio_corte is None:
+            anio_corte = corte_ejercicios_abiertos(current_app.config)
+            if anio_corte is None:
+                raise ValueError("Indica ANIO_CORTE o configura FACTURAAPP_EJERCICIOS_ABIERTOS")
+        movidas = archivar(anio_corte, informar=click.echo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if not movidas:
+        click.echo(f"No hay facturas anteriores a {anio_corte}.")
+        return
+    if not sin_vacuum:
+        # Sin VACUUM el fichero no encoge: las páginas liberadas solo se reutilizan
+        click.echo("Compactando la base de datos (VACUUM)...")
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexion:
+            conexion.exec_driver_sql("VACUUM")
+    click.echo(f"{sum(movidas.values())} facturas archivadas en {len(movidas)} ficheros.")
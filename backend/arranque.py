@@ -0,0 +1,39 @@
+# backend/arranque.py
+
+import threading
+import time
+
+# --- Tiempos de arranque ---
+# main.py importa este módulo lo primero; cada etapa del arranque llama a
+# marcar() y al abrirse la ventana se imprime el informe, con el instante de
+# cada etapa desde el inicio y lo que ha durado respecto a la marca anterior
+# del mismo hilo (el servidor y la ventana se preparan en paralelo).
+
+INICIO = time.perf_counter()
+_marcas = [] # (etapa, segundos desde INICIO, hilo)
+_bloqueo = threading.Lock()
+_terminado = False
+
+def marcar(etapa):
+    with _bloqueo:
+        _marcas.append((etapa, time.perf_counter() - INICIO, threading.current_thread().name))
+
+def informe():
+    anterior = {}
+    lineas = ["Tiempos de arranque:"]
+    with _bloqueo:
+        for etapa, instante, hilo in _marcas:
+            duracion = instante - anterior.get(hilo, 0.0)
+            anterior[hilo] = instante
+            lineas.append(f"  {instante * 1000:8.1f} ms  {etapa:<28} +{duracion * 1000:7.1f} ms  [{hilo}]")
+    return '\n'.join(lineas)
+
+def terminar(etapa):
+    """Última marca del arranque: imprime el informe (solo la primera vez)."""
+    global _terminado
+    with _bloqueo:
+        if _terminado:
+            return
+        _terminado = True
+    marcar(etapa)
+    print(informe())
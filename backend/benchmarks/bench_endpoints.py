@@ -0,0 +1,339 @@
+# backend/benchmarks/bench_endpoints.py
+"""
+Suite de benchmarks de las rutas de clientes, productos y facturas.
+
+Para cada escala (por defecto 1k, 100k y 1M facturas) arranca un proceso
+nuevo con la app apuntando a una base de datos temporal, la siembra con
+benchmarks/sembrar.py y mide cada escenario con el cliente de pruebas de
+Flask (sin servidor HTTP): latencia p50/p95/p99 y pico de memoria de Python
+(tracemalloc, en una pasada aparte para no falsear las latencias).
+Si una ruta de esos blueprints no tiene escenario se avisa en la salida.
+
+Uso (desde backend/):
+    python benchmarks/bench_endpoints.py medir [--escalas 1k,100k,1m] [--iteraciones 30] [--salida r.json]
+    python benchmarks/bench_endpoints.py comparar base.json nuevo.json [--umbral 0.15]
+
+'comparar' marca como regresión un escenario cuyo p95 o pico de memoria
+empeora más que el umbral (y más que un mínimo absoluto, para ignorar ruido)
+y termina con código 1 si hay alguna.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLUEPRINTS_MEDIDOS = ('clientes', 'productos', 'facturas')
+
+# Iteraciones con tracemalloc activo para el pico de memoria
+ITERACIONES_MEMORIA = 3
+# Por debajo de estas diferencias no se considera regresión (ruido de medida)
+MINIMO_MS = 0.5
+MINIMO_KB = 64
+
+# --- Escenarios ---
+# (nombre, endpoint, máximo de iteraciones o None, preparar, petición)
+# 'preparar(http, ctx, i)' se ejecuta fuera del cronómetro y devuelve lo que
+# necesite la petición; 'peticion(ctx, i, preparado)' devuelve (método, url, json).
+# Si el cuerpo es texto se envía tal cual como text/csv (importaciones).
+
+def _crear_cliente(http, ctx, i):
+    return http.post('/api/clientes/', json={'nombre': 'Temporal', 'email': f'tmp{i}-{ctx["n"]}@bench.local'}).get_json()['id']
+
+def _crear_producto(http, ctx, i):
+    return http.post('/api/productos/', json={'nombre': 'Temporal', 'precio': 1}).get_json()['id']
+
+def _crear_factura(http, ctx, i):
+    return http.post('/api/facturas/', json=_factura_aleatoria(ctx, i)).get_json()['id']
+
+def _factura_aleatoria(ctx, i):
+    rnd = random.Random(i)
+    return {'cliente_id': rnd.randint(1, ctx['clientes']),
+            'detalles': [{'producto_id': pid, 'cantidad': rnd.randint(1, 5)}
+                         for pid in rnd.sample(range(1, ctx['productos'] + 1), 3)]}
+
+def _primer_cursor(http, ctx, i):
+    return http.get('/api/facturas/?limit=50').get_json()['next_cursor']
+
+def _csv_clientes(ctx, i, filas=1000):
+    return 'nombre,apellido,email\n' + ''.join(
+        f'Importado,{j},imp{i}-{j}-{ctx["n"]}@bench.local\n' for j in range(filas))
+
+def _csv_productos(filas=1000):
+    return 'nombre,precio,stock\n' + ''.join(f'Importado {j},{j % 100},5\n' for j in range(filas))
+
+def _id(ctx, clave, i):
+    return random.Random(i).randint(1, ctx[clave])
+
+ESCENARIOS = [
+    ('clientes.listar', 'clientes.get_clientes', None, None,
+     lambda ctx, i, p: ('GET', '/api/clientes/', None)),
+    ('clientes.stream', 'clientes.get_clientes', 5, None,
+     lambda ctx, i, p: ('GET', '/api/clientes/?stream=1', None)),
+    ('clientes.buscar', 'clientes.get_clientes', None, None,
+     lambda ctx, i, p: ('GET', f'/api/clientes/?q=cliente+{_id(ctx, "clientes", i)}', None)),
+    ('clientes.buscar_prefijo', 'clientes.get_clientes', None, None,
+     lambda ctx, i, p: ('GET', '/api/clientes/?q=apell&prefijo=1', None)),
+    ('clientes.detalle', 'clientes.get_cliente', None, None,
+     lambda ctx, i, p: ('GET', f'/api/clientes/{_id(ctx, "clientes", i)}', None)),
+    ('clientes.facturas', 'clientes.get_facturas_cliente', None, None,
+     lambda ctx, i, p: ('GET', f'/api/clientes/{_id(ctx, "clientes", i)}/facturas?limit=50', None)),
+    ('clientes.resumen_50', 'clientes.get_resumen_clientes', None, None,
+     lambda ctx, i, p: ('GET', '/api/clientes/resumen?ids=' + ','.join(
+         str(_id(ctx, "clientes", i * 50 + j)) for j in range(50)), None)),
+    ('clientes.crear', 'clientes.create_cliente', None, None,
+     lambda ctx, i, p: ('POST', '/api/clientes/', {'nombre': 'Nuevo', 'email': f'nuevo{i}-{ctx["n"]}@bench.local'})),
+    ('clientes.importar_1000', 'clientes.importar_clientes', 10, None,
+     lambda ctx, i, p: ('POST', '/api/clientes/importar', _csv_clientes(ctx, i))),
+    ('clientes.actualizar', 'clientes.update_cliente', None, None,
+     lambda ctx, i, p: ('PUT', f'/api/clientes/{_id(ctx, "clientes", i)}', {'telefono': f'7{i:08d}'})),
+    ('clientes.eliminar', 'clientes.delete_cliente', None, _crear_cliente,
+     lambda ctx, i, p: ('DELETE', f'/api/clientes/{p}', None)),
+
+    ('productos.listar', 'productos.get_productos', None, None,
+     lambda ctx, i, p: ('GET', '/api/productos/', None)),
+    ('productos.stream', 'productos.get_productos', 5, None,
+     lambda ctx, i, p: ('GET', '/api/productos/?stream=1', None)),
+    ('productos.buscar', 'productos.get_productos', None, None,
+     lambda ctx, i, p: ('GET', f'/api/productos/?q=producto+{_id(ctx, "productos", i)}', None)),
+    ('productos.detalle', 'productos.get_producto', None, None,
+     lambda ctx, i, p: ('GET', f'/api/productos/{_id(ctx, "productos", i)}', None)),
+    ('productos.crear', 'productos.create_producto', None, None,
+     lambda ctx, i, p: ('POST', '/api/productos/', {'nombre': f'Nuevo {i}', 'precio': 9.99})),
+    ('productos.importar_1000', 'productos.importar_productos', 10, None,
+     lambda ctx, i, p: ('POST', '/api/productos/importar', _csv_productos())),
+    ('productos.actualizar', 'productos.update_producto', None, None,
+     lambda ctx, i, p: ('PUT', f'/api/productos/{_id(ctx, "productos", i)}', {'descripcion': f'Revisado {i}'})),
+    ('productos.eliminar', 'productos.delete_producto', None, _crear_producto,
+     lambda ctx, i, p: ('DELETE', f'/api/productos/{p}', None)),
+
+    ('facturas.listar', 'facturas.get_facturas', None, None,
+     lambda ctx, i, p: ('GET', '/api/facturas/?limit=50', None)),
+    ('facturas.listar_cursor', 'facturas.get_facturas', None, _primer_cursor,
+     lambda ctx, i, p: ('GET', f'/api/facturas/?limit=50&cursor={p}', None)),
+    ('facturas.listar_filtrado', 'facturas.get_facturas', None, None,
+     lambda ctx, i, p: ('GET', f'/api/facturas/?cliente_id={_id(ctx, "clientes", i)}&desde=2024-01-01&total_min=10', None)),
+    ('facturas.stream', 'facturas.get_facturas', 3, None,
+     lambda ctx, i, p: ('GET', '/api/facturas/?stream=1', None)),
+    ('facturas.detalle', 'facturas.get_factura', None, None,
+     lambda ctx, i, p: ('GET', f'/api/facturas/{_id(ctx, "facturas", i)}', None)),
+    ('facturas.pdf', 'facturas.get_factura_pdf', None, None,
+     lambda ctx, i, p: ('GET', f'/api/facturas/{_id(ctx, "facturas", i)}/pdf', None)),
+    ('facturas.pdf_zip_dia', 'facturas.get_facturas_pdf_zip', 3, None,
+     lambda ctx, i, p: ('GET', '/api/facturas/pdf-bundle?desde=2023-03-01&hasta=2023-03-01', None)),
+    ('facturas.crear', 'facturas.create_factura', None, None,
+     lambda ctx, i, p: ('POST', '/api/facturas/', _factura_aleatoria(ctx, i))),
+    ('facturas.batch_100', 'facturas.create_facturas_batch', 10, None,
+     lambda ctx, i, p: ('POST', '/api/facturas/batch',
+                        {'facturas': [_factura_aleatoria(ctx, i * 100 + j) for j in range(100)]})),
+    ('facturas.eliminar', 'facturas.delete_factura', None, _crear_factura,
+     lambda ctx, i, p: ('DELETE', f'/api/facturas/{p}', None)),
+]
+
+# --- Medición (proceso hijo, una escala) ---
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+def _ejecutar(http, metodo, url, cuerpo):
+    if isinstance(cuerpo, str):
+        respuesta = http.open(url, method=metodo, data=cuerpo, content_type='text/csv')
+    else:
+        respuesta = http.open(url, method=metodo, json=cuerpo)
+    respuesta.get_data() # Consume también las respuestas en streaming
+    respuesta.close()
+    return respuesta.status_code
+
+def medir_escenario(http, ctx, escenario, iteraciones):
+    nombre, _, maximo, preparar, peticion = escenario
+    if maximo:
+        iteraciones = min(iteraciones, maximo)
+    tiempos, errores = [], 0
+
+    # Calentamiento (cachés de SQLite, compilación de consultas)
+    preparado = preparar(http, ctx, -1) if preparar else None
+    _ejecutar(http, *peticion(ctx, -1, preparado))
+
+    for i in range(iteraciones):
+        preparado = preparar(http, ctx, i) if preparar else None
+        metodo, url, cuerpo = peticion(ctx, i, preparado)
+        inicio = time.perf_counter()
+        estado = _ejecutar(http, metodo, url, cuerpo)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        if estado >= 400:
+            errores += 1
+
+    pico = 0
+    tracemalloc.start()
+    for i in range(iteraciones, iteraciones + min(ITERACIONES_MEMORIA, iteraciones)):
+        preparado = preparar(http, ctx, i) if preparar else None
+        metodo, url, cuerpo = peticion(ctx, i, preparado)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        _ejecutar(http, metodo, url, cuerpo)
+        pico = max(pico, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    tiempos.sort()
+    return {
+        'iteraciones': iteraciones,
+        'errores': errores,
+        'p50_ms': round(percentil(tiempos, 50), 3),
+        'p95_ms': round(percentil(tiempos, 95), 3),
+        'p99_ms': round(percentil(tiempos, 99), 3),
+        'max_ms': round(tiempos[-1], 3),
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+def ejecutar_hijo(args):
+    sys.path.insert(0, BACKEND_DIR)
+    from sembrar import sembrar
+    from app import app, db_path
+    from reportes import reconstruir
+
+    inicio = time.perf_counter()
+    ctx = sembrar(db_path, args.facturas)
+    with app.app_context():
+        reconstruir()
+    ctx['n'] = args.facturas
+    segundos_sembrado = time.perf_counter() - inicio
+    print(f"  sembradas {args.facturas} facturas ({ctx['lineas']} líneas) en {segundos_sembrado:.1f} s",
+          file=sys.stderr)
+
+    # Rutas de los blueprints medidos que no tienen escenario
+    medidas = {endpoint for _, endpoint, _, _, _ in ESCENARIOS}
+    sin_escenario = sorted({regla.endpoint for regla in app.url_map.iter_rules()
+                            if regla.endpoint.split('.')[0] in BLUEPRINTS_MEDIDOS} - medidas)
+    for endpoint in sin_escenario:
+        print(f"  AVISO: la ruta {endpoint} no tiene escenario", file=sys.stderr)
+
+    http = app.test_client()
+    resultados = {}
+    for escenario in ESCENARIOS:
+        if args.solo and not any(escenario[0].startswith(s) for s in args.solo.split(',')):
+            continue
+        resultados[escenario[0]] = r = medir_escenario(http, ctx, escenario, args.iteraciones)
+        print(f"  {escenario[0]:<26} p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+              f"p99 {r['p99_ms']:>9.2f} ms  pico {r['pico_memoria_kb']:>10.1f} KB"
+              + (f"  errores {r['errores']}" if r['errores'] else ''), file=sys.stderr)
+
+    with open(args.salida_hijo, 'w', encoding='utf-8') as f:
+        json.dump({'segundos_sembrado': round(segundos_sembrado, 1), 'datos': ctx,
+                   'rutas_sin_escenario': sin_escenario, 'escenarios': resultados}, f)
+
+# --- Orquestación (proceso padre) ---
+
+def leer_escala(texto):
+    texto = texto.strip().lower()
+    multiplicador = {'k': 1000, 'm': 1000000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip('km')) * multiplicador)
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def medir(args):
+    resultado = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'iteraciones': args.iteraciones,
+        },
+        'escalas': {},
+    }
+    for texto in args.escalas.split(','):
+        num_facturas = leer_escala(texto)
+        print(f"Escala {num_facturas} facturas", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as carpeta:
+            salida_hijo = os.path.join(carpeta, 'resultado.json')
+            datos = os.path.join(carpeta, 'datos')
+            comando = [sys.executable, os.path.abspath(__file__), 'medir', '--hijo',
+                       '--facturas', str(num_facturas), '--iteraciones', str(args.iteraciones),
+                       '--salida-hijo', salida_hijo]
+            if args.solo:
+                comando += ['--solo', args.solo]
+            subprocess.run(comando, env=dict(os.environ, FACTURAAPP_DATA_DIR=datos),
+                           cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, check=True)
+            with open(salida_hijo, encoding='utf-8') as f:
+                resultado['escalas'][str(num_facturas)] = json.load(f)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}", file=sys.stderr)
+
+def comparar(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    regresiones = 0
+    print(f"{'escala':>8} {'escenario':<26} {'p95 base':>10} {'p95 nuevo':>10} {'cambio':>8} "
+          f"{'KB base':>10} {'KB nuevo':>10} {'cambio':>8}")
+    for escala, datos_nuevos in nuevo['escalas'].items():
+        datos_base = base['escalas'].get(escala)
+        if not datos_base:
+            continue
+        for nombre, n in datos_nuevos['escenarios'].items():
+            b = datos_base['escenarios'].get(nombre)
+            if not b:
+                continue
+            cambio_ms = n['p95_ms'] / b['p95_ms'] - 1 if b['p95_ms'] else 0.0
+            cambio_kb = n['pico_memoria_kb'] / b['pico_memoria_kb'] - 1 if b['pico_memoria_kb'] else 0.0
+            marcas = []
+            if cambio_ms > args.umbral and n['p95_ms'] - b['p95_ms'] > MINIMO_MS:
+                marcas.append('LATENCIA')
+            if cambio_kb > args.umbral and n['pico_memoria_kb'] - b['pico_memoria_kb'] > MINIMO_KB:
+                marcas.append('MEMORIA')
+            regresiones += bool(marcas)
+            print(f"{escala:>8} {nombre:<26} {b['p95_ms']:>10.2f} {n['p95_ms']:>10.2f} {cambio_ms:>+8.0%} "
+                  f"{b['pico_memoria_kb']:>10.1f} {n['pico_memoria_kb']:>10.1f} {cambio_kb:>+8.0%}"
+                  + (f"  REGRESIÓN {'+'.join(marcas)}" if marcas else ''))
+
+    print(f"\n{regresiones} regresiones (umbral {args.umbral:.0%})")
+    return 1 if regresiones else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_medir = subcomandos.add_parser('medir', help='Ejecuta la suite y guarda los resultados en JSON')
+    p_medir.add_argument('--escalas', default='1k,100k,1m', help='Facturas sembradas por escala (1k, 100k, 1m...)')
+    p_medir.add_argument('--iteraciones', type=int, default=30, help='Peticiones medidas por escenario')
+    p_medir.add_argument('--solo', help='Prefijos de escenario separados por comas (p. ej. facturas.)')
+    p_medir.add_argument('--salida', default='bench_endpoints.json')
+    p_medir.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    p_medir.add_argument('--facturas', type=int, help=argparse.SUPPRESS)
+    p_medir.add_argument('--salida-hijo', help=argparse.SUPPRESS)
+
+    p_comparar = subcomandos.add_parser('comparar', help='Compara dos ficheros de resultados')
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('nuevo')
+    p_comparar.add_argument('--umbral', type=float, default=0.15, help='Empeoramiento relativo tolerado')
+
+    args = parser.parse_args()
+    if args.comando == 'comparar':
+        sys.exit(comparar(args))
+    if args.hijo:
+        ejecutar_hijo(args)
+    else:
+        medir(args)
+
+if __name__ == '__main__':
+    main()
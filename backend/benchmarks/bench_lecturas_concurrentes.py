@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_lecturas_concurrentes.py
+"""
+Benchmark: lecturas por segundo mientras se crean facturas en paralelo.
+
+Ejecuta la misma carga (N hilos leyendo listado y detalle de facturas y un
+hilo creando facturas sin parar) con SQLite por defecto (journal DELETE,
+synchronous FULL) y con los ajustes de ajustes_sqlite.py (WAL, NORMAL...).
+Cada configuración corre en un proceso aparte contra una base de datos temporal.
+
+Uso (desde backend/):
+    python benchmarks/bench_lecturas_concurrentes.py [--segundos 10] [--lectores 4] [--facturas 2000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURACIONES = {
+    'por_defecto': {'FACTURAAPP_SQLITE_JOURNAL_MODE': 'DELETE', 'FACTURAAPP_SQLITE_SYNCHRONOUS': 'FULL'},
+    'ajustado': {},
+}
+
+def sembrar(cliente_http, num_facturas):
+    """Crea clientes, productos y facturas iniciales a través de la API."""
+    clientes = [cliente_http.post('/api/clientes/', json={
+        'nombre': f'Cliente {i}', 'email': f'cliente{i}@bench.local'}).get_json()['id'] for i in range(20)]
+    productos = [cliente_http.post('/api/productos/', json={
+        'nombre': f'Producto {i}', 'precio': 1.5 + i}).get_json()['id'] for i in range(50)]
+    for inicio in range(0, num_facturas, 500):
+        lote = [{
+            'cliente_id': clientes[i % len(clientes)],
+            'detalles': [{'producto_id': productos[(i + j) % len(productos)], 'cantidad': 1 + j} for j in range(5)]
+        } for i in range(inicio, min(inicio + 500, num_facturas))]
+        cliente_http.post('/api/facturas/batch', json={'facturas': lote})
+    return clientes, productos
+
+def ejecutar_hijo(args):
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+
+    cliente_http = app.test_client()
+    clientes, productos = sembrar(cliente_http, args.facturas)
+    ids_facturas = [f['id'] for f in cliente_http.get('/api/facturas/?limit=500').get_json()['facturas']]
+
+    parar = threading.Event()
+    contadores = {'lecturas': 0, 'escrituras': 0, 'errores': 0}
+    bloqueo = threading.Lock()
+
+    def sumar(clave):
+        with bloqueo:
+            contadores[clave] += 1
+
+    def lector(n):
+        http = app.test_client()
+        i = n
+        while not parar.is_set():
+            if i % 2:
+                r = http.get('/api/facturas/?limit=50')
+            else:
+                r = http.get(f'/api/facturas/{ids_facturas[i % len(ids_facturas)]}')
+            sumar('lecturas' if r.status_code == 200 else 'errores')
+            i += 1
+
+    def escritor():
+        http = app.test_client()
+        i = 0
+        while not parar.is_set():
+            r = http.post('/api/facturas/', json={
+                'cliente_id': clientes[i % len(clientes)],
+                'detalles': [{'producto_id': productos[(i + j) % len(productos)], 'cantidad': 1} for j in range(10)]
+            })
+            sumar('escrituras' if r.status_code == 201 else 'errores')
+            i += 1
+
+    hilos = [threading.Thread(target=lector, args=(n,)) for n in range(args.lectores)]
+    hilos.append(threading.Thread(target=escritor))
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    time.sleep(args.segundos)
+    parar.set()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    print(json.dumps({
+        'lecturas_por_segundo': round(contadores['lecturas'] / duracion, 1),
+        'escrituras_por_segundo': round(contadores['escrituras'] / duracion, 1),
+        'errores': contadores['errores'],
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--lectores', type=int, default=4)
+    parser.add_argument('--facturas', type=int, default=2000, help='Facturas sembradas antes de medir')
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args)
+        return
+
+    print(f"{'configuración':<14} {'lecturas/s':>12} {'escrituras/s':>13} {'errores':>8}")
+    for nombre, entorno in CONFIGURACIONES.items():
+        with tempfile.TemporaryDirectory() as carpeta:
+            env = dict(os.environ, FACTURAAPP_DATA_DIR=carpeta, **entorno)
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--hijo',
+                 '--segundos', str(args.segundos), '--lectores', str(args.lectores),
+                 '--facturas', str(args.facturas)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+            resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(f"{nombre:<14} {resultado['lecturas_por_segundo']:>12} "
+                  f"{resultado['escrituras_por_segundo']:>13} {resultado['errores']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_serializacion.py
+"""
+Compara el coste de serializar listados grandes.
+
+- antes: objetos del ORM + dicts construidos a mano + proveedor JSON por
+  defecto de Flask (json estándar, claves ordenadas).
+- ahora: SELECT de columnas + serializadores precompilados + ProveedorJSON
+  (orjson si está instalado).
+- sql: el camino actual de GET /api/clientes/ y /api/productos/: SQLite
+  codifica cada fila (Serializador.consulta_json) y solo se unen los textos.
+
+Mide solo la conversión a bytes de la respuesta (consulta incluida), con
+clientes y productos de prueba en una base de datos temporal.
+
+Uso (desde backend/):
+    python benchmarks/bench_serializacion.py [--filas 20000] [--repeticiones 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=20000, help='Clientes y productos a crear')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['FACTURAAPP_DATA_DIR'] = tempfile.mkdtemp()
+    sys.path.insert(0, BACKEND_DIR)
+    from flask.json.provider import DefaultJSONProvider
+    from app import app
+    from models import db, Cliente, Producto
+    from serializadores import CLIENTE, PRODUCTO, ProveedorJSON, orjson, respuesta_lista_json
+
+    with app.app_context():
+        db.session.execute(Cliente.__table__.insert(), [
+            {'nombre': f'Cliente {i}', 'apellido': 'Prueba', 'email': f'c{i}@bench.local',
+             'telefono': '600000000', 'direccion': f'Calle {i}'} for i in range(args.filas)])
+        db.session.execute(Producto.__table__.insert(), [
+            {'nombre': f'Producto {i}', 'descripcion': 'Descripción de prueba',
+             'precio_centimos': 999 + i % 100, 'stock': i % 50} for i in range(args.filas)])
+        db.session.commit()
+
+    # --- Camino anterior ---
+    def cliente_dict(c):
+        return {"id": c.id, "nombre": c.nombre, "apellido": c.apellido, "email": c.email,
+                "telefono": c.telefono, "direccion": c.direccion}
+
+    def producto_dict(p):
+        return {"id": p.id, "nombre": p.nombre, "descripcion": p.descripcion,
+                "precio": p.precio_centimos / 100, "stock": p.stock}
+
+    por_defecto = DefaultJSONProvider(app)
+
+    def antes():
+        clientes = [cliente_dict(c) for c in Cliente.query.all()]
+        productos = [producto_dict(p) for p in Producto.query.all()]
+        return por_defecto.dumps(clientes) + por_defecto.dumps(productos)
+
+    # --- Camino nuevo ---
+    proveedor = ProveedorJSON(app)
+
+    def ahora():
+        clientes = CLIENTE.filas(db.session.execute(CLIENTE.consulta()))
+        productos = PRODUCTO.filas(db.session.execute(PRODUCTO.consulta()))
+        return proveedor.dumps(clientes) + proveedor.dumps(productos)
+
+    def sql():
+        clientes = respuesta_lista_json(CLIENTE.consulta_json())
+        productos = respuesta_lista_json(PRODUCTO.consulta_json())
+        return clientes.get_data() + productos.get_data()
+
+    print(f"{args.filas} clientes + {args.filas} productos, orjson: {'sí' if orjson else 'no'}")
+    with app.app_context():
+        for nombre, funcion in (('antes', antes), ('ahora', ahora), ('sql', sql)):
+            tiempos = []
+            for _ in range(args.repeticiones):
+                db.session.expunge_all() # Sin objetos ya cargados en la sesión
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append(time.perf_counter() - inicio)
+            mejor = min(tiempos)
+            print(f"  {nombre:6s} mejor {mejor * 1000:8.1f} ms  ({2 * args.filas / mejor:,.0f} filas/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# backend/benchmarks/bench_servidor.py
+"""
+Prueba de carga HTTP de los dos modos de servidor de main.py.
+
+Para cada modo ('escritorio' = servidor de desarrollo de werkzeug, un hilo
+por conexión; 'produccion' = waitress con hilos fijos) arranca un proceso con
+la app sobre una base de datos temporal sembrada con benchmarks/sembrar.py,
+y lanza N clientes concurrentes con conexiones keep-alive que mezclan
+listados, detalles, búsquedas y altas de facturas durante unos segundos.
+Muestra peticiones por segundo, latencias p50/p95/p99 y errores.
+
+Uso (desde backend/):
+    python benchmarks/bench_servidor.py [--clientes 32] [--segundos 10] [--hilos 8] [--facturas 20000]
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = ('escritorio', 'produccion')
+
+def ejecutar_hijo(args):
+    """Proceso servidor: siembra la base de datos y sirve con el modo indicado."""
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from sembrar import sembrar
+    ajustes = main.leer_ajustes()
+    sock = main.abrir_puerto(ajustes)
+    from app import app, db_path
+    from reportes import reconstruir
+    sembrar(db_path, args.facturas)
+    with app.app_context():
+        reconstruir()
+    main.SERVIDORES[ajustes['SERVIDOR_MODO']](app, sock, ajustes)()
+
+def esperar_servidor(puerto, limite=120):
+    fin = time.time() + limite
+    while time.time() < fin:
+        try:
+            conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=5)
+            conexion.request('GET', '/api/clientes/1')
+            if conexion.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("El servidor no ha arrancado a tiempo")
+
+def peticion_aleatoria(rnd, num_facturas, num_clientes, num_productos):
+    tirada = rnd.random()
+    if tirada < 0.35:
+        return 'GET', '/api/facturas/?limit=50', None
+    if tirada < 0.65:
+        return 'GET', f'/api/facturas/{rnd.randint(1, num_facturas)}', None
+    if tirada < 0.80:
+        return 'GET', f'/api/clientes/?q=cliente+{rnd.randint(1, num_clientes)}', None
+    if tirada < 0.90:
+        return 'GET', f'/api/productos/{rnd.randint(1, num_productos)}', None
+    return 'POST', '/api/facturas/', {
+        'cliente_id': rnd.randint(1, num_clientes),
+        'detalles': [{'producto_id': rnd.randint(1, num_productos), 'cantidad': rnd.randint(1, 3)}]}
+
+def cargar(puerto, args, num_clientes, num_productos):
+    latencias, errores = [], [0]
+    bloqueo = threading.Lock()
+    fin = time.perf_counter() + args.segundos
+
+    def cliente(n):
+        rnd = random.Random(n)
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        propias, fallos = [], 0
+        while time.perf_counter() < fin:
+            metodo, url, cuerpo = peticion_aleatoria(rnd, args.facturas, num_clientes, num_productos)
+            datos = json.dumps(cuerpo).encode() if cuerpo else None
+            inicio = time.perf_counter()
+            try:
+                conexion.request(metodo, url, body=datos,
+                                 headers={'Content-Type': 'application/json'} if datos else {})
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status >= 400:
+                    fallos += 1
+            except (OSError, http.client.HTTPException):
+                fallos += 1
+                conexion.close()
+                conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+                continue
+            propias.append(time.perf_counter() - inicio)
+        conexion.close()
+        with bloqueo:
+            latencias.extend(propias)
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(args.clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    percentil = lambda p: latencias[max(0, math.ceil(p / 100 * len(latencias)) - 1)] * 1000 if latencias else 0.0
+    return {
+        'peticiones_por_segundo': len(latencias) / duracion,
+        'p50_ms': percentil(50), 'p95_ms': percentil(95), 'p99_ms': percentil(99),
+        'errores': errores[0],
+    }
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=32, help='Clientes HTTP concurrentes')
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos de waitress (y tamaño del pool)')
+    parser.add_argument('--facturas', type=int, default=20000, help='Facturas sembradas')
+    parser.add_argument('--modos', default=','.join(MODOS))
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args)
+        return
+
+    sys.path.insert(0, BACKEND_DIR)
+    from sembrar import tamanos
+    num_clientes, num_productos = tamanos(args.facturas)
+
+    print(f"{args.clientes} clientes concurrentes, {args.segundos:.0f} s, {args.facturas} facturas")
+    print(f"{'modo':<12} {'pet/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for modo in args.modos.split(','):
+        puerto = puerto_libre()
+        with tempfile.TemporaryDirectory() as carpeta:
+            env = dict(os.environ, FACTURAAPP_DATA_DIR=carpeta, FACTURAAPP_SERVIDOR_MODO=modo,
+                       FACTURAAPP_SERVIDOR_PUERTO=str(puerto), FACTURAAPP_SERVIDOR_HILOS=str(args.hilos))
+            proceso = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--hijo', '--facturas', str(args.facturas)],
+                env=env, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                esperar_servidor(puerto)
+                r = cargar(puerto, args, num_clientes, num_productos)
+            finally:
+                proceso.terminate()
+                proceso.wait()
+        print(f"{modo:<12} {r['peticiones_por_segundo']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['errores']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_stock_concurrente.py
+"""
+Prueba de concurrencia de la reserva de stock.
+
+Muchos hilos crean facturas a la vez contra los mismos productos "calientes"
+hasta agotar su stock. Al final comprueba que no se ha perdido ni duplicado
+ninguna unidad (stock final + unidades facturadas == stock inicial, y nunca
+negativo) y muestra las facturas por segundo.
+
+Uso (desde backend/):
+    python benchmarks/bench_stock_concurrente.py [--hilos 16] [--productos 3] [--stock 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--productos', type=int, default=3, help='Productos calientes compartidos')
+    parser.add_argument('--stock', type=int, default=2000, help='Stock inicial de cada producto')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    os.environ['FACTURAAPP_DATA_DIR'] = carpeta
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+
+    http = app.test_client()
+    cliente_id = http.post('/api/clientes/', json={'nombre': 'Bench', 'email': 'stock@bench.local'}).get_json()['id']
+    productos = [http.post('/api/productos/', json={'nombre': f'Caliente {i}', 'precio': 9.99, 'stock': args.stock})
+                 .get_json()['id'] for i in range(args.productos)]
+
+    contadores = {'creadas': 0, 'sin_stock': 0, 'errores': 0}
+    bloqueo = threading.Lock()
+
+    def trabajador(n):
+        cliente = app.test_client()
+        i = n
+        while True:
+            # Cada factura pide 1-3 unidades de dos productos calientes
+            detalles = [{'producto_id': productos[(i + j) % len(productos)], 'cantidad': 1 + (i + j) % 3}
+                        for j in range(min(2, len(productos)))]
+            r = cliente.post('/api/facturas/', json={'cliente_id': cliente_id, 'detalles': detalles})
+            with bloqueo:
+                if r.status_code == 201:
+                    contadores['creadas'] += 1
+                elif r.status_code == 409:
+                    contadores['sin_stock'] += 1
+                else:
+                    contadores['errores'] += 1
+            if r.status_code == 409:
+                return # Ya no queda stock para esta combinación
+            i += args.hilos
+
+    hilos = [threading.Thread(target=trabajador, args=(n,)) for n in range(args.hilos)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    from sqlalchemy import func
+    from models import db, Producto, DetalleFactura
+    correcto = True
+    with app.app_context():
+        for producto_id in productos:
+            stock_final = db.session.get(Producto, producto_id).stock
+            vendido = db.session.query(func.coalesce(func.sum(DetalleFactura.cantidad), 0))\
+                                .filter(DetalleFactura.producto_id == producto_id).scalar()
+            ok = stock_final >= 0 and stock_final + vendido == args.stock
+            correcto = correcto and ok
+            print(f"producto {producto_id}: stock final {stock_final}, vendido {vendido} -> {'OK' if ok else 'ERROR'}")
+
+    print(f"facturas creadas: {contadores['creadas']}, rechazadas por stock: {contadores['sin_stock']}, "
+          f"errores: {contadores['errores']}")
+    print(f"{contadores['creadas'] / duracion:.1f} facturas/s con {args.hilos} hilos")
+    sys.exit(0 if correcto and not contadores['errores'] else 1)
+
+if __name__ == '__main__':
+    main()
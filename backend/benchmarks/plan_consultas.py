@@ -0,0 +1,126 @@
+# backend/benchmarks/plan_consultas.py
+"""
+Comprobación de los planes de consulta de las rutas de clientes, productos y facturas.
+
+Siembra una base de datos temporal con benchmarks/sembrar.py, ejecuta una vez
+cada escenario de bench_endpoints.py con el cliente de pruebas de Flask y
+captura todas las sentencias SQL que lanzan las rutas. Para cada una ejecuta
+EXPLAIN QUERY PLAN en la misma conexión (con los mismos parámetros) y marca
+los recorridos completos (SCAN sin índice) de las tablas que crecen con los
+datos. Termina con código 1 si encuentra alguno que no esté en PERMITIDOS.
+tests/test_planes.py hace la misma comprobación con pytest sobre una base
+de datos pequeña; este script sirve para ver los planes con más datos.
+
+Uso (desde backend/):
+    python benchmarks/plan_consultas.py [--facturas 20000] [--solo facturas.] [--todas]
+
+--todas muestra el plan de todas las sentencias, no solo las marcadas.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tablas cuyo tamaño crece con el uso: recorrerlas enteras no escala
+TABLAS_GRANDES = ('cliente', 'producto', 'factura', 'detalle_factura')
+
+# (escenario, tabla) con recorrido completo intencionado: los listados sin
+# paginar de clientes y productos devuelven la tabla entera
+PERMITIDOS = {
+    ('clientes.listar', 'cliente'), ('clientes.stream', 'cliente'),
+    ('productos.listar', 'producto'), ('productos.stream', 'producto'),
+}
+
+# 'SCAN factura' es un recorrido completo; 'SCAN factura USING INDEX ...' recorre un índice
+_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+_SIN_PLAN = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+def capturar_planes(engine, capturas):
+    """Anota (sentencia, filas del plan) de cada consulta del engine en capturas['actual']."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def explicar(conn, cursor, statement, parameters, context, executemany):
+        lista = capturas.get('actual')
+        inicio = statement.lstrip().upper()
+        # INSERT ... VALUES no recorre tablas (los lotes de insertmanyvalues reescriben los parámetros)
+        if lista is None or inicio.startswith(_SIN_PLAN) or (inicio.startswith('INSERT') and 'VALUES' in inicio):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        try:
+            # Otro cursor de la misma conexión: no toca las filas pendientes de la consulta
+            filas = cursor.connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            lista.append((statement, [fila[-1] for fila in filas]))
+        except Exception as e: # Un fallo aquí no debe romper la petición medida
+            lista.append((statement, [f'(sin plan: {e})']))
+
+def recorridos_completos(plan):
+    tablas = []
+    for detalle in plan:
+        coincidencia = _SCAN.match(detalle)
+        if coincidencia and coincidencia.group(1) in TABLAS_GRANDES:
+            tablas.append(coincidencia.group(1))
+    return tablas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facturas', type=int, default=20000, help='Facturas sembradas')
+    parser.add_argument('--solo', help='Prefijos de escenario separados por comas')
+    parser.add_argument('--todas', action='store_true', help='Mostrar el plan de todas las sentencias')
+    args = parser.parse_args()
+
+    carpeta = tempfile.TemporaryDirectory()
+    os.environ['FACTURAAPP_DATA_DIR'] = carpeta.name
+    sys.path.insert(0, BACKEND_DIR)
+    from bench_endpoints import ESCENARIOS, BLUEPRINTS_MEDIDOS, _ejecutar
+    from sembrar import sembrar
+    from app import app, db_path
+    from models import db
+    from reportes import reconstruir
+
+    ctx = sembrar(db_path, args.facturas)
+    with app.app_context():
+        reconstruir()
+        capturas = {}
+        capturar_planes(db.engine, capturas)
+    ctx['n'] = args.facturas
+
+    medidas = {endpoint for _, endpoint, _, _, _ in ESCENARIOS}
+    for regla in app.url_map.iter_rules():
+        if regla.endpoint.split('.')[0] in BLUEPRINTS_MEDIDOS and regla.endpoint not in medidas:
+            print(f"AVISO: la ruta {regla.endpoint} no tiene escenario: sus consultas no se comprueban")
+
+    http = app.test_client()
+    problemas = 0
+    for nombre, _, _, preparar, peticion in ESCENARIOS:
+        if args.solo and not any(nombre.startswith(s) for s in args.solo.split(',')):
+            continue
+        preparado = preparar(http, ctx, 0) if preparar else None # Sus consultas no se capturan
+        capturas['actual'] = sentencias = []
+        estado = _ejecutar(http, *peticion(ctx, 0, preparado))
+        capturas['actual'] = None
+
+        print(f"{nombre:<26} {len(sentencias):>3} sentencias  (HTTP {estado})")
+        vistas = set()
+        for sentencia, plan in sentencias:
+            if sentencia in vistas:
+                continue
+            vistas.add(sentencia)
+            marcadas = [t for t in recorridos_completos(plan) if (nombre, t) not in PERMITIDOS]
+            problemas += bool(marcadas)
+            if marcadas or args.todas:
+                print(f"    {'RECORRIDO COMPLETO de ' + ', '.join(marcadas) if marcadas else 'ok'}:")
+                print(f"      {' '.join(sentencia.split())[:300]}")
+                for detalle in plan:
+                    print(f"        {detalle}")
+
+    carpeta.cleanup()
+    print(f"{problemas} sentencias con recorridos completos de tablas grandes")
+    sys.exit(1 if problemas else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# backend/busqueda.py
+
+import re
+from sqlalchemy import select, text
+from models import db, Cliente, Producto
+
+# Resultados por defecto y máximos de una búsqueda (?q=)
+LIMITE_BUSQUEDA = 20
+LIMITE_BUSQUEDA_MAXIMO = 100
+
+# --- Índices de texto completo (FTS5) ---
+# Tablas virtuales de contenido externo: el texto vive en cliente/producto y
+# los triggers mantienen el índice sincronizado en cada INSERT/UPDATE/DELETE.
+# 'prefix' precalcula prefijos cortos para que la búsqueda al teclear sea rápida.
+# La migración 2c7a4e1b9f30 crea exactamente los mismos objetos.
+_INDICES_FTS = {
+    'cliente_fts': ('cliente', ['nombre', 'apellido', 'email']),
+    'producto_fts': ('producto', ['nombre', 'descripcion']),
+}
+
+def _sql_fts(nombre_fts, tabla, columnas):
+    cols = ', '.join(columnas)
+    nuevos = ', '.join(f'new.{c}' for c in columnas)
+    viejos = ', '.join(f'old.{c}' for c in columnas)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {nombre_fts} USING fts5({cols}, content='{tabla}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {nombre_fts}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {nombre_fts}(rowid, {cols}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {nombre_fts}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {nombre_fts}({nombre_fts}, rowid, {cols}) VALUES ('delete', old.id, {viejos}); END",
+        # Solo al cambiar columnas indexadas (p. ej. no al descontar stock)
+        f"CREATE TRIGGER IF NOT EXISTS {nombre_fts}_au AFTER UPDATE OF {cols} ON {tabla} BEGIN "
+        f"INSERT INTO {nombre_fts}({nombre_fts}, rowid, {cols}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {nombre_fts}(rowid, {cols}) VALUES (new.id, {nuevos}); END",
+    ]
+
+def asegurar_fts():
+    """Crea los índices FTS5 y sus triggers si no existen; si son nuevos, los llena."""
+    existentes = set(db.session.scalars(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('cliente_fts', 'producto_fts')")))
+    for nombre_fts, (tabla, columnas) in _INDICES_FTS.items():
+        for sentencia in _sql_fts(nombre_fts, tabla, columnas):
+            db.session.execute(text(sentencia))
+        if nombre_fts not in existentes:
+            db.session.execute(text(f"INSERT INTO {nombre_fts}({nombre_fts}) VALUES ('rebuild')"))
+    db.session.commit()
+
+# --- Búsqueda ---
+
+def construir_consulta(q, prefijo=False):
+    """
+    Convierte el texto del usuario en una expresión MATCH segura: cada palabra
+    va entre comillas (sin operadores FTS5) y todas deben aparecer. En modo
+    prefijo cada palabra también encaja con el inicio de otra ("jua" -> "juan").
+    """
+    palabras = re.findall(r'\w+', q or '')
+    if not palabras:
+        raise ValueError("La búsqueda debe contener al menos una palabra")
+    return ' '.join(f'"{p}"*' if prefijo else f'"{p}"' for p in palabras)
+
+def leer_parametros_busqueda(args):
+    """Devuelve (consulta MATCH, limite) a partir de ?q=, ?prefijo= y ?limit=."""
+    prefijo = args.get('prefijo') in ('1', 'true')
+    try:
+        limite = int(args.get('limit', LIMITE_BUSQUEDA))
+    except (ValueError, TypeError):
+        raise ValueError("limit debe ser un número entero válido")
+    if limite <= 0:
+        raise ValueError("limit debe ser positivo")
+    return construir_consulta(args.get('q'), prefijo), min(limite, LIMITE_BUSQUEDA_MAXIMO)
+
+def buscar_clientes(consulta, limite):
+    """Clientes que coinciden, ordenados por relevancia (bm25; pesa más el nombre)."""
+    return db.session.scalars(select(Cliente).from_statement(text(
+        "SELECT cliente.* FROM cliente_fts JOIN cliente ON cliente.id = cliente_fts.rowid "
+        "WHERE cliente_fts MATCH :consulta "
+        "ORDER BY bm25(cliente_fts, 10.0, 5.0, 1.0) LIMIT :limite"
+    )), {"consulta": consulta, "limite": limite}).all()
+
+def buscar_productos(consulta, limite):
+    """Productos que coinciden, ordenados por relevancia (bm25; pesa más el nombre)."""
+    return db.session.scalars(select(Producto).from_statement(text(
+        "SELECT producto.* FROM producto_fts JOIN producto ON producto.id = producto_fts.rowid "
+        "WHERE producto_fts MATCH :consulta "
+        "ORDER BY bm25(producto_fts, 10.0, 1.0) LIMIT :limite"
+    )), {"consulta": consulta, "limite": limite}).all()
@@ -0,0 +1,64 @@
+# backend/cache_pdf.py
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from flask import current_app
+from pdf_factura import VERSION_PLANTILLA, generar_pdf_factura
+
+# --- Caché en disco de PDFs de facturas ---
+# Cada PDF se guarda en <carpeta de datos>/pdf_cache/factura-<id>-<hash>.pdf,
+# donde el hash cubre los datos de la factura y la versión de la plantilla.
+# Si cambian los datos (p. ej. se renombra el cliente) cambia el hash y se
+# genera un PDF nuevo; el hash sirve también como ETag.
+
+def directorio_cache():
+    return os.path.join(current_app.config['APP_DATA_DIR'], 'pdf_cache')
+
+def clave_factura(datos):
+    """Hash del contenido de la factura (dict de la respuesta de detalle)."""
+    crudo = json.dumps([VERSION_PLANTILLA, datos], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(crudo.encode('utf-8')).hexdigest()
+
+def ruta_pdf(factura_id, clave):
+    return os.path.join(directorio_cache(), f"factura-{factura_id}-{clave[:32]}.pdf")
+
+def obtener_pdf(datos, clave=None):
+    """
+    Devuelve la ruta del PDF cacheado de la factura, generándolo si no existe.
+    La escritura es atómica (fichero temporal + os.replace), así dos peticiones
+    simultáneas nunca sirven un PDF a medio escribir.
+    """
+    clave = clave or clave_factura(datos)
+    ruta = ruta_pdf(datos['id'], clave)
+    if not os.path.exists(ruta):
+        contenido, _ = generar_pdf_factura(datos)
+        guardar_pdf(datos['id'], clave, contenido)
+    return ruta
+
+def guardar_pdf(factura_id, clave, contenido):
+    """Guarda un PDF ya generado y elimina las versiones anteriores de la misma factura."""
+    carpeta = directorio_cache()
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = ruta_pdf(factura_id, clave)
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+    for anterior in glob.glob(os.path.join(carpeta, f"factura-{factura_id}-*.pdf")):
+        if anterior != ruta:
+            _borrar(anterior)
+    return ruta
+
+def invalidar_pdf(factura_id):
+    """Elimina los PDF cacheados de una factura (al eliminarla)."""
+    for ruta in glob.glob(os.path.join(directorio_cache(), f"factura-{factura_id}-*.pdf")):
+        _borrar(ruta)
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass # Otra petición ya lo borró
@@ -0,0 +1,143 @@
+# backend/catalogo.py
+
+import threading
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event, select
+from models import db, Cliente, Producto
+from metricas import describir, incrementar
+
+# --- Caché de clientes y productos ---
+# Crear una factura necesita el precio de cada producto y saber que el
+# cliente existe; el catálogo cambia muy de vez en cuando, así que se guardan
+# en memoria copias inmutables (namedtuple) de las columnas que se usan, con
+# un máximo de entradas (LRU). Se rellena al leer y se invalida por eventos de
+# la sesión al confirmar cambios en esas columnas, sea desde las rutas o desde
+# cualquier otro código del proceso. El stock no se guarda: cambia con cada
+# factura y se descuenta en SQL (stock.py). Igual que versiones.py, no ve las
+# escrituras de otros procesos (comandos flask) hasta reiniciar la app.
+
+MAX_ENTRADAS = 5000 # Por tabla
+
+ProductoCacheado = namedtuple('ProductoCacheado', 'id nombre descripcion precio_centimos')
+ClienteCacheado = namedtuple('ClienteCacheado', 'id nombre apellido email')
+
+describir('facturaapp_cache_catalogo_total', 'counter', 'Búsquedas en la caché de catálogo por tabla y resultado')
+describir('facturaapp_cache_catalogo_invalidaciones_total', 'counter', 'Entradas invalidadas en la caché de catálogo')
+
+class CacheLRU:
+    """
+    Diccionario acotado {id: copia} seguro entre hilos. 'generacion' sube con
+    cada invalidación: una lectura de la base de datos empezada antes de una
+    invalidación no se guarda, porque podría traer el valor anterior.
+    """
+
+    def __init__(self, modelo, tipo, maximo=MAX_ENTRADAS):
+        self.tabla = modelo.__tablename__
+        self.columnas = [getattr(modelo, campo) for campo in tipo._fields]
+        self.tipo = tipo
+        self.maximo = maximo
+        self.entradas = OrderedDict()
+        self.generacion = 0
+        self.bloqueo = threading.Lock()
+
+    def obtener(self, ids):
+        """{id: copia} de los ids que existen; los que faltan en la caché se leen con una sola consulta IN."""
+        encontrados, faltan = {}, []
+        with self.bloqueo:
+            for id in ids:
+                copia = self.entradas.get(id)
+                if copia is None:
+                    faltan.append(id)
+                else:
+                    self.entradas.move_to_end(id)
+                    encontrados[id] = copia
+            generacion = self.generacion
+        if encontrados:
+            incrementar('facturaapp_cache_catalogo_total', len(encontrados), tabla=self.tabla, resultado='acierto')
+        if not faltan:
+            return encontrados
+
+        incrementar('facturaapp_cache_catalogo_total', len(faltan), tabla=self.tabla, resultado='fallo')
+        leidos = {fila[0]: self.tipo(*fila) for fila in db.session.execute(
+            select(*self.columnas).where(self.columnas[0].in_(faltan)))}
+        encontrados.update(leidos)
+        # Con cambios sin confirmar en la sesión lo leído puede no llegar a confirmarse
+        if leidos and not db.session.info.get('catalogo_pendiente'):
+            with self.bloqueo:
+                if generacion == self.generacion:
+                    self.entradas.update(leidos)
+                    while len(self.entradas) > self.maximo:
+                        self.entradas.popitem(last=False)
+        return encontrados
+
+    def invalidar(self, ids=None):
+        """Quita los ids indicados (o todo si ids es None)."""
+        with self.bloqueo:
+            self.generacion += 1
+            if ids is None:
+                quitados = len(self.entradas)
+                self.entradas.clear()
+            else:
+                quitados = sum(self.entradas.pop(id, None) is not None for id in ids)
+        if quitados:
+            incrementar('facturaapp_cache_catalogo_invalidaciones_total', quitados, tabla=self.tabla)
+
+PRODUCTOS = CacheLRU(Producto, ProductoCacheado)
+CLIENTES = CacheLRU(Cliente, ClienteCacheado)
+_CACHES = {Producto: PRODUCTOS, Cliente: CLIENTES}
+
+def productos(ids):
+    """{producto_id: ProductoCacheado} de los productos que existen."""
+    return PRODUCTOS.obtener(ids)
+
+def clientes(ids):
+    """{cliente_id: ClienteCacheado} de los clientes que existen."""
+    return CLIENTES.obtener(ids)
+
+def cliente(id):
+    """ClienteCacheado o None si no existe."""
+    return CLIENTES.obtener([id]).get(id)
+
+# --- Invalidación ---
+
+def registrar_invalidacion(session):
+    """
+    Registra los eventos de sesión que invalidan la caché. Como en
+    versiones.registrar_eventos, los cambios se anotan al hacer flush y se
+    aplican tras el commit. Las sentencias UPDATE/DELETE masivas del ORM
+    vacían la caché de su tabla, salvo las marcadas con
+    execution_options(invalida_catalogo=False) (el descuento de stock).
+    """
+    def anotar(sesion, cache, ids):
+        pendiente = sesion.info.setdefault('catalogo_pendiente', {})
+        if ids is None or pendiente.get(cache, set()) is None:
+            pendiente[cache] = None # Toda la tabla
+        else:
+            pendiente.setdefault(cache, set()).update(ids)
+
+    @event.listens_for(session, 'after_flush')
+    def tras_flush(sesion, flush_context):
+        for obj in list(sesion.dirty) + list(sesion.deleted):
+            cache = _CACHES.get(type(obj))
+            if cache is None:
+                continue
+            if obj in sesion.deleted or any(
+                    db.inspect(obj).attrs[campo].history.has_changes() for campo in cache.tipo._fields):
+                anotar(sesion, cache, {obj.id})
+
+    @event.listens_for(session, 'do_orm_execute')
+    def tras_ejecutar(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None \
+                and mapper.class_ in _CACHES \
+                and orm_execute_state.execution_options.get('invalida_catalogo', True):
+            anotar(orm_execute_state.session, _CACHES[mapper.class_], None)
+
+    @event.listens_for(session, 'after_commit')
+    def tras_commit(sesion):
+        for cache, ids in sesion.info.pop('catalogo_pendiente', {}).items():
+            cache.invalidar(ids)
+
+    @event.listens_for(session, 'after_soft_rollback')
+    def tras_rollback(sesion, transaccion_previa):
+        sesion.info.pop('catalogo_pendiente', None)
@@ -0,0 +1,74 @@
+# backend/dinero.py
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import Integer, text
+from sqlalchemy.types import TypeDecorator
+
+# --- Importes en céntimos ---
+# Todos los importes se guardan como enteros de céntimos (3,99 € -> 399), así
+# las sumas y el IVA son exactos tanto en Python como en SUM() de SQLite. La
+# API sigue recibiendo y devolviendo euros: la conversión se hace solo en los
+# bordes (a_centimos al leer la petición, a_euros al serializar).
+
+class Centimos(TypeDecorator):
+    """Columna INTEGER de céntimos. Rechaza floats/Decimal para no mezclar unidades."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and not isinstance(value, int):
+            raise TypeError(f"Importe en céntimos esperado (int), recibido {type(value).__name__}: "
+                            f"usa dinero.a_centimos()")
+        return value
+
+def a_centimos(valor):
+    """Euros (número o texto) -> céntimos (int), redondeando al céntimo más cercano."""
+    if isinstance(valor, bool):
+        raise ValueError("Importe no válido")
+    try:
+        importe = Decimal(str(valor))
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError("Importe no válido")
+    if not importe.is_finite():
+        raise ValueError("Importe no válido")
+    return int((importe * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+def a_euros(centimos):
+    """Céntimos (int) -> euros (float) para las respuestas JSON."""
+    return centimos / 100 if centimos is not None else 0.0
+
+def porcentaje(centimos, tanto_por_ciento):
+    """Porcentaje de un importe en céntimos, redondeado al céntimo (mitad hacia arriba)."""
+    return (centimos * tanto_por_ciento + 50) // 100
+
+# --- Conversión de bases de datos antiguas ---
+# Las bases de datos creadas con create_all antes de este cambio tienen los
+# importes en columnas Float (euros). La migración 7e4b2d9c1a68 hace la misma
+# conversión para quien usa 'flask db upgrade'.
+
+COLUMNAS_DINERO = {
+    'producto': ['precio'],
+    'factura': ['subtotal', 'iva', 'total'],
+    'detalle_factura': ['precio_unitario', 'subtotal_linea'],
+    'resumen_mensual': ['subtotal', 'iva', 'total'],
+    'resumen_cliente': ['subtotal', 'iva', 'total'],
+    'resumen_producto': ['ingresos'],
+}
+
+def asegurar_centimos(session):
+    """Convierte a <columna>_centimos (INTEGER) las columnas de euros que queden. Idempotente."""
+    convertidas = []
+    for tabla, columnas in COLUMNAS_DINERO.items():
+        existentes = {fila[1] for fila in session.execute(text(f"PRAGMA table_info({tabla})"))}
+        for columna in columnas:
+            if columna not in existentes or f"{columna}_centimos" in existentes:
+                continue
+            session.execute(text(
+                f"ALTER TABLE {tabla} ADD COLUMN {columna}_centimos INTEGER NOT NULL DEFAULT 0"))
+            session.execute(text(
+                f"UPDATE {tabla} SET {columna}_centimos = CAST(ROUND({columna} * 100) AS INTEGER)"))
+            session.execute(text(f"ALTER TABLE {tabla} DROP COLUMN {columna}"))
+            convertidas.append(f"{tabla}.{columna}")
+    session.commit()
+    if convertidas:
+        print(f"Importes convertidos a céntimos: {', '.join(convertidas)}")
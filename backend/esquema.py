@@ -0,0 +1,41 @@
+# backend/esquema.py
+
+from sqlalchemy import text
+from models import db
+from dinero import asegurar_centimos
+from reportes import reconstruir_si_vacio
+from busqueda import asegurar_fts
+
+# --- Versión del esquema ---
+# La base de datos guarda en PRAGMA user_version la versión del esquema que
+# ya tiene aplicada. Si coincide con VERSION_ESQUEMA el arranque se limita a
+# esa lectura; si no, ejecuta todas las comprobaciones (idempotentes) y la
+# actualiza. Subir VERSION_ESQUEMA al cambiar modelos, índices o triggers, y
+# añadir aquí lo que create_all no hace en tablas ya existentes.
+VERSION_ESQUEMA = 4 # 2: índices de claves foráneas; 3: tabla archivo_anual; 4: índice cliente/fecha
+
+# Índices sustituidos por otros: se borran al actualizar el esquema
+INDICES_OBSOLETOS = ['ix_factura_cliente_id'] # -> ix_factura_cliente_fecha_id
+
+def asegurar_indices():
+    """Crea los índices de los modelos que falten (create_all no los añade a tablas ya existentes) y borra los obsoletos."""
+    conexion = db.session.connection()
+    for nombre in INDICES_OBSOLETOS:
+        conexion.execute(text(f"DROP INDEX IF EXISTS {nombre}"))
+    for tabla in db.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            indice.create(conexion, checkfirst=True)
+
+def preparar_base_de_datos():
+    """Deja el esquema al día. Devuelve True si ha tenido que comprobarlo entero."""
+    if db.session.execute(text("PRAGMA user_version")).scalar() == VERSION_ESQUEMA:
+        db.session.rollback() # Cerrar la transacción de la lectura
+        return False
+    db.create_all()
+    asegurar_centimos(db.session) # Bases de datos antiguas con importes Float en euros
+    reconstruir_si_vacio()
+    asegurar_fts() # Índices de búsqueda y triggers (no los crea create_all)
+    asegurar_indices()
+    db.session.execute(text(f"PRAGMA user_version = {VERSION_ESQUEMA}"))
+    db.session.commit()
+    return True
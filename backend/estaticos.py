@@ -0,0 +1,137 @@
+# backend/estaticos.py
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import click
+from flask import Response, current_app, request, send_file
+from flask.cli import with_appcontext
+
+try:
+    import brotli # Opcional: sin él solo se generan/sirven variantes .gz
+except ImportError:
+    brotli = None
+
+# --- Ficheros estáticos del frontend (build de Vite) ---
+# La carpeta static se recorre una sola vez al arrancar y se guarda un
+# manifiesto en memoria: por petición no se toca el disco salvo para enviar
+# el fichero. Los ficheros de assets/ llevan un hash en el nombre, así que se
+# cachean como inmutables; index.html se sirve desde memoria con ETag y se
+# revalida siempre, para que un build nuevo se vea al recargar.
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CARPETA_INMUTABLE = 'assets/'
+
+# Extensiones de las variantes precomprimidas, por orden de preferencia
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+EXTENSIONES_COMPRIMIBLES = {'.js', '.css', '.html', '.svg', '.json', '.txt', '.map'}
+TAMANO_MINIMO_COMPRIMIR = 1024 # Bytes; por debajo no compensa
+
+class Manifiesto:
+    """Ficheros de la carpeta estática: {ruta relativa: datos del fichero}."""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.ficheros = {}
+        self.index = None # (contenido, etag, {codificación: contenido comprimido})
+        if os.path.isdir(carpeta):
+            self._escanear()
+
+    def _escanear(self):
+        for raiz, _, nombres in os.walk(self.carpeta):
+            for nombre in nombres:
+                if nombre.endswith(('.gz', '.br')):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                relativa = os.path.relpath(ruta, self.carpeta).replace(os.sep, '/')
+                info = os.stat(ruta)
+                variantes = {codificacion: ruta + extension for codificacion, extension in CODIFICACIONES
+                             if os.path.exists(ruta + extension)}
+                self.ficheros[relativa] = {
+                    'ruta': ruta,
+                    'mimetype': mimetypes.guess_type(nombre)[0] or 'application/octet-stream',
+                    # Tamaño + fecha: suficiente para detectar un build nuevo sin leer el fichero
+                    'etag': hashlib.sha1(f"{relativa}:{info.st_size}:{info.st_mtime_ns}".encode()).hexdigest(),
+                    'inmutable': relativa.startswith(CARPETA_INMUTABLE),
+                    'variantes': variantes,
+                }
+
+        if 'index.html' in self.ficheros:
+            with open(self.ficheros['index.html']['ruta'], 'rb') as f:
+                contenido = f.read()
+            comprimidos = {'gzip': gzip.compress(contenido, mtime=0)}
+            if brotli is not None:
+                comprimidos['br'] = brotli.compress(contenido)
+            self.index = (contenido, hashlib.sha1(contenido).hexdigest(), comprimidos)
+
+    def servir(self, ruta):
+        """Respuesta para /<ruta>: el fichero si existe; si no, index.html (rutas de React)."""
+        fichero = self.ficheros.get(ruta)
+        if fichero is None or ruta == 'index.html':
+            return self._servir_index()
+
+        codificacion = _elegir_codificacion(fichero['variantes'])
+        ruta_envio = fichero['variantes'][codificacion] if codificacion else fichero['ruta']
+        respuesta = send_file(ruta_envio, mimetype=fichero['mimetype'], conditional=True,
+                              etag=fichero['etag'] + (f"-{codificacion}" if codificacion else ''))
+        if codificacion:
+            respuesta.headers['Content-Encoding'] = codificacion
+        if fichero['variantes']:
+            respuesta.vary.add('Accept-Encoding')
+        if fichero['inmutable']:
+            respuesta.headers['Cache-Control'] = CACHE_INMUTABLE
+        else:
+            respuesta.cache_control.no_cache = True
+        return respuesta
+
+    def _servir_index(self):
+        if self.index is None:
+            return Response("Frontend no encontrado (falta static/index.html)", 404, mimetype='text/plain')
+        contenido, etag, comprimidos = self.index
+        codificacion = _elegir_codificacion(comprimidos)
+        respuesta = Response(comprimidos[codificacion] if codificacion else contenido,
+                             mimetype='text/html')
+        if codificacion:
+            respuesta.headers['Content-Encoding'] = codificacion
+        respuesta.vary.add('Accept-Encoding')
+        respuesta.set_etag(etag + (f"-{codificacion}" if codificacion else ''))
+        respuesta.cache_control.no_cache = True
+        return respuesta.make_conditional(request)
+
+def _elegir_codificacion(disponibles):
+    """La mejor codificación disponible que acepte el cliente (Accept-Encoding), o None."""
+    for codificacion, _ in CODIFICACIONES:
+        if codificacion in disponibles and request.accept_encodings[codificacion] > 0:
+            return codificacion
+    return None
+
+# --- Compresión previa (tras cada build del frontend) ---
+
+def comprimir_carpeta(carpeta):
+    """Genera las variantes .gz (y .br si hay brotli) de los ficheros comprimibles. Devuelve cuántas."""
+    generadas = 0
+    for raiz, _, nombres in os.walk(carpeta):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            if os.path.splitext(nombre)[1] not in EXTENSIONES_COMPRIMIBLES \
+                    or os.path.getsize(ruta) < TAMANO_MINIMO_COMPRIMIR:
+                continue
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+            variantes = {'.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variantes['.br'] = brotli.compress(contenido, quality=11)
+            for extension, comprimido in variantes.items():
+                if len(comprimido) < len(contenido):
+                    with open(ruta + extension, 'wb') as f:
+                        f.write(comprimido)
+                    generadas += 1
+    return generadas
+
+@click.command('comprimir-estaticos')
+@with_appcontext
+def comprimir_estaticos_comando():
+    """Precomprime los ficheros del frontend (.gz y, si está brotli, .br)."""
+    generadas = comprimir_carpeta(current_app.config['STATIC_DIR'])
+    click.echo(f"{generadas} ficheros comprimidos generados{'' if brotli else ' (brotli no instalado: solo .gz)'}.")
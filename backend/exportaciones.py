@@ -0,0 +1,284 @@
+# backend/exportaciones.py
+
+import csv
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, select
+from models import db, Cliente, Producto
+from archivo import adjuntar, contar_facturas, en_rango, fuentes_facturas
+from dinero import a_euros
+from metricas import describir, incrementar, observar
+
+try:
+    import openpyxl # Opcional: sin él no se ofrece el formato xlsx
+except ImportError:
+    openpyxl = None
+
+# --- Exportaciones en segundo plano ---
+# POST /api/exports encola la exportación de las facturas (con sus líneas) de
+# un rango de fechas y responde al momento. Un pool de pocos hilos la escribe
+# en <carpeta de datos>/exportaciones por bloques de facturas: cada bloque es
+# una consulta corta (keyset por fecha, id), así ninguna transacción de
+# lectura dura toda la exportación y los hilos de las peticiones nunca esperan.
+# Los trabajos viven en memoria del proceso; los ficheros se borran pasadas
+# RETENCION horas, también los que quedaran de una ejecución anterior. Los
+# hilos son daemon: cerrar la app no espera a las exportaciones en curso, que
+# se pierden (solo dejan un fichero .parcial, que se borra igual).
+
+CARPETA_EXPORTACIONES = 'exportaciones'
+HILOS_EXPORTACION = 2      # Exportaciones simultáneas
+MAX_EN_COLA = 20           # Trabajos pendientes o en curso a la vez
+TAMANO_BLOQUE = 2000       # Facturas por consulta
+RETENCION = timedelta(hours=24)
+
+FORMATOS = {'csv': 'text/csv', 'json': 'application/json',
+            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
+
+COLUMNAS = ['factura_id', 'fecha', 'cliente_id', 'cliente', 'subtotal', 'iva', 'total',
+            'producto_id', 'producto', 'cantidad', 'precio_unitario', 'subtotal_linea']
+
+describir('facturaapp_exportaciones_total', 'counter', 'Exportaciones terminadas por formato y estado')
+describir('facturaapp_exportacion_segundos', 'histogram', 'Duración de las exportaciones')
+
+_trabajos = {}
+_bloqueo = threading.Lock()
+_cola = queue.Queue() # (app, trabajo_id) pendientes de un hilo libre
+_hilos = []
+
+class ColaLlena(Exception):
+    pass
+
+def formatos_disponibles():
+    return [f for f in FORMATOS if f != 'xlsx' or openpyxl is not None]
+
+def directorio_exportaciones():
+    return os.path.join(current_app.config['APP_DATA_DIR'], CARPETA_EXPORTACIONES)
+
+# --- Trabajos ---
+
+def encolar(formato, desde=None, hasta=None):
+    """
+    Crea un trabajo de exportación y lo encola. Devuelve su dict de estado.
+    Lanza ValueError si el formato no está disponible y ColaLlena si hay
+    demasiados trabajos pendientes.
+    """
+    if formato not in formatos_disponibles():
+        raise ValueError(f"Formato no disponible: {formato}. Disponibles: {', '.join(formatos_disponibles())}")
+    _purgar()
+    trabajo = {
+        'id': uuid.uuid4().hex[:16], 'estado': 'pendiente', 'formato': formato,
+        'desde': desde, 'hasta': hasta, 'creado': datetime.utcnow(), 'terminado': None,
+        'total_facturas': None, 'facturas_procesadas': 0, 'lineas': 0, 'bytes': 0, 'error': None,
+        'ruta': None,
+    }
+    with _bloqueo:
+        activos = sum(1 for t in _trabajos.values() if t['estado'] in ('pendiente', 'en_curso'))
+        if activos >= MAX_EN_COLA:
+            raise ColaLlena(f"Hay {activos} exportaciones en cola; inténtalo más tarde")
+        _trabajos[trabajo['id']] = trabajo
+    _iniciar_hilos()
+    _cola.put((current_app._get_current_object(), trabajo['id']))
+    return estado(trabajo['id'])
+
+def estado(trabajo_id):
+    """Copia del estado de un trabajo (sin rutas internas), o None si no existe."""
+    with _bloqueo:
+        trabajo = _trabajos.get(trabajo_id)
+        if trabajo is None:
+            return None
+        datos = {clave: valor for clave, valor in trabajo.items() if clave != 'ruta'}
+    total = datos['total_facturas']
+    datos['progreso'] = 1.0 if datos['estado'] == 'terminado' else (
+        round(datos['facturas_procesadas'] / total, 4) if total else 0.0)
+    return datos
+
+def fichero(trabajo_id):
+    """Ruta del fichero de un trabajo terminado, o None."""
+    with _bloqueo:
+        trabajo = _trabajos.get(trabajo_id)
+        return trabajo['ruta'] if trabajo and trabajo['estado'] == 'terminado' else None
+
+def _actualizar(trabajo_id, **cambios):
+    with _bloqueo:
+        _trabajos[trabajo_id].update(cambios)
+
+def _purgar():
+    """
+    Olvida los trabajos terminados hace más de RETENCION y borra sus ficheros,
+    y los de más de RETENCION que no son de ningún trabajo (de antes de
+    reiniciar la app, o .parcial de una exportación cortada al cerrarla).
+    """
+    limite = datetime.utcnow() - RETENCION
+    with _bloqueo:
+        caducados = [t for t in _trabajos.values() if t['terminado'] and t['terminado'] < limite]
+        for trabajo in caducados:
+            del _trabajos[trabajo['id']]
+        conocidos = set(_trabajos)
+    for trabajo in caducados:
+        if trabajo['ruta'] and os.path.exists(trabajo['ruta']):
+            os.remove(trabajo['ruta'])
+    if os.path.isdir(directorio_exportaciones()):
+        for entrada in os.scandir(directorio_exportaciones()):
+            if entrada.name.split('.')[0] not in conocidos and \
+                    datetime.utcfromtimestamp(entrada.stat().st_mtime) < limite:
+                os.remove(entrada.path)
+
+# --- Ejecución (hilos de exportación) ---
+
+def _iniciar_hilos():
+    """Arranca los HILOS_EXPORTACION hilos (daemon) la primera vez que se encola algo."""
+    with _bloqueo:
+        while len(_hilos) < HILOS_EXPORTACION:
+            hilo = threading.Thread(target=_atender_cola, name=f'exportacion_{len(_hilos)}', daemon=True)
+            hilo.start()
+            _hilos.append(hilo)
+
+def _atender_cola():
+    while True:
+        app, trabajo_id = _cola.get()
+        try:
+            _ejecutar(app, trabajo_id)
+        except Exception as e: # _ejecutar ya marca el trabajo con error; esto no debe parar el hilo
+            print(f"Error en el hilo de exportación ({trabajo_id}): {e}")
+
+def _ejecutar(app, trabajo_id):
+    inicio = time.perf_counter()
+    with app.app_context(): # Sesión propia de este hilo
+        trabajo = estado(trabajo_id)
+        _actualizar(trabajo_id, estado='en_curso')
+        os.makedirs(directorio_exportaciones(), exist_ok=True)
+        ruta = os.path.join(directorio_exportaciones(), f"{trabajo_id}.{trabajo['formato']}")
+        parcial = ruta + '.parcial'
+        try:
+            _actualizar(trabajo_id, total_facturas=contar_facturas(trabajo['desde'], trabajo['hasta']))
+            with ESCRITORES[trabajo['formato']](parcial) as escritor:
+                for fuente in fuentes_facturas(trabajo['desde'], trabajo['hasta']):
+                    for cabeceras, lineas in _bloques(fuente, trabajo['desde'], trabajo['hasta']):
+                        for cabecera in cabeceras:
+                            escritor.factura(cabecera, lineas.get(cabecera.id, []))
+                        with _bloqueo:
+                            t = _trabajos[trabajo_id]
+                            t['facturas_procesadas'] += len(cabeceras)
+                            t['lineas'] += sum(len(l) for l in lineas.values())
+            os.replace(parcial, ruta) # Solo se descarga un fichero completo
+            _actualizar(trabajo_id, estado='terminado', ruta=ruta, bytes=os.path.getsize(ruta),
+                        terminado=datetime.utcnow())
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            print(f"Error en la exportación {trabajo_id}: {e}")
+            _actualizar(trabajo_id, estado='error', error=str(e), terminado=datetime.utcnow())
+    final = estado(trabajo_id)
+    incrementar('facturaapp_exportaciones_total', formato=final['formato'], estado=final['estado'])
+    observar('facturaapp_exportacion_segundos', time.perf_counter() - inicio, formato=final['formato'])
+
+def _bloques(fuente, desde, hasta):
+    """
+    Recorre las facturas de una fuente en bloques de TAMANO_BLOQUE ordenados por
+    (fecha, id). Devuelve (cabeceras, {factura_id: líneas}) por bloque; entre
+    bloques se cierra la transacción para no retener una instantánea de lectura.
+    """
+    factura, detalle, archivado = fuente
+    ultima = None
+    while True:
+        if archivado is not None:
+            adjuntar([archivado]) # La conexión puede ser otra en cada bloque
+        consulta = (select(factura.c.id, factura.c.fecha, factura.c.cliente_id, factura.c.subtotal_centimos,
+                           factura.c.iva_centimos, factura.c.total_centimos, Cliente.nombre, Cliente.apellido)
+                    .join_from(factura, Cliente, factura.c.cliente_id == Cliente.id, isouter=True)
+                    .where(*en_rango(factura, desde, hasta)))
+        if ultima is not None:
+            consulta = consulta.where(or_(factura.c.fecha > ultima[0],
+                                          and_(factura.c.fecha == ultima[0], factura.c.id > ultima[1])))
+        cabeceras = db.session.execute(
+            consulta.order_by(factura.c.fecha, factura.c.id).limit(TAMANO_BLOQUE)).all()
+        if not cabeceras:
+            db.session.rollback()
+            return
+        lineas = {}
+        for fila in db.session.execute(
+                select(detalle.c.factura_id, detalle.c.producto_id, Producto.nombre, detalle.c.cantidad,
+                       detalle.c.precio_unitario_centimos, detalle.c.subtotal_linea_centimos)
+                .join_from(detalle, Producto, detalle.c.producto_id == Producto.id, isouter=True)
+                .where(detalle.c.factura_id.in_([c.id for c in cabeceras]))
+                .order_by(detalle.c.factura_id, detalle.c.id)):
+            lineas.setdefault(fila.factura_id, []).append(fila)
+        db.session.rollback()
+        yield cabeceras, lineas
+        ultima = (cabeceras[-1].fecha, cabeceras[-1].id)
+
+# --- Formatos ---
+
+def _nombre_cliente(cabecera):
+    return " ".join(filter(None, [cabecera.nombre, cabecera.apellido])).strip()
+
+def _filas_planas(cabecera, lineas):
+    """Una fila por línea de factura (o una sin producto si la factura no tiene líneas)."""
+    comunes = [cabecera.id, cabecera.fecha.isoformat(), cabecera.cliente_id, _nombre_cliente(cabecera),
+               a_euros(cabecera.subtotal_centimos), a_euros(cabecera.iva_centimos), a_euros(cabecera.total_centimos)]
+    if not lineas:
+        yield comunes + [None] * 5
+    for l in lineas:
+        yield comunes + [l.producto_id, l.nombre, l.cantidad,
+                         a_euros(l.precio_unitario_centimos), a_euros(l.subtotal_linea_centimos)]
+
+class EscritorCSV:
+    def __init__(self, ruta):
+        self.f = open(ruta, 'w', newline='', encoding='utf-8-sig') # BOM: Excel lo abre en UTF-8
+        self.csv = csv.writer(self.f)
+        self.csv.writerow(COLUMNAS)
+
+    def factura(self, cabecera, lineas):
+        self.csv.writerows(_filas_planas(cabecera, lineas))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.close()
+
+class EscritorJSON(EscritorCSV):
+    """Array JSON de facturas con sus detalles, escrito objeto a objeto."""
+    def __init__(self, ruta):
+        self.f = open(ruta, 'w', encoding='utf-8')
+        self.f.write('[')
+        self.primera = True
+        self.codificar = current_app.json.dumps
+
+    def factura(self, cabecera, lineas):
+        self.f.write(('' if self.primera else ',') + '\n' + self.codificar({
+            "id": cabecera.id, "fecha": cabecera.fecha, "cliente_id": cabecera.cliente_id,
+            "cliente": _nombre_cliente(cabecera), "subtotal": a_euros(cabecera.subtotal_centimos),
+            "iva": a_euros(cabecera.iva_centimos), "total": a_euros(cabecera.total_centimos),
+            "detalles": [{"producto_id": l.producto_id, "producto": l.nombre, "cantidad": l.cantidad,
+                          "precio_unitario": a_euros(l.precio_unitario_centimos),
+                          "subtotal_linea": a_euros(l.subtotal_linea_centimos)} for l in lineas],
+        }))
+        self.primera = False
+
+    def __exit__(self, *exc):
+        self.f.write('\n]\n')
+        self.f.close()
+
+class EscritorXLSX(EscritorCSV):
+    """Hoja de cálculo en modo write_only de openpyxl (las filas no se guardan en memoria)."""
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.libro = openpyxl.Workbook(write_only=True)
+        self.hoja = self.libro.create_sheet('Facturas')
+        self.hoja.append(COLUMNAS)
+
+    def factura(self, cabecera, lineas):
+        for fila in _filas_planas(cabecera, lineas):
+            self.hoja.append(fila)
+
+    def __exit__(self, *exc):
+        self.libro.save(self.ruta)
+
+ESCRITORES = {'csv': EscritorCSV, 'json': EscritorJSON, 'xlsx': EscritorXLSX}
@@ -0,0 +1,186 @@
+# backend/importacion.py
+
+import codecs
+import csv
+import time
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from models import db, Cliente, Producto
+from dinero import a_centimos
+
+# --- Importación masiva desde CSV ---
+# Para cargar clientes y productos exportados de otro programa sin hacer un
+# POST por fila. El CSV se lee en streaming y se procesa por lotes: cada lote
+# se valida, comprueba los emails repetidos con una sola consulta IN (...) y
+# se inserta con un único executemany en su propia transacción. Un error en
+# una fila no detiene la importación: la fila se omite y se anota en el informe.
+
+TAMANO_LOTE = 500 # Muy por debajo del límite de parámetros de SQLite en el IN (...)
+MAX_ERRORES_INFORME = 1000 # Los siguientes solo se cuentan
+
+def _texto(fila, campo, longitud, requerido=False):
+    valor = (fila.get(campo) or '').strip()
+    if not valor:
+        if requerido:
+            raise ValueError(f"El campo '{campo}' es requerido")
+        return None
+    if len(valor) > longitud:
+        raise ValueError(f"El campo '{campo}' supera los {longitud} caracteres")
+    return valor
+
+def _validar_cliente(fila):
+    """Mismas reglas que POST /api/clientes/ (salvo el email único, que se comprueba por lote)."""
+    return {
+        'nombre': _texto(fila, 'nombre', 100, requerido=True),
+        'apellido': _texto(fila, 'apellido', 100),
+        'email': _texto(fila, 'email', 120, requerido=True),
+        'telefono': _texto(fila, 'telefono', 20),
+        'direccion': _texto(fila, 'direccion', 200),
+    }
+
+def _validar_producto(fila):
+    """Mismas reglas que POST /api/productos/. Admite coma decimal en el precio (12,50)."""
+    valores = {
+        'nombre': _texto(fila, 'nombre', 100, requerido=True),
+        'descripcion': _texto(fila, 'descripcion', 255),
+    }
+    precio = _texto(fila, 'precio', 50, requerido=True)
+    try:
+        valores['precio_centimos'] = a_centimos(precio.replace(',', '.') if '.' not in precio else precio)
+    except ValueError:
+        raise ValueError("El precio debe ser un número válido")
+    if valores['precio_centimos'] < 0:
+        raise ValueError("El precio no puede ser negativo")
+    stock = _texto(fila, 'stock', 20) # Vacío = sin inventario (NULL), como en la API
+    try:
+        valores['stock'] = int(stock) if stock is not None else None
+    except ValueError:
+        raise ValueError("El stock debe ser un número entero válido")
+    if valores['stock'] is not None and valores['stock'] < 0:
+        raise ValueError("El stock no puede ser negativo")
+    return valores
+
+def _emails_existentes(lote):
+    """Emails del lote que ya están en la base de datos: una sola consulta por lote."""
+    emails = [valores['email'] for _, valores in lote]
+    return set(db.session.execute(select(Cliente.email).where(Cliente.email.in_(emails))).scalars())
+
+# tipo -> (modelo, columnas obligatorias en la cabecera, validación, comprobación por lote)
+TIPOS_IMPORTACION = {
+    'clientes': (Cliente, ('nombre', 'email'), _validar_cliente, _emails_existentes),
+    'productos': (Producto, ('nombre', 'precio'), _validar_producto, None),
+}
+
+def leer_csv(flujo_bytes, delimitador=','):
+    """Lector de filas (dict) sobre un flujo binario, sin cargarlo entero en memoria."""
+    lineas = codecs.iterdecode(flujo_bytes, 'utf-8-sig') # Quita el BOM de los CSV de Excel
+    return csv.DictReader(lineas, delimiter=delimitador)
+
+def lector_de_peticion(peticion):
+    """
+    CSV de una petición de importación: campo 'archivo' de un formulario
+    multipart o el cuerpo en bruto (Content-Type: text/csv). ?delimitador=; opcional.
+    Lanza ValueError si no hay fichero.
+    """
+    delimitador = peticion.args.get('delimitador', ',')
+    if len(delimitador) != 1:
+        raise ValueError("El delimitador debe ser un único carácter")
+    if 'archivo' in peticion.files:
+        return leer_csv(peticion.files['archivo'].stream, delimitador)
+    if peticion.mimetype == 'text/csv':
+        return leer_csv(peticion.stream, delimitador)
+    raise ValueError("Envía el CSV en el campo 'archivo' o como cuerpo text/csv")
+
+def importar_csv(tipo, lector, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Importa las filas de 'lector' (csv.DictReader) como 'clientes' o 'productos'.
+    Devuelve un informe con filas leídas, importadas, errores por fila (número de
+    línea del CSV) y filas por segundo. 'progreso(leidas, importadas)' se llama
+    tras cada lote. Lanza ValueError si falta alguna columna obligatoria.
+    """
+    modelo, obligatorias, validar, comprobar_lote = TIPOS_IMPORTACION[tipo]
+    informe = {'tipo': tipo, 'filas': 0, 'importadas': 0, 'con_error': 0, 'errores': []}
+    inicio = time.perf_counter()
+
+    def anotar_error(linea, mensaje):
+        informe['con_error'] += 1
+        if len(informe['errores']) < MAX_ERRORES_INFORME:
+            informe['errores'].append({'fila': linea, 'error': mensaje})
+
+    def guardar(lote):
+        if comprobar_lote is not None:
+            repetidos = comprobar_lote(lote)
+            for linea, valores in lote:
+                if valores['email'] in repetidos:
+                    anotar_error(linea, "El email ya está registrado")
+            lote = [(linea, valores) for linea, valores in lote if valores['email'] not in repetidos]
+        if lote:
+            # Lista de diccionarios -> un solo executemany; los triggers FTS5 se disparan igual
+            db.session.execute(insert(modelo), [valores for _, valores in lote])
+        db.session.commit()
+        informe['importadas'] += len(lote)
+        if progreso is not None:
+            progreso(informe['filas'], informe['importadas'])
+
+    try:
+        faltan = [c for c in obligatorias if c not in (lector.fieldnames or [])]
+        if faltan:
+            raise ValueError(f"Faltan columnas en la cabecera del CSV: {', '.join(faltan)}")
+
+        lote, emails_vistos = [], set()
+        for fila in lector:
+            informe['filas'] += 1
+            linea = lector.line_num
+            try:
+                valores = validar(fila)
+            except ValueError as e:
+                anotar_error(linea, str(e))
+                continue
+            if comprobar_lote is not None:
+                # Repetidos dentro del propio CSV (la consulta solo ve lo ya insertado)
+                if valores['email'] in emails_vistos:
+                    anotar_error(linea, "Email repetido en el fichero")
+                    continue
+                emails_vistos.add(valores['email'])
+            lote.append((linea, valores))
+            if len(lote) >= tamano_lote:
+                guardar(lote)
+                lote = []
+        guardar(lote)
+    except (csv.Error, UnicodeDecodeError) as e:
+        # Fichero corrupto: se conserva lo ya confirmado y se informa dónde se paró
+        db.session.rollback()
+        anotar_error(lector.line_num, f"CSV no válido, importación detenida: {e}")
+        informe['detenida'] = True
+
+    informe['errores'].sort(key=lambda error: error['fila']) # Los de email existente llegan al cerrar el lote
+    informe['segundos'] = round(time.perf_counter() - inicio, 3)
+    informe['filas_por_segundo'] = round(informe['filas'] / informe['segundos'], 1) if informe['segundos'] else None
+    informe['errores_omitidos'] = informe['con_error'] - len(informe['errores'])
+    return informe
+
+# --- Comando CLI ---
+
+@click.command('importar-csv')
+@click.argument('tipo', type=click.Choice(list(TIPOS_IMPORTACION)))
+@click.argument('fichero', type=click.File('rb'))
+@click.option('--delimitador', default=',', show_default=True, help="Separador de campos (';' en CSV de Excel en español)")
+@click.option('--lote', 'tamano_lote', default=TAMANO_LOTE, show_default=True, help="Filas por transacción")
+@with_appcontext
+def importar_csv_comando(tipo, fichero, delimitador, tamano_lote):
+    """Importa clientes o productos desde un CSV con cabecera."""
+    def progreso(leidas, importadas):
+        click.echo(f"\r{leidas} filas leídas, {importadas} importadas", nl=False)
+
+    try:
+        informe = importar_csv(tipo, leer_csv(fichero, delimitador), tamano_lote, progreso)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo()
+    for error in informe['errores']:
+        click.echo(f"Fila {error['fila']}: {error['error']}")
+    if informe['errores_omitidos']:
+        click.echo(f"... y {informe['errores_omitidos']} errores más")
+    click.echo(f"{informe['importadas']} de {informe['filas']} filas importadas en {informe['segundos']} s "
+               f"({informe['filas_por_segundo']} filas/s).")
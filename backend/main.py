@@ -1,36 +1,147 @@
 # backend/main.py
 
-import webview
-import threading
+import arranque # Lo primero: marca el inicio para el informe de tiempos de arranque
+import argparse
+import multiprocessing
+import os
+import socket
 import sys
-import time
-from app import app # Importa tu app Flask
+import threading
+from ajustes_servidor import cargar_ajustes_servidor
 
 # --- Configuración ---
-FLASK_PORT = 5001 # Puerto de Flask
-SERVER_URL = f"http://127.0.0.1:{FLASK_PORT}"
 WINDOW_TITLE = "FacturaApp"
+ESPERA_MAXIMA = 60 # Segundos máximos esperando a que el servidor esté listo
+
+# app.py no carga Flask-Migrate (solo hace falta para 'flask db')
+os.environ.setdefault('FACTURAAPP_LANZADOR', '1')
+
+# --- Argumentos ---
+# Modos: 'escritorio' (por defecto: ventana pywebview + servidor de desarrollo)
+# y 'produccion' (sin ventana, waitress con un número fijo de hilos, para
+# usar el backend desde varios puestos de la red local).
+def leer_ajustes():
+    parser = argparse.ArgumentParser(description="FacturaApp")
+    parser.add_argument('--modo', choices=['escritorio', 'produccion'])
+    parser.add_argument('--host', help="Dirección de escucha (0.0.0.0 para la red local)")
+    parser.add_argument('--puerto', type=int)
+    parser.add_argument('--hilos', type=int, help="Hilos de waitress (modo produccion)")
+    args, _ = parser.parse_known_args() # macOS puede añadir argumentos propios al abrir la app
+    for clave, valor in (('SERVIDOR_MODO', args.modo), ('SERVIDOR_HOST', args.host),
+                         ('SERVIDOR_PUERTO', args.puerto), ('SERVIDOR_HILOS', args.hilos)):
+        if valor is not None:
+            # Por entorno, para que app.py dimensione el pool de conexiones igual
+            os.environ[f'FACTURAAPP_{clave}'] = str(valor)
+    ajustes = {}
+    cargar_ajustes_servidor(ajustes)
+    return ajustes
+
+# --- Puerto ---
+def abrir_puerto(ajustes):
+    """
+    Reserva el puerto antes de cargar la app. Desde aquí el sistema ya acepta
+    conexiones y las deja en la cola de listen() hasta que el servidor las atiende.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((ajustes['SERVIDOR_HOST'], ajustes['SERVIDOR_PUERTO']))
+    sock.listen(ajustes['SERVIDOR_BACKLOG'])
+    return sock
+
+# --- Servidores WSGI ---
+# Cada uno recibe el socket ya abierto y devuelve la función que lo pone a servir.
+
+def servidor_werkzeug(app, sock, ajustes):
+    """Servidor de desarrollo de Flask: un hilo nuevo por conexión."""
+    from werkzeug.serving import make_server
+    servidor = make_server(ajustes['SERVIDOR_HOST'], ajustes['SERVIDOR_PUERTO'], app,
+                           threaded=True, fd=sock.fileno())
+    return servidor.serve_forever
+
+def servidor_waitress(app, sock, ajustes):
+    """waitress: número fijo de hilos, keep-alive y límite de conexiones."""
+    try:
+        from waitress import create_server
+    except ImportError:
+        raise RuntimeError("El modo produccion necesita waitress (pip install waitress)")
+    servidor = create_server(
+        app,
+        sockets=[sock],
+        threads=ajustes['SERVIDOR_HILOS'],
+        backlog=ajustes['SERVIDOR_BACKLOG'],
+        channel_timeout=ajustes['SERVIDOR_KEEPALIVE_S'],
+        connection_limit=ajustes['SERVIDOR_MAX_CONEXIONES'],
+        ident=WINDOW_TITLE,
+    )
+    return servidor.run
+
+SERVIDORES = {'escritorio': servidor_werkzeug, 'produccion': servidor_waitress}
 
 # --- Función para correr Flask ---
-def run_server():
+def run_server(sock, ajustes, listo, errores):
     try:
-        print(f"Iniciando servidor Flask en {SERVER_URL}...")
-        app.run(port=FLASK_PORT, debug=False, use_reloader=False, threaded=True)
+        # La app se importa en este hilo para solaparla con la carga de pywebview
+        from app import app # Importa tu app Flask
+        from archivo import archivar_en_segundo_plano
+        servir = SERVIDORES[ajustes['SERVIDOR_MODO']](app, sock, ajustes)
+        if ajustes['SERVIDOR_MODO'] == 'produccion':
+            arranque.terminar('servidor listo') # Sin ventana: el arranque acaba aquí
+        else:
+            arranque.marcar('servidor listo')
+        print(f"Servidor ({ajustes['SERVIDOR_MODO']}) escuchando en {url_servidor(ajustes)}")
+        listo.set()
+        archivar_en_segundo_plano(app) # Ejercicios cerrados (FACTURAAPP_EJERCICIOS_ABIERTOS); no bloquea las escrituras
+        servir()
     except Exception as e:
         print(f"Error en hilo Flask: {e}")
+        errores.append(e)
+        listo.set()
+
+def url_servidor(ajustes):
+    host = ajustes['SERVIDOR_HOST']
+    if host == '0.0.0.0':
+        host = '127.0.0.1'
+    return f"http://{host}:{ajustes['SERVIDOR_PUERTO']}"
 
 # --- Función Principal ---
 def start_app():
     print("Iniciando aplicación...")
-    flask_thread = threading.Thread(target=run_server, daemon=True)
+    try:
+        ajustes = leer_ajustes()
+        sock = abrir_puerto(ajustes)
+    except (ValueError, OSError) as e:
+        print(f"No se pudo abrir el servidor: {e}")
+        sys.exit(1)
+    arranque.marcar('abrir puerto')
+
+    listo = threading.Event()
+    errores = []
+
+    if ajustes['SERVIDOR_MODO'] == 'produccion':
+        # Sin ventana: el servidor ocupa el hilo principal hasta Ctrl+C
+        try:
+            run_server(sock, ajustes, listo, errores)
+        except KeyboardInterrupt:
+            print("Servidor detenido.")
+        sys.exit(1 if errores else 0)
+
+    flask_thread = threading.Thread(target=run_server, args=(sock, ajustes, listo, errores),
+                                    name='servidor', daemon=True)
     flask_thread.start()
 
+    import webview # Mientras tanto el otro hilo carga la app
+    arranque.marcar('importar pywebview')
+
     print("Esperando al servidor...")
-    time.sleep(2) # Pausa para que Flask arranque
+    if not listo.wait(ESPERA_MAXIMA) or errores:
+        print("El servidor no ha podido arrancar. Terminando.")
+        sys.exit(1)
 
     try:
-        print(f"Creando ventana para {SERVER_URL}")
-        webview.create_window(WINDOW_TITLE, SERVER_URL, width=1280, height=800, resizable=True)
+        server_url = url_servidor(ajustes)
+        print(f"Creando ventana para {server_url}")
+        ventana = webview.create_window(WINDOW_TITLE, server_url, width=1280, height=800, resizable=True)
+        ventana.events.loaded += lambda: arranque.terminar('ventana cargada')
         webview.start(debug=False) # Poner True para depurar interfaz
     except Exception as e:
         print(f"Error al iniciar pywebview: {e}")
@@ -40,4 +151,5 @@ def start_app():
 
 # --- Punto de Entrada ---
 if __name__ == '__main__':
-    start_app()
\ No newline at end of file
+    multiprocessing.freeze_support() # Procesos del paquete de PDF en la app empaquetada (PyInstaller)
+    start_app()
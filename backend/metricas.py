@@ -0,0 +1,140 @@
+# backend/metricas.py
+
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# --- Métricas de la app ---
+# Registro en memoria (por proceso) de contadores e histogramas, expuesto en
+# formato de texto de Prometheus en GET /api/_metrics. Cada petición mide su
+# latencia y el número y tiempo de las consultas SQL que ejecuta; lo mismo se
+# devuelve en la cabecera Server-Timing para verlo en las DevTools del navegador.
+
+# Límites de las cubetas (le) de los histogramas
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 500)
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1) # La última es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+_bloqueo = threading.Lock()
+_descripciones = {} # nombre -> (tipo, ayuda), en orden de registro
+_valores = {}       # nombre -> {etiquetas (tupla ordenada): valor o Histograma}
+
+def describir(nombre, tipo, ayuda):
+    """Declara una métrica ('counter', 'gauge' o 'histogram') con su texto de ayuda."""
+    _descripciones[nombre] = (tipo, ayuda)
+    _valores.setdefault(nombre, {})
+
+def incrementar(nombre, valor=1, **etiquetas):
+    clave = tuple(sorted(etiquetas.items()))
+    with _bloqueo:
+        serie = _valores.setdefault(nombre, {})
+        serie[clave] = serie.get(clave, 0) + valor
+
+def observar(nombre, valor, limites=LIMITES_LATENCIA, **etiquetas):
+    clave = tuple(sorted(etiquetas.items()))
+    with _bloqueo:
+        serie = _valores.setdefault(nombre, {})
+        if clave not in serie:
+            serie[clave] = Histograma(limites)
+        serie[clave].observar(valor)
+
+describir('facturaapp_peticion_segundos', 'histogram', 'Latencia de las peticiones por endpoint')
+describir('facturaapp_peticiones_total', 'counter', 'Peticiones atendidas por endpoint, método y estado')
+describir('facturaapp_sql_consultas_por_peticion', 'histogram', 'Consultas SQL ejecutadas por petición')
+describir('facturaapp_sql_consultas_total', 'counter', 'Consultas SQL ejecutadas por endpoint')
+describir('facturaapp_sql_segundos_total', 'counter', 'Tiempo total en SQLite por endpoint')
+
+# --- Formato de texto de Prometheus ---
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in pares) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def texto_prometheus():
+    with _bloqueo:
+        lineas = []
+        for nombre, serie in _valores.items():
+            tipo, ayuda = _descripciones.get(nombre, ('untyped', nombre))
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for clave, valor in sorted(serie.items()):
+                if isinstance(valor, Histograma):
+                    acumulado = 0
+                    for limite, cuenta in zip(valor.limites + ('+Inf',), valor.cubetas):
+                        acumulado += cuenta
+                        lineas.append(f"{nombre}_bucket{_etiquetas(clave + (('le', limite),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(clave)} {_numero(valor.suma)}")
+                    lineas.append(f"{nombre}_count{_etiquetas(clave)} {valor.cuenta}")
+                else:
+                    lineas.append(f"{nombre}{_etiquetas(clave)} {_numero(valor)}")
+        return '\n'.join(lineas) + '\n'
+
+# --- Instrumentación de peticiones y consultas ---
+
+def registrar_metricas(app, engine):
+    """
+    Mide cada petición de la app y cada consulta SQL del engine. El tiempo SQL
+    cubre cursor.execute(); con SQLite eso incluye calcular la primera fila,
+    pero no la lectura del resto de filas (que cuenta como 'app').
+    """
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_consulta', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info['inicio_consulta'].pop()
+        # Consultas fuera de una petición (arranque, comandos flask) no se atribuyen
+        if has_request_context() and 'metricas' in g:
+            g.metricas['consultas'] += 1
+            g.metricas['sql'] += duracion
+
+    @event.listens_for(engine, 'handle_error')
+    def consulta_fallida(contexto):
+        if contexto.connection is not None and contexto.connection.info.get('inicio_consulta'):
+            contexto.connection.info['inicio_consulta'].pop()
+
+    @app.before_request
+    def iniciar_medicion():
+        g.metricas = {'inicio': time.perf_counter(), 'consultas': 0, 'sql': 0.0}
+
+    @app.after_request
+    def registrar_peticion(respuesta):
+        datos = g.pop('metricas', None)
+        if datos is None:
+            return respuesta
+        # En respuestas en streaming (NDJSON) no se incluye el envío del cuerpo
+        total = time.perf_counter() - datos['inicio']
+        endpoint = request.url_rule.endpoint if request.url_rule else 'sin_ruta'
+        observar('facturaapp_peticion_segundos', total, endpoint=endpoint, metodo=request.method)
+        incrementar('facturaapp_peticiones_total', endpoint=endpoint, metodo=request.method,
+                    estado=respuesta.status_code)
+        observar('facturaapp_sql_consultas_por_peticion', datos['consultas'], LIMITES_CONSULTAS, endpoint=endpoint)
+        incrementar('facturaapp_sql_consultas_total', datos['consultas'], endpoint=endpoint)
+        incrementar('facturaapp_sql_segundos_total', datos['sql'], endpoint=endpoint)
+
+        respuesta.headers.add('Server-Timing', ', '.join([
+            f'sql;dur={datos["sql"] * 1000:.2f};desc="{datos["consultas"]} consultas"',
+            f'app;dur={(total - datos["sql"]) * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ]))
+        return respuesta
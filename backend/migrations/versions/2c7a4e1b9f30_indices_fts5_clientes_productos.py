@@ -0,0 +1,38 @@
+"""Indices de texto completo FTS5 para clientes y productos
+
+Revision ID: 2c7a4e1b9f30
+Revises: 9d3f6a81c2e5
+Create Date: 2026-10-18 12:25:47.930162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7a4e1b9f30'
+down_revision = '9d3f6a81c2e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tablas virtuales FTS5 de contenido externo + triggers de sincronización
+    # (mismos objetos que busqueda.asegurar_fts)
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS cliente_fts USING fts5(nombre, apellido, email, content='cliente', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    op.execute("CREATE TRIGGER IF NOT EXISTS cliente_fts_ai AFTER INSERT ON cliente BEGIN INSERT INTO cliente_fts(rowid, nombre, apellido, email) VALUES (new.id, new.nombre, new.apellido, new.email); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS cliente_fts_ad AFTER DELETE ON cliente BEGIN INSERT INTO cliente_fts(cliente_fts, rowid, nombre, apellido, email) VALUES ('delete', old.id, old.nombre, old.apellido, old.email); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS cliente_fts_au AFTER UPDATE OF nombre, apellido, email ON cliente BEGIN INSERT INTO cliente_fts(cliente_fts, rowid, nombre, apellido, email) VALUES ('delete', old.id, old.nombre, old.apellido, old.email); INSERT INTO cliente_fts(rowid, nombre, apellido, email) VALUES (new.id, new.nombre, new.apellido, new.email); END")
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS producto_fts USING fts5(nombre, descripcion, content='producto', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    op.execute("CREATE TRIGGER IF NOT EXISTS producto_fts_ai AFTER INSERT ON producto BEGIN INSERT INTO producto_fts(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS producto_fts_ad AFTER DELETE ON producto BEGIN INSERT INTO producto_fts(producto_fts, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS producto_fts_au AFTER UPDATE OF nombre, descripcion ON producto BEGIN INSERT INTO producto_fts(producto_fts, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); INSERT INTO producto_fts(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END")
+    op.execute("INSERT INTO cliente_fts(cliente_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO producto_fts(producto_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    for tabla in ('cliente', 'producto'):
+        for sufijo in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {tabla}_fts_{sufijo}")
+        op.execute(f"DROP TABLE IF EXISTS {tabla}_fts")
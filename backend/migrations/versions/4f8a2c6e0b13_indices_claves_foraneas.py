@@ -0,0 +1,33 @@
+"""Indices en las claves foraneas de factura y detalle_factura
+
+Revision ID: 4f8a2c6e0b13
+Revises: 7e4b2d9c1a68
+Create Date: 2026-10-18 15:04:48.731206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2c6e0b13'
+down_revision = '7e4b2d9c1a68'
+branch_labels = None
+depends_on = None
+
+# Los mismos que crea esquema.asegurar_indices() al arrancar la app
+INDICES = [
+    ('ix_factura_cliente_id', 'factura', ['cliente_id']), # Sustituido en c3e9f4a1d576
+    ('ix_detalle_factura_factura_id', 'detalle_factura', ['factura_id']),
+    ('ix_detalle_factura_producto_id', 'detalle_factura', ['producto_id']),
+]
+
+
+def upgrade():
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
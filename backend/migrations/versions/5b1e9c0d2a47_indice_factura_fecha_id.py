@@ -0,0 +1,25 @@
+"""Indice compuesto factura (fecha, id) para la paginacion keyset
+
+Revision ID: 5b1e9c0d2a47
+Revises: 38cba16d8cf8
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9c0d2a47'
+down_revision = '38cba16d8cf8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: la app puede haberlo creado ya al arrancar (esquema.asegurar_indices)
+    op.create_index('ix_factura_fecha_id', 'factura', ['fecha', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_factura_fecha_id', table_name='factura', if_exists=True)
@@ -0,0 +1,55 @@
+"""Importes en céntimos enteros en lugar de Float (euros)
+
+Revision ID: 7e4b2d9c1a68
+Revises: 2c7a4e1b9f30
+Create Date: 2026-10-18 13:52:10.274619
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4b2d9c1a68'
+down_revision = '2c7a4e1b9f30'
+branch_labels = None
+depends_on = None
+
+# Mismas columnas que dinero.COLUMNAS_DINERO
+COLUMNAS_DINERO = {
+    'producto': ['precio'],
+    'factura': ['subtotal', 'iva', 'total'],
+    'detalle_factura': ['precio_unitario', 'subtotal_linea'],
+    'resumen_mensual': ['subtotal', 'iva', 'total'],
+    'resumen_cliente': ['subtotal', 'iva', 'total'],
+    'resumen_producto': ['ingresos'],
+}
+
+
+def _columnas(tabla):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(tabla)}
+
+
+def upgrade():
+    # ADD + UPDATE + DROP COLUMN (SQLite >= 3.35) en vez de batch_alter_table:
+    # recrear producto/cliente borraría los triggers de los índices FTS5.
+    # Se saltan las columnas ya convertidas por dinero.asegurar_centimos al arrancar.
+    for tabla, columnas in COLUMNAS_DINERO.items():
+        existentes = _columnas(tabla)
+        for columna in columnas:
+            if columna not in existentes or f"{columna}_centimos" in existentes:
+                continue
+            op.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna}_centimos INTEGER NOT NULL DEFAULT 0")
+            op.execute(f"UPDATE {tabla} SET {columna}_centimos = CAST(ROUND({columna} * 100) AS INTEGER)")
+            op.execute(f"ALTER TABLE {tabla} DROP COLUMN {columna}")
+
+
+def downgrade():
+    for tabla, columnas in COLUMNAS_DINERO.items():
+        existentes = _columnas(tabla)
+        for columna in columnas:
+            if f"{columna}_centimos" not in existentes:
+                continue
+            op.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} FLOAT NOT NULL DEFAULT 0")
+            op.execute(f"UPDATE {tabla} SET {columna} = {columna}_centimos / 100.0")
+            op.execute(f"ALTER TABLE {tabla} DROP COLUMN {columna}_centimos")
@@ -0,0 +1,28 @@
+"""Indice compuesto factura (cliente_id, fecha, id) para el extracto de cliente
+
+Revision ID: c3e9f4a1d576
+Revises: a61d3b7f9e24
+Create Date: 2026-10-18 17:38:52.906114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9f4a1d576'
+down_revision = 'a61d3b7f9e24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sustituye a ix_factura_cliente_id: el nuevo índice empieza por cliente_id
+    op.create_index('ix_factura_cliente_fecha_id', 'factura', ['cliente_id', 'fecha', 'id'], unique=False,
+                    if_not_exists=True)
+    op.drop_index('ix_factura_cliente_id', table_name='factura', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_factura_cliente_id', 'factura', ['cliente_id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_factura_cliente_fecha_id', table_name='factura', if_exists=True)
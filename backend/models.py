@@ -2,11 +2,14 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from dinero import Centimos
 
 # Inicializamos SQLAlchemy, pero la instancia 'db' será vinculada
 # a la aplicación Flask en app.py
 db = SQLAlchemy()
 
+# Los importes se guardan como enteros de céntimos (ver dinero.py)
+
 # --- Modelo Cliente ---
 class Cliente(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -26,8 +29,8 @@ class Producto(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     descripcion = db.Column(db.String(255), nullable=True) # Opcional
-    precio = db.Column(db.Float, nullable=False) # Precio en Euros
-    stock = db.Column(db.Integer, default=0) # Opcional, si manejas inventario
+    precio_centimos = db.Column(Centimos, nullable=False) # Precio en céntimos de euro
+    stock = db.Column(db.Integer) # Opcional: NULL = no se gestiona inventario
 
     def __repr__(self):
         return f'<Producto {self.nombre}>'
@@ -37,25 +40,84 @@ class Factura(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False)
-    subtotal = db.Column(db.Float, nullable=False, default=0.0)
-    iva = db.Column(db.Float, nullable=False, default=0.0) # Almacenamos el monto del IVA
-    total = db.Column(db.Float, nullable=False, default=0.0)
+    subtotal_centimos = db.Column(Centimos, nullable=False, default=0)
+    iva_centimos = db.Column(Centimos, nullable=False, default=0) # Almacenamos el monto del IVA
+    total_centimos = db.Column(Centimos, nullable=False, default=0)
     # Relación: Una factura tiene muchos detalles
     detalles = db.relationship('DetalleFactura', backref='factura', lazy=True, cascade="all, delete-orphan")
 
+    # Índices compuestos para la paginación keyset (fecha desc, id desc) del listado
+    # general y del extracto de un cliente; el segundo sirve también para cliente_id solo
+    __table_args__ = (db.Index('ix_factura_fecha_id', 'fecha', 'id'),
+                      db.Index('ix_factura_cliente_fecha_id', 'cliente_id', 'fecha', 'id'))
+
     def __repr__(self):
         return f'<Factura {self.id}>'
 
 # --- Modelo DetalleFactura ---
 class DetalleFactura(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    factura_id = db.Column(db.Integer, db.ForeignKey('factura.id'), nullable=False)
-    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False)
+    # Índices en las claves foráneas: detalle de una factura, borrados y comprobaciones de FK
+    factura_id = db.Column(db.Integer, db.ForeignKey('factura.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('producto.id'), nullable=False, index=True)
     cantidad = db.Column(db.Integer, nullable=False)
-    precio_unitario = db.Column(db.Float, nullable=False) # Precio al momento de la factura
-    subtotal_linea = db.Column(db.Float, nullable=False) # cantidad * precio_unitario
+    precio_unitario_centimos = db.Column(Centimos, nullable=False) # Precio al momento de la factura
+    subtotal_linea_centimos = db.Column(Centimos, nullable=False) # cantidad * precio_unitario
     # Relación: Acceso fácil al producto desde el detalle
     producto = db.relationship('Producto', backref='detalles_factura', lazy=True)
 
     def __repr__(self):
-        return f'<DetalleFactura Factura:{self.factura_id} Producto:{self.producto_id}>'
\ No newline at end of file
+        return f'<DetalleFactura Factura:{self.factura_id} Producto:{self.producto_id}>'
+# --- Tablas de Resumen (Reportes) ---
+# Agregados mantenidos en la misma transacción que crea/elimina facturas
+# (ver reportes.py). Se pueden regenerar con 'flask reconstruir-reportes'.
+
+class ResumenMensual(db.Model):
+    __tablename__ = 'resumen_mensual'
+    mes = db.Column(db.String(7), primary_key=True) # 'YYYY-MM'
+    num_facturas = db.Column(db.Integer, nullable=False, default=0)
+    subtotal_centimos = db.Column(Centimos, nullable=False, default=0)
+    iva_centimos = db.Column(Centimos, nullable=False, default=0)
+    total_centimos = db.Column(Centimos, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumenMensual {self.mes}>'
+
+class ResumenCliente(db.Model):
+    __tablename__ = 'resumen_cliente'
+    cliente_id = db.Column(db.Integer, primary_key=True)
+    num_facturas = db.Column(db.Integer, nullable=False, default=0)
+    subtotal_centimos = db.Column(Centimos, nullable=False, default=0)
+    iva_centimos = db.Column(Centimos, nullable=False, default=0)
+    total_centimos = db.Column(Centimos, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumenCliente {self.cliente_id}>'
+
+class ResumenProducto(db.Model):
+    __tablename__ = 'resumen_producto'
+    producto_id = db.Column(db.Integer, primary_key=True)
+    num_lineas = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos_centimos = db.Column(Centimos, nullable=False, default=0) # Suma de subtotal_linea (sin IVA)
+
+    def __repr__(self):
+        return f'<ResumenProducto {self.producto_id}>'
+
+# --- Archivo de facturas de ejercicios cerrados ---
+# Un registro por año movido a su propio fichero SQLite (ver archivo.py). Los
+# rangos de fechas e ids permiten saber, sin abrir los ficheros, qué años
+# archivados alcanza un listado o en cuál puede estar una factura.
+
+class ArchivoAnual(db.Model):
+    __tablename__ = 'archivo_anual'
+    anio = db.Column(db.Integer, primary_key=True)
+    fichero = db.Column(db.String(255), nullable=False) # Relativo a <carpeta de datos>/archivo
+    num_facturas = db.Column(db.Integer, nullable=False, default=0)
+    id_min = db.Column(db.Integer, nullable=False)
+    id_max = db.Column(db.Integer, nullable=False)
+    fecha_min = db.Column(db.DateTime, nullable=False)
+    fecha_max = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivoAnual {self.anio}>'
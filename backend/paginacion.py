@@ -0,0 +1,108 @@
+# backend/paginacion.py
+
+import base64
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+# Tamaño de página por defecto y máximo permitido para los listados
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+# --- Cursor opaco (keyset) ---
+# El cursor es la última clave (fecha, id) devuelta, codificada en base64
+# para que el cliente no dependa de su formato interno.
+
+def codificar_cursor(fecha, id):
+    """Codifica la clave (fecha, id) de la última fila en un cursor opaco."""
+    crudo = json.dumps([fecha.isoformat(), id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Devuelve la tupla (fecha, id) de un cursor. Lanza ValueError si no es válido."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha_iso, id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(fecha_iso), int(id)
+    except Exception:
+        raise ValueError("El cursor no es válido")
+
+# --- Lectura de parámetros de la query string ---
+
+def leer_limite(args):
+    """Lee 'limit' de la query string, acotado a LIMITE_MAXIMO."""
+    valor = args.get('limit')
+    if valor is None:
+        return LIMITE_POR_DEFECTO
+    try:
+        limite = int(valor)
+    except (ValueError, TypeError):
+        raise ValueError("limit debe ser un número entero válido")
+    if limite <= 0:
+        raise ValueError("limit debe ser positivo")
+    return min(limite, LIMITE_MAXIMO)
+
+def leer_fecha(args, nombre, fin_de_dia=False):
+    """
+    Lee una fecha ISO ('YYYY-MM-DD' o con hora) de la query string.
+    Con fin_de_dia=True una fecha sin hora se convierte en el inicio del día
+    siguiente, para usarla como límite exclusivo e incluir el día completo.
+    """
+    valor = args.get(nombre)
+    if not valor:
+        return None
+    try:
+        fecha = datetime.fromisoformat(valor)
+    except (ValueError, TypeError): # TypeError: un número u otro tipo en un cuerpo JSON
+        raise ValueError(f"{nombre} debe ser una fecha ISO válida (YYYY-MM-DD)")
+    if fin_de_dia and len(valor) == 10:
+        fecha += timedelta(days=1)
+    return fecha
+
+def leer_mes(args, nombre):
+    """
+    Lee un mes 'YYYY-MM' de la query string (como ResumenMensual.mes). Se
+    compara como texto, así que otro formato ('2024-1', '2024-01-15') daría
+    meses equivocados sin avisar: se rechaza con ValueError.
+    """
+    valor = args.get(nombre)
+    if not valor:
+        return None
+    try:
+        if len(valor) != 7:
+            raise ValueError
+        datetime.strptime(valor, '%Y-%m')
+    except (ValueError, TypeError):
+        raise ValueError(f"{nombre} debe ser un mes válido (YYYY-MM)")
+    return valor
+
+def leer_entero(args, nombre):
+    valor = args.get(nombre)
+    if valor is None or valor == '':
+        return None
+    try:
+        return int(valor)
+    except (ValueError, TypeError):
+        raise ValueError(f"{nombre} debe ser un número entero válido")
+
+def leer_importe(args, nombre):
+    valor = args.get(nombre)
+    if valor is None or valor == '':
+        return None
+    try:
+        return Decimal(valor)
+    except InvalidOperation:
+        raise ValueError(f"{nombre} debe ser un número válido")
+
+def leer_ids(args, nombre, maximo=LIMITE_MAXIMO):
+    """Lista de ids separados por comas ('1,2,3'), sin repetidos. Lanza ValueError si falta o no es válida."""
+    valor = args.get(nombre)
+    if not valor:
+        raise ValueError(f"{nombre} es requerido (ids separados por comas)")
+    try:
+        ids = list(dict.fromkeys(int(parte) for parte in valor.split(',') if parte.strip()))
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser una lista de números enteros separados por comas")
+    if len(ids) > maximo:
+        raise ValueError(f"Como máximo {maximo} ids en {nombre}")
+    return ids
@@ -0,0 +1,163 @@
+# backend/paquete_pdf.py
+
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from cache_pdf import clave_factura, guardar_pdf, ruta_pdf
+from pdf_factura import contar_paginas, generar_pdf_factura
+from metricas import describir, incrementar, observar
+
+# --- Paquete ZIP con los PDF de muchas facturas ---
+# Para el cierre de mes: GET /api/facturas/pdf-bundle genera el PDF de cada
+# factura del rango en un pool de procesos (uno por CPU; generar_pdf_factura
+# es pura y no comparte el GIL) y va escribiendo el ZIP a medida que terminan.
+# El ZIP se envía por trozos: en memoria solo están los PDF en vuelo, nunca
+# el archivo entero. Los PDF que ya están en la caché de disco (cache_pdf) no
+# se regeneran, y los generados se guardan en ella.
+
+PROCESOS_PDF = os.cpu_count() or 1
+EN_VUELO = PROCESOS_PDF * 4 # PDF encargados al pool sin recoger todavía
+
+LIMITES_PAGINAS_POR_SEGUNDO = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+describir('facturaapp_pdf_paquete_paginas_total', 'counter', 'Páginas incluidas en paquetes ZIP de PDF (generadas o de la caché)')
+describir('facturaapp_pdf_paquete_paginas_por_segundo', 'histogram', 'Páginas por segundo de cada paquete ZIP de PDF')
+
+_pool = None
+_bloqueo = threading.Lock()
+
+def _pool_pdf():
+    """Pool de procesos compartido por todas las peticiones, creado la primera vez. None si no se puede crear."""
+    global _pool
+    with _bloqueo:
+        if _pool is None:
+            try:
+                # spawn: no hereda (con fork) los hilos y bloqueos del servidor
+                _pool = ProcessPoolExecutor(max_workers=PROCESOS_PDF, mp_context=multiprocessing.get_context('spawn'))
+            except (OSError, NotImplementedError) as e:
+                print(f"No se puede crear el pool de procesos para PDF, se generan en el hilo de la petición: {e}")
+                _pool = False
+        return _pool or None
+
+def _descartar_pool(pool):
+    """Un proceso del pool ha muerto: el siguiente paquete creará uno nuevo."""
+    global _pool
+    with _bloqueo:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+class _Salida:
+    """Destino del ZipFile (sin seek: zipfile escribe descriptores de datos). Guarda los bytes hasta enviarlos."""
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+def _leer_cache(datos, clave):
+    try:
+        with open(ruta_pdf(datos['id'], clave), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def generar_zip(lotes):
+    """
+    Generador de los bytes del ZIP con un PDF (Factura-<id>.pdf) por factura.
+    'lotes' es un iterable de listas de dicts de detalle (los de GET
+    /api/facturas/<id>); se pide el siguiente lote solo cuando el pool tiene
+    hueco. Los PDF entran en el ZIP en el orden en que terminan.
+    """
+    salida = _Salida()
+    archivo_zip = zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED)
+    pool = _pool_pdf()
+    pendientes = {} # futuro -> (datos, clave)
+    paginas = {'generado': 0, 'cache': 0}
+    inicio = time.perf_counter()
+
+    def anadir(datos, contenido):
+        info = zipfile.ZipInfo(f"Factura-{datos['id']}.pdf", date_time=datos['fecha'].timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        archivo_zip.writestr(info, contenido)
+
+    def generar_aqui(datos, clave):
+        contenido, num_paginas = generar_pdf_factura(datos)
+        guardar_pdf(datos['id'], clave, contenido)
+        paginas['generado'] += num_paginas
+        anadir(datos, contenido)
+
+    try:
+        lotes = iter(lotes)
+        quedan_lotes = True
+        while quedan_lotes or pendientes:
+            while quedan_lotes and len(pendientes) < EN_VUELO:
+                lote = next(lotes, None)
+                if lote is None:
+                    quedan_lotes = False
+                    break
+                for datos in lote:
+                    clave = clave_factura(datos)
+                    contenido = _leer_cache(datos, clave)
+                    if contenido is not None:
+                        paginas['cache'] += contar_paginas(contenido)
+                        anadir(datos, contenido)
+                        continue
+                    if pool is not None:
+                        try:
+                            pendientes[pool.submit(generar_pdf_factura, datos)] = (datos, clave)
+                            continue
+                        except BrokenProcessPool:
+                            _descartar_pool(pool)
+                            pool = None
+                    generar_aqui(datos, clave)
+                trozo = salida.vaciar()
+                if trozo:
+                    yield trozo
+
+            if pendientes:
+                hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    datos, clave = pendientes.pop(futuro)
+                    try:
+                        contenido, num_paginas = futuro.result()
+                    except BrokenProcessPool:
+                        if pool is not None:
+                            _descartar_pool(pool)
+                            pool = None
+                        generar_aqui(datos, clave)
+                        continue
+                    guardar_pdf(datos['id'], clave, contenido)
+                    paginas['generado'] += num_paginas
+                    anadir(datos, contenido)
+                trozo = salida.vaciar()
+                if trozo:
+                    yield trozo
+
+        archivo_zip.close()
+        yield salida.vaciar()
+    finally:
+        for futuro in pendientes: # El cliente cortó la descarga
+            futuro.cancel()
+
+    segundos = time.perf_counter() - inicio
+    total = paginas['generado'] + paginas['cache']
+    for origen, num_paginas in paginas.items():
+        incrementar('facturaapp_pdf_paquete_paginas_total', num_paginas, origen=origen)
+    if segundos > 0:
+        observar('facturaapp_pdf_paquete_paginas_por_segundo', total / segundos, limites=LIMITES_PAGINAS_POR_SEGUNDO)
+    print(f"Paquete PDF: {total} páginas ({paginas['generado']} generadas, {paginas['cache']} de la caché) "
+          f"en {segundos:.2f} s ({total / segundos if segundos else 0:.0f} páginas/s)")
@@ -0,0 +1,276 @@
+# backend/pdf_factura.py
+
+import re
+import unicodedata
+import zlib
+from datetime import datetime
+
+# --- Generación del PDF de una factura en el servidor ---
+# Reproduce el diseño de frontend/src/utils/pdfGenerator.js (jsPDF + autoTable)
+# escribiendo el PDF directamente, con las fuentes estándar Helvetica, para no
+# depender de librerías externas. La salida es determinista: los mismos datos
+# producen los mismos bytes (necesario para la caché por contenido).
+
+# Cambiar si se modifica el diseño, para invalidar los PDF ya cacheados
+VERSION_PLANTILLA = '1'
+
+# --- Datos de la Empresa (¡PERSONALIZAR!, igual que en pdfGenerator.js) ---
+EMPRESA = ['Victor S.L.', 'Calle Real, 23', '08001 El Viso del Alcor, Sevilla', 'NIF: B12345678']
+
+# Página A4 en mm (como jsPDF) y conversión a puntos PDF
+ANCHO_PAGINA = 210.0
+ALTO_PAGINA = 297.0
+MARGEN = 15.0
+PT = 72 / 25.4
+
+# Columnas de la tabla de detalles: (título, ancho en mm o None = resto, alineación)
+COLUMNAS = [
+    ('#', 8, 'center'),
+    ('Producto', 35, 'left'),
+    ('Descripción', None, 'left'),
+    ('Cant.', 12, 'right'),
+    ('P. Unit. (€)', 22, 'right'),
+    ('Subtotal (€)', 25, 'right'),
+]
+TAMANO_TABLA = 8       # Tamaño de fuente de la tabla (pt)
+RELLENO_CELDA = 1.5    # Padding de celda (mm)
+COLOR_CABECERA = (41, 128, 185)
+COLOR_LINEAS = (200, 200, 200)
+
+# Anchos de Helvetica y Helvetica-Bold (1/1000 em) para ASCII 32..126
+_ANCHOS = {
+    'F1': [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+           1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+           333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+           556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    'F2': [278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+           975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+           333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+           611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+
+def _ancho_caracter(caracter, fuente):
+    codigo = ord(caracter)
+    if 32 <= codigo <= 126:
+        return _ANCHOS[fuente][codigo - 32]
+    # Letras acentuadas (á, Ñ...): mismo ancho que la letra base
+    base = unicodedata.normalize('NFD', caracter)[0]
+    if base != caracter and 32 <= ord(base) <= 126:
+        return _ANCHOS[fuente][ord(base) - 32]
+    return 556
+
+def ancho_texto(texto, fuente, tamano):
+    """Ancho del texto en mm."""
+    return sum(_ancho_caracter(c, fuente) for c in texto) * tamano / 1000 / PT
+
+def _escapar(texto):
+    datos = texto.encode('cp1252', errors='replace')
+    return datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+def _partir_lineas(texto, ancho_max, fuente, tamano):
+    """Parte el texto en líneas que quepan en ancho_max (mm), por palabras."""
+    lineas, actual = [], ''
+    for palabra in texto.split():
+        candidata = f"{actual} {palabra}" if actual else palabra
+        if actual and ancho_texto(candidata, fuente, tamano) > ancho_max:
+            lineas.append(actual)
+            actual = palabra
+        else:
+            actual = candidata
+    lineas.append(actual)
+    return lineas
+
+def formatear_fecha(fecha):
+    """datetime o texto ISO -> 'dd/mm/aaaa'."""
+    if not fecha:
+        return 'N/A'
+    if isinstance(fecha, datetime):
+        return fecha.strftime('%d/%m/%Y')
+    try:
+        return datetime.fromisoformat(fecha).strftime('%d/%m/%Y')
+    except ValueError:
+        return fecha
+
+def _importe(valor):
+    return f"{valor or 0:.2f}"
+
+class _Documento:
+    """Acumula las operaciones de dibujo de cada página (coordenadas en mm desde arriba)."""
+
+    def __init__(self):
+        self.paginas = []
+        self.nueva_pagina()
+
+    def nueva_pagina(self):
+        self.ops = []
+        self.paginas.append(self.ops)
+
+    def texto(self, x, y, texto, fuente='F1', tamano=10, alinear='left', gris=None, color=None):
+        if alinear == 'right':
+            x -= ancho_texto(texto, fuente, tamano)
+        elif alinear == 'center':
+            x -= ancho_texto(texto, fuente, tamano) / 2
+        if color:
+            self.ops.append(b'%.3f %.3f %.3f rg' % tuple(c / 255 for c in color))
+        elif gris is not None:
+            self.ops.append(b'%.3f g' % (gris / 255))
+        self.ops.append(b'BT /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (
+            fuente.encode(), tamano, x * PT, (ALTO_PAGINA - y) * PT, _escapar(texto)))
+        if color or gris is not None:
+            self.ops.append(b'0 g')
+
+    def rectangulo(self, x, y, ancho, alto, relleno=None, borde=None):
+        self.ops.append(b'q')
+        if relleno:
+            self.ops.append(b'%.3f %.3f %.3f rg' % tuple(c / 255 for c in relleno))
+        if borde:
+            self.ops.append(b'%.3f %.3f %.3f RG 0.28 w' % tuple(c / 255 for c in borde))
+        operador = b'B' if relleno and borde else (b'f' if relleno else b'S')
+        self.ops.append(b'%.2f %.2f %.2f %.2f re %s' % (
+            x * PT, (ALTO_PAGINA - y - alto) * PT, ancho * PT, alto * PT, operador))
+        self.ops.append(b'Q')
+
+    def bytes_pdf(self):
+        objetos = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None, # Pages, se rellena al final
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        ]
+        ids_paginas = []
+        for ops in self.paginas:
+            contenido = zlib.compress(b'\n'.join(ops))
+            objetos.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(contenido), contenido))
+            objetos.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] '
+                           b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                           % (ANCHO_PAGINA * PT, ALTO_PAGINA * PT, len(objetos)))
+            ids_paginas.append(len(objetos))
+        objetos[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % i for i in ids_paginas), len(ids_paginas))
+
+        salida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        posiciones = []
+        for numero, objeto in enumerate(objetos, start=1):
+            posiciones.append(len(salida))
+            salida += b'%d 0 obj\n%s\nendobj\n' % (numero, objeto)
+        inicio_xref = len(salida)
+        salida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+        for posicion in posiciones:
+            salida += b'%010d 00000 n \n' % posicion
+        salida += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, inicio_xref)
+        return bytes(salida)
+
+def generar_pdf_factura(factura):
+    """
+    Genera el PDF de una factura. 'factura' es el dict de la respuesta de
+    detalle (GET /api/facturas/<id>). Devuelve (bytes del PDF, número de páginas).
+    Es una función pura para poder ejecutarse en otro proceso.
+    """
+    doc = _Documento()
+    y = MARGEN
+
+    # --- Cabecera del Documento ---
+    doc.texto(ANCHO_PAGINA / 2, y, 'FACTURA', 'F2', 18, alinear='center')
+    y += 10
+
+    # --- Datos de la Empresa ---
+    for i, linea in enumerate(EMPRESA):
+        doc.texto(MARGEN, y + 4 * i, linea)
+    y += 20
+
+    # --- Datos del Cliente y Factura ---
+    col_factura = ANCHO_PAGINA / 2 + 5
+    inicio_info = y
+    doc.texto(MARGEN, y, 'Facturar a:', 'F2', 11)
+    doc.texto(col_factura, y, 'Detalles Factura:', 'F2', 11)
+    y += 6
+
+    cliente = factura.get('cliente') or {}
+    nombre_completo = f"{cliente.get('nombre') or ''} {cliente.get('apellido') or ''}".strip() or 'Cliente no especificado'
+    doc.texto(MARGEN, y, nombre_completo)
+    doc.texto(MARGEN, y + 4, cliente.get('direccion') or 'Dirección no disponible')
+    doc.texto(MARGEN, y + 8, cliente.get('email') or 'Email no disponible')
+    doc.texto(MARGEN, y + 12, cliente.get('telefono') or 'Teléfono no disponible')
+    doc.texto(col_factura, y, f"Nº Factura: {factura['id']}")
+    doc.texto(col_factura, y + 4, f"Fecha Emisión: {formatear_fecha(factura.get('fecha'))}")
+    y = inicio_info + 16 + 10
+
+    # --- Tabla de Líneas de Detalle ---
+    ancho_tabla = ANCHO_PAGINA - 2 * MARGEN
+    fijos = sum(ancho for _, ancho, _ in COLUMNAS if ancho)
+    anchos = [ancho or ancho_tabla - fijos for _, ancho, _ in COLUMNAS]
+    alto_linea = TAMANO_TABLA * 1.15 / PT
+
+    def fila(celdas, y, fuente, relleno=None, color_texto=None):
+        lineas = [_partir_lineas(str(texto), ancho - 2 * RELLENO_CELDA, fuente, TAMANO_TABLA)
+                  for texto, ancho in zip(celdas, anchos)]
+        alto = max(len(l) for l in lineas) * alto_linea + 2 * RELLENO_CELDA
+        x = MARGEN
+        for (_, _, alinear), ancho, texto_celda in zip(COLUMNAS, anchos, lineas):
+            if relleno:
+                alinear = 'center'
+            doc.rectangulo(x, y, ancho, alto, relleno=relleno, borde=COLOR_LINEAS)
+            ax = {'left': x + RELLENO_CELDA, 'right': x + ancho - RELLENO_CELDA, 'center': x + ancho / 2}[alinear]
+            for n, linea in enumerate(texto_celda):
+                doc.texto(ax, y + RELLENO_CELDA + alto_linea * (n + 0.8), linea, fuente, TAMANO_TABLA,
+                          alinear=alinear, color=color_texto)
+            x += ancho
+        return alto
+
+    def cabecera_tabla(y):
+        return y + fila([titulo for titulo, _, _ in COLUMNAS], y, 'F2',
+                        relleno=COLOR_CABECERA, color_texto=(255, 255, 255))
+
+    y = cabecera_tabla(y)
+    for indice, detalle in enumerate(factura.get('detalles') or [], start=1):
+        celdas = [
+            indice,
+            detalle.get('nombre_producto') or f"ID: {detalle.get('producto_id')}",
+            detalle.get('descripcion_producto') or 'N/A',
+            detalle.get('cantidad'),
+            _importe(detalle.get('precio_unitario')),
+            _importe(detalle.get('subtotal_linea')),
+        ]
+        # Salto de página si la fila no cabe (se repite la cabecera, como autoTable)
+        alto_previsto = max(len(_partir_lineas(str(t), a - 2 * RELLENO_CELDA, 'F1', TAMANO_TABLA))
+                            for t, a in zip(celdas, anchos)) * alto_linea + 2 * RELLENO_CELDA
+        if y + alto_previsto > ALTO_PAGINA - MARGEN:
+            doc.nueva_pagina()
+            y = cabecera_tabla(MARGEN)
+        y += fila(celdas, y, 'F1')
+    y += 10
+
+    # --- Totales ---
+    if y + 12 > ALTO_PAGINA - MARGEN - 10:
+        doc.nueva_pagina()
+        y = MARGEN
+    x_totales = ANCHO_PAGINA - MARGEN - 60
+    x_valores = ANCHO_PAGINA - MARGEN
+    subtotal, iva = factura.get('subtotal'), factura.get('iva')
+    porcentaje_iva = f"{iva / subtotal * 100:.0f}" if subtotal and iva else 'N/A'
+
+    doc.texto(x_totales, y, 'Subtotal:')
+    doc.texto(x_valores, y, f"{_importe(subtotal)} €", alinear='right')
+    y += 5
+    doc.texto(x_totales, y, f"IVA ({porcentaje_iva}%):")
+    doc.texto(x_valores, y, f"{_importe(iva)} €", alinear='right')
+    y += 7
+    doc.texto(x_totales, y, 'TOTAL:', 'F2', 12)
+    doc.texto(x_valores, y, f"{_importe(factura.get('total'))} €", 'F2', 12, alinear='right')
+
+    # --- Pie de Página ---
+    doc.texto(ANCHO_PAGINA / 2, ALTO_PAGINA - MARGEN / 2, 'Gracias por su confianza.', 'F1', 8,
+              alinear='center', gris=150)
+
+    return doc.bytes_pdf(), len(doc.paginas)
+
+_CONTADOR_PAGINAS = re.compile(rb'/Type /Pages /Kids \[[^\]]*\] /Count (\d+)')
+
+def contar_paginas(contenido):
+    """Número de páginas de un PDF generado por generar_pdf_factura (p. ej. leído de la caché)."""
+    coincidencia = _CONTADOR_PAGINAS.search(contenido)
+    return int(coincidencia.group(1)) if coincidencia else 0
@@ -0,0 +1,170 @@
+# backend/reportes.py
+
+from collections import defaultdict
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select
+from sqlalchemy.sql import FromClause
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Factura, DetalleFactura, ResumenMensual, ResumenCliente, ResumenProducto
+from archivo import adjuntar, archivos, entidades_facturas, lotes_archivo, tablas_archivo
+
+_COLUMNAS_TOTALES = ['num_facturas', 'subtotal_centimos', 'iva_centimos', 'total_centimos']
+_COLUMNAS_PRODUCTO = ['num_lineas', 'unidades', 'ingresos_centimos']
+
+def sumas_facturas(factura=Factura.__table__):
+    """
+    count, subtotal, iva y total de las facturas. Los importes son enteros: SUM() es exacto.
+    'factura' es la tabla (principal o archivada) o un alias de Factura (archivo.facturas_archivadas).
+    """
+    columnas = factura.c if isinstance(factura, FromClause) else factura
+    return (func.count(), func.coalesce(func.sum(columnas.subtotal_centimos), 0),
+            func.coalesce(func.sum(columnas.iva_centimos), 0), func.coalesce(func.sum(columnas.total_centimos), 0))
+
+# --- Mantenimiento incremental de los resúmenes ---
+# Se llama dentro de la transacción que crea o elimina las facturas, antes del
+# commit, para que los agregados nunca queden desincronizados.
+
+def acumular_facturas(facturas, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) facturas en las tablas de resumen.
+    Cada factura es un dict con fecha, cliente_id, subtotal, iva, total y
+    'lineas': lista de (producto_id, cantidad, subtotal_linea), importes en céntimos.
+    Hace un upsert por grupo afectado, no por factura.
+    """
+    por_mes = defaultdict(lambda: [0, 0, 0, 0])
+    por_cliente = defaultdict(lambda: [0, 0, 0, 0])
+    por_producto = defaultdict(lambda: [0, 0, 0])
+
+    for f in facturas:
+        for grupo in (por_mes[f['fecha'].strftime('%Y-%m')], por_cliente[f['cliente_id']]):
+            grupo[0] += signo
+            grupo[1] += signo * f['subtotal']
+            grupo[2] += signo * f['iva']
+            grupo[3] += signo * f['total']
+        for producto_id, cantidad, subtotal_linea in f['lineas']:
+            grupo = por_producto[producto_id]
+            grupo[0] += signo
+            grupo[1] += signo * cantidad
+            grupo[2] += signo * subtotal_linea
+
+    if por_mes:
+        _upsert(ResumenMensual, 'mes', _COLUMNAS_TOTALES, por_mes)
+    if por_cliente:
+        _upsert(ResumenCliente, 'cliente_id', _COLUMNAS_TOTALES, por_cliente)
+    if por_producto:
+        _upsert(ResumenProducto, 'producto_id', _COLUMNAS_PRODUCTO, por_producto)
+
+    if signo < 0:
+        # Los grupos que se quedan sin facturas desaparecen del reporte
+        db.session.execute(delete(ResumenMensual).where(ResumenMensual.num_facturas <= 0))
+        db.session.execute(delete(ResumenCliente).where(ResumenCliente.num_facturas <= 0))
+        db.session.execute(delete(ResumenProducto).where(ResumenProducto.num_lineas <= 0))
+
+def acumular_factura_orm(factura, signo=1):
+    """Atajo para una Factura del ORM (con sus detalles)."""
+    acumular_facturas([{
+        "fecha": factura.fecha,
+        "cliente_id": factura.cliente_id,
+        "subtotal": factura.subtotal_centimos,
+        "iva": factura.iva_centimos,
+        "total": factura.total_centimos,
+        "lineas": [(d.producto_id, d.cantidad, d.subtotal_linea_centimos) for d in factura.detalles]
+    }], signo)
+
+def _upsert(modelo, clave, columnas, deltas):
+    tabla = modelo.__table__
+    stmt = sqlite_insert(tabla)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[clave],
+        set_={c: tabla.c[c] + stmt.excluded[c] for c in columnas}
+    )
+    db.session.execute(stmt, [
+        dict(zip([clave] + columnas, [valor_clave] + valores))
+        for valor_clave, valores in deltas.items()
+    ])
+
+# --- Totales sobre las facturas ---
+
+def totales_facturas(desde=None, hasta=None):
+    """
+    Número de facturas y sumas de subtotal, iva y total (céntimos) en [desde, hasta),
+    calculadas con un SELECT ... SUM() en SQLite (uno más por año archivado que abarque,
+    adjuntados por lotes).
+    """
+    totales = [0, 0, 0, 0]
+    for factura in entidades_facturas(archivos(desde, hasta)):
+        consulta = select(*sumas_facturas(factura))
+        if desde is not None:
+            consulta = consulta.where(factura.fecha >= desde)
+        if hasta is not None:
+            consulta = consulta.where(factura.fecha < hasta)
+        totales = [t + v for t, v in zip(totales, db.session.execute(consulta).one())]
+    return tuple(totales)
+
+# --- Reconstrucción completa (datos existentes) ---
+
+def reconstruir():
+    """
+    Recalcula las tablas de resumen desde factura/detalle_factura con GROUP BY en
+    SQL, sumando también las facturas archivadas. Todo se escribe en una sola
+    transacción: una lectura de reportes (o un ETag) durante la reconstrucción
+    ve los resúmenes anteriores o los nuevos, nunca sin los años archivados.
+    Los grupos de los años archivados se leen antes, por lotes: SQLite no suelta
+    (DETACH) un fichero adjunto dentro de la transacción que lo ha leído.
+    """
+    archivados = [defaultdict(lambda n=len(columnas): [0] * n) for _, _, columnas in _RESUMENES]
+    for lote in lotes_archivo(archivos()):
+        adjuntar(lote)
+        for archivado in lote:
+            for grupos, consulta in zip(archivados, _consultas_resumen(*tablas_archivo(archivado))):
+                for clave, *valores in db.session.execute(consulta):
+                    grupos[clave] = [a + b for a, b in zip(grupos[clave], valores)]
+        db.session.rollback() # Fin de la lectura: el siguiente lote puede soltar estos adjuntos
+
+    for (modelo, clave, columnas), consulta, grupos in zip(
+            _RESUMENES, _consultas_resumen(Factura.__table__, DetalleFactura.__table__), archivados):
+        db.session.execute(delete(modelo))
+        _upsert_desde(modelo, clave, columnas, consulta)
+        if grupos:
+            _upsert(modelo, clave, columnas, grupos)
+    db.session.commit()
+
+# (modelo, clave, columnas) de cada tabla de resumen, en el orden de _consultas_resumen
+_RESUMENES = (
+    (ResumenMensual, 'mes', _COLUMNAS_TOTALES),
+    (ResumenCliente, 'cliente_id', _COLUMNAS_TOTALES),
+    (ResumenProducto, 'producto_id', _COLUMNAS_PRODUCTO),
+)
+
+def _consultas_resumen(factura, detalle):
+    """Los GROUP BY de un par de tablas factura/detalle_factura, uno por tabla de resumen (clave y columnas)."""
+    mes = func.strftime('%Y-%m', factura.c.fecha)
+    return (
+        select(mes, *sumas_facturas(factura)).group_by(mes),
+        select(factura.c.cliente_id, *sumas_facturas(factura)).group_by(factura.c.cliente_id),
+        select(detalle.c.producto_id, func.count(), func.sum(detalle.c.cantidad),
+               func.sum(detalle.c.subtotal_linea_centimos)).group_by(detalle.c.producto_id),
+    )
+
+def _upsert_desde(modelo, clave, columnas, consulta):
+    tabla = modelo.__table__
+    stmt = sqlite_insert(tabla).from_select([clave] + columnas, consulta)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[clave],
+        set_={c: tabla.c[c] + stmt.excluded[c] for c in columnas}
+    ))
+
+def reconstruir_si_vacio():
+    """Rellena los resúmenes si están vacíos pero ya hay facturas (bases de datos anteriores)."""
+    if db.session.execute(select(ResumenMensual.mes).limit(1)).first() is None \
+            and db.session.execute(select(Factura.id).limit(1)).first() is not None:
+        reconstruir()
+        print("Resúmenes de reportes reconstruidos a partir de las facturas existentes.")
+
+@click.command('reconstruir-reportes')
+@with_appcontext
+def reconstruir_reportes_comando():
+    """Recalcula las tablas de resumen de reportes desde las facturas."""
+    reconstruir()
+    click.echo("Resúmenes de reportes reconstruidos.")
@@ -2,7 +2,17 @@
 
 from flask import Blueprint, request, jsonify
 from models import db, Cliente, Factura # Importar db, el modelo Cliente y Factura
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.exc import IntegrityError
+from streaming import pide_stream, respuesta_ndjson
+from versiones import condicional
+from serializadores import CLIENTE, FACTURA, respuesta_lista_json
+from reportes import sumas_facturas
+from archivo import archivos, entidades_facturas, primeras_facturas, referenciado_en_archivo
+from dinero import a_euros
+from paginacion import codificar_cursor, decodificar_cursor, leer_limite, leer_fecha, leer_ids
+from importacion import importar_csv, lector_de_peticion
+from busqueda import leer_parametros_busqueda, buscar_clientes
 
 # Crear un Blueprint para las rutas de clientes
 # El primer argumento 'clientes' es el nombre del Blueprint.
@@ -35,57 +45,177 @@ def create_cliente():
         db.session.add(nuevo_cliente)
         db.session.commit()
         # Devolver el cliente creado con su ID asignado
-        return jsonify({
-            "id": nuevo_cliente.id,
-            "nombre": nuevo_cliente.nombre,
-            "apellido": nuevo_cliente.apellido,
-            "email": nuevo_cliente.email,
-            "telefono": nuevo_cliente.telefono,
-            "direccion": nuevo_cliente.direccion
-        }), 201 # 201 Created
+        return jsonify(CLIENTE.uno(nuevo_cliente)), 201 # 201 Created
     except Exception as e:
         db.session.rollback() # Revertir cambios si hay error
         return jsonify({"error": "Error al guardar el cliente", "details": str(e)}), 500
 
+# [POST] Importar clientes desde un CSV (campo 'archivo' o cuerpo text/csv)
+# Cabecera: nombre,apellido,email,telefono,direccion.
+# Las filas con errores se omiten y se devuelven en el informe.
+@clientes_bp.route('/importar', methods=['POST'])
+def importar_clientes():
+    try:
+        informe = importar_csv('clientes', lector_de_peticion(request))
+        return jsonify(informe), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Error al importar los clientes", "details": str(e)}), 500
+
 # [GET] Obtener todos los clientes
+# Con ?stream=1 o Accept: application/x-ndjson se emiten en streaming (NDJSON)
+# Con ?q=texto se buscan por nombre, apellido o email (FTS5), ordenados por relevancia.
+# Opcionales: prefijo=1 (búsqueda mientras se escribe) y limit.
 @clientes_bp.route('/', methods=['GET'])
+@condicional('cliente')
 def get_clientes():
     try:
-        clientes = Cliente.query.all()
-        # Convertir la lista de objetos Cliente a una lista de diccionarios
-        clientes_list = [
-            {
-                "id": c.id,
-                "nombre": c.nombre,
-                "apellido": c.apellido,
-                "email": c.email,
-                "telefono": c.telefono,
-                "direccion": c.direccion
-            } for c in clientes
-        ]
-        return jsonify(clientes_list), 200
+        if 'q' in request.args:
+            consulta, limite = leer_parametros_busqueda(request.args)
+            return jsonify(CLIENTE.muchos(buscar_clientes(consulta, limite))), 200
+        if pide_stream(request):
+            return respuesta_ndjson(CLIENTE.consulta_json().order_by(Cliente.id))
+        # SQLite codifica cada fila en JSON: sin objetos Cliente ni dicts intermedios
+        return respuesta_lista_json(CLIENTE.consulta_json()), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         return jsonify({"error": "Error al obtener los clientes", "details": str(e)}), 500
 
 # [GET] Obtener un cliente por ID
 @clientes_bp.route('/<int:id>', methods=['GET'])
+@condicional('cliente')
 def get_cliente(id):
     try:
         cliente = Cliente.query.get(id)
         if cliente:
-            return jsonify({
-                "id": cliente.id,
-                "nombre": cliente.nombre,
-                "apellido": cliente.apellido,
-                "email": cliente.email,
-                "telefono": cliente.telefono,
-                "direccion": cliente.direccion
-            }), 200
+            return jsonify(CLIENTE.uno(cliente)), 200
         else:
             return jsonify({"error": "Cliente no encontrado"}), 404 # 404 Not Found
     except Exception as e:
         return jsonify({"error": "Error al obtener el cliente", "details": str(e)}), 500
 
+# --- Extracto de facturas de un cliente ---
+
+# [GET] Facturas de un cliente con su resumen (extracto)
+# Filtros opcionales: desde, hasta. Paginación keyset como /api/facturas/: limit y
+# cursor (next_cursor). El resumen cubre todo el rango de fechas, no solo la página,
+# y sale de un SELECT con COUNT/SUM/MIN/MAX (uno más por lote de años archivados).
+@clientes_bp.route('/<int:id>/facturas', methods=['GET'])
+@condicional('cliente', 'factura')
+def get_facturas_cliente(id):
+    try:
+        cliente = db.session.execute(CLIENTE.consulta().where(Cliente.id == id)).first()
+        if not cliente:
+            return jsonify({"error": "Cliente no encontrado"}), 404
+        limite = leer_limite(request.args)
+        cursor = request.args.get('cursor')
+        archivados, desde, hasta = _archivos_en_rango(request.args)
+
+        def rango(factura):
+            condiciones = [factura.cliente_id == id]
+            if desde is not None:
+                condiciones.append(factura.fecha >= desde)
+            if hasta is not None:
+                condiciones.append(factura.fecha < hasta)
+            return condiciones
+        resumen = _resumenes(lambda factura: _consulta_resumen(factura).where(*rango(factura)),
+                             archivados).get(id, RESUMEN_VACIO)
+
+        clave_cursor = decodificar_cursor(cursor) if cursor else None
+        def consulta(factura):
+            consulta = FACTURA.consulta(factura).where(*rango(factura))
+            if clave_cursor:
+                fecha_cursor, id_cursor = clave_cursor
+                consulta = consulta.where(or_(factura.fecha < fecha_cursor,
+                                              and_(factura.fecha == fecha_cursor, factura.id < id_cursor)))
+            return consulta.order_by(factura.fecha.desc(), factura.id.desc())
+        # Una fila de más para saber si hay página siguiente (índice cliente_id, fecha, id)
+        filas = primeras_facturas(consulta, archivados, limite + 1)
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        return jsonify({
+            "cliente": CLIENTE.fila(cliente),
+            "resumen": _resumen_dict(resumen),
+            "facturas": FACTURA.filas(filas),
+            "next_cursor": codificar_cursor(filas[-1].fecha, filas[-1].id) if hay_mas else None
+        }), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        print(f"Error al obtener las facturas del cliente {id}: {e}")
+        return jsonify({"error": "Error interno al obtener las facturas del cliente"}), 500
+
+# [GET] Resúmenes de facturación de varios clientes a la vez (tabla de Clientes)
+# ?ids=1,2,3 (requerido, como máximo 500) y filtros opcionales desde, hasta.
+# Un SELECT ... GROUP BY cliente_id (más uno por lote de años archivados); los clientes sin facturas salen a cero.
+@clientes_bp.route('/resumen', methods=['GET'])
+@condicional('factura')
+def get_resumen_clientes():
+    try:
+        ids = leer_ids(request.args, 'ids')
+        archivados, desde, hasta = _archivos_en_rango(request.args)
+
+        def consulta(factura):
+            consulta = _consulta_resumen(factura).where(factura.cliente_id.in_(ids))
+            if desde is not None:
+                consulta = consulta.where(factura.fecha >= desde)
+            if hasta is not None:
+                consulta = consulta.where(factura.fecha < hasta)
+            return consulta
+        por_cliente = _resumenes(consulta, archivados)
+        return jsonify({"resumenes": [
+            {"cliente_id": cliente_id, **_resumen_dict(por_cliente.get(cliente_id, RESUMEN_VACIO))}
+            for cliente_id in ids
+        ]}), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        print(f"Error al obtener resúmenes de clientes: {e}")
+        return jsonify({"error": "Error interno al obtener los resúmenes de clientes"}), 500
+
+RESUMEN_VACIO = (0, 0, 0, 0, None, None)
+
+def _archivos_en_rango(args):
+    """(años archivados que alcanza el rango, desde, hasta)."""
+    desde = leer_fecha(args, 'desde')
+    hasta = leer_fecha(args, 'hasta', fin_de_dia=True)
+    return archivos(desde, hasta), desde, hasta
+
+def _consulta_resumen(factura):
+    """SELECT cliente_id, count, subtotal, iva, total, primera y última fecha, por cliente."""
+    return select(factura.cliente_id, *sumas_facturas(factura), func.min(factura.fecha),
+                  func.max(factura.fecha)).group_by(factura.cliente_id)
+
+def _resumenes(consulta, archivados):
+    """
+    {cliente_id: (num, subtotal, iva, total, primera, última)} de consulta(entidad)
+    sobre la tabla principal y los años archivados (por lotes), sumados.
+    """
+    resumenes = {}
+    for factura in entidades_facturas(archivados):
+        for cliente_id, num, subtotal, iva, total, primera, ultima in db.session.execute(consulta(factura)):
+            anterior = resumenes.get(cliente_id)
+            if anterior is not None:
+                num, subtotal, iva, total = (a + b for a, b in zip(anterior, (num, subtotal, iva, total)))
+                primera, ultima = min(anterior[4], primera), max(anterior[5], ultima)
+            resumenes[cliente_id] = (num, subtotal, iva, total, primera, ultima)
+    return resumenes
+
+def _resumen_dict(valores):
+    num_facturas, subtotal, iva, total, primera, ultima = valores
+    return {
+        "num_facturas": num_facturas,
+        "subtotal": a_euros(subtotal),
+        "iva": a_euros(iva),
+        "total": a_euros(total),
+        "primera_fecha": primera,
+        "ultima_fecha": ultima
+    }
+
 # [PUT] Actualizar un cliente por ID
 @clientes_bp.route('/<int:id>', methods=['PUT'])
 def update_cliente(id):
@@ -111,14 +241,7 @@ def update_cliente(id):
         cliente.direccion = data.get('direccion', cliente.direccion)
 
         db.session.commit()
-        return jsonify({
-            "id": cliente.id,
-            "nombre": cliente.nombre,
-            "apellido": cliente.apellido,
-            "email": cliente.email,
-            "telefono": cliente.telefono,
-            "direccion": cliente.direccion
-        }), 200
+        return jsonify(CLIENTE.uno(cliente)), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Error al actualizar el cliente", "details": str(e)}), 500
@@ -130,6 +253,12 @@ def delete_cliente(id):
     if cliente is None:
         return jsonify({"error": "Cliente no encontrado"}), 404
 
+    # Las facturas archivadas no tienen clave foránea: se comprueban aparte
+    if referenciado_en_archivo(Factura.cliente_id, id):
+        return jsonify({
+            "error": "No se puede eliminar el cliente porque está asociado a una o más facturas."
+        }), 409
+
     try:
         # Intenta eliminar y confirmar
         db.session.delete(cliente)
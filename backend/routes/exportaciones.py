@@ -0,0 +1,64 @@
+# backend/routes/exportaciones.py
+
+from flask import Blueprint, request, jsonify, send_file, url_for
+from paginacion import leer_fecha
+from exportaciones import ColaLlena, FORMATOS, encolar, estado, fichero, formatos_disponibles
+
+# Exportaciones en segundo plano: POST encola y responde 202 al momento;
+# el estado (y el enlace de descarga al terminar) se consulta con GET
+exportaciones_bp = Blueprint('exportaciones', __name__, url_prefix='/api/exports')
+
+def _estado_dict(datos):
+    if datos['estado'] == 'terminado':
+        datos['descarga'] = url_for('exportaciones.descargar_exportacion', trabajo_id=datos['id'])
+    return datos
+
+# [POST] Encolar una exportación de facturas con sus líneas
+# Cuerpo JSON (o query string): formato csv|json|xlsx, desde y hasta opcionales (YYYY-MM-DD, hasta incluido)
+@exportaciones_bp.route('', methods=['POST'])
+def crear_exportacion():
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.args
+    elif not isinstance(data, dict):
+        return jsonify({"error": "El cuerpo debe ser un objeto JSON"}), 400
+    formato = data.get('formato') or 'csv'
+    if not isinstance(formato, str):
+        return jsonify({"error": f"formato debe ser uno de: {', '.join(formatos_disponibles())}"}), 400
+    formato = formato.lower()
+    try:
+        desde = leer_fecha(data, 'desde')
+        hasta = leer_fecha(data, 'hasta', fin_de_dia=True)
+        trabajo = encolar(formato, desde, hasta)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ColaLlena as e:
+        return jsonify({"error": str(e)}), 503
+    respuesta = jsonify(_estado_dict(trabajo))
+    respuesta.headers['Location'] = url_for('exportaciones.get_exportacion', trabajo_id=trabajo['id'])
+    return respuesta, 202
+
+# [GET] Formatos disponibles (xlsx solo si está instalado openpyxl)
+@exportaciones_bp.route('/formatos', methods=['GET'])
+def get_formatos():
+    return jsonify(formatos_disponibles())
+
+# [GET] Estado y progreso de una exportación
+@exportaciones_bp.route('/<trabajo_id>', methods=['GET'])
+def get_exportacion(trabajo_id):
+    datos = estado(trabajo_id)
+    if datos is None:
+        return jsonify({"error": "Exportación no encontrada"}), 404
+    return jsonify(_estado_dict(datos))
+
+# [GET] Descargar el fichero de una exportación terminada
+@exportaciones_bp.route('/<trabajo_id>/descarga', methods=['GET'])
+def descargar_exportacion(trabajo_id):
+    datos = estado(trabajo_id)
+    if datos is None:
+        return jsonify({"error": "Exportación no encontrada"}), 404
+    ruta = fichero(trabajo_id)
+    if ruta is None:
+        return jsonify({"error": f"La exportación no está lista (estado: {datos['estado']})"}), 409
+    return send_file(ruta, mimetype=FORMATOS[datos['formato']], as_attachment=True,
+                     download_name=f"facturas-{trabajo_id}.{datos['formato']}")
@@ -1,111 +1,335 @@
 # backend/routes/facturas.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, make_response, send_file, stream_with_context
 from models import db, Factura, DetalleFactura, Cliente, Producto
-from decimal import Decimal, ROUND_HALF_UP # Usar Decimal para cálculos monetarios precisos
 from datetime import datetime # Asegúrate de importar datetime si usas utcnow()
+from sqlalchemy import and_, or_, insert, select
+from sqlalchemy.orm import joinedload, selectinload
+from stock import StockInsuficiente, cantidades_por_producto, reservar_stock, liberar_stock
+from cache_pdf import clave_factura, obtener_pdf, invalidar_pdf
+from reportes import acumular_facturas, acumular_factura_orm
+from streaming import TAMANO_LOTE, pide_stream, respuesta_ndjson
+from versiones import condicional
+from serializadores import FACTURA, CLIENTE_EN_FACTURA, DETALLE_FACTURA
+from dinero import a_centimos, a_euros, porcentaje
+import catalogo
+from archivo import (adjuntar, archivos, archivos_con_id, contar_facturas, ejercicios_archivados, en_rango,
+                     fuentes_facturas, primeras_facturas, tablas_archivo)
+from paquete_pdf import generar_zip
+from paginacion import (codificar_cursor, decodificar_cursor, leer_limite,
+                        leer_fecha, leer_entero, leer_importe)
 
 # Crear un Blueprint para las rutas de facturas
 facturas_bp = Blueprint('facturas', __name__, url_prefix='/api/facturas')
 
 # Constante para el IVA (21%) - Asegúrate que sea consistente con tu modelo si lo tienes ahí
-IVA_RATE = Decimal('0.21')
+IVA_PORCENTAJE = 21
+
+# Máximo de facturas aceptadas en una sola petición a /batch
+MAX_FACTURAS_BATCH = 1000
+
+# Paquete ZIP de PDF (/pdf-bundle): máximo de facturas y facturas leídas por consulta
+MAX_FACTURAS_PAQUETE = 10000
+TAMANO_LOTE_PAQUETE = 200
 
 # --- Rutas para Facturas ---
 
-# [GET] Obtener todas las facturas (información básica)
+# [GET] Obtener facturas (información básica), paginadas por cursor
+# Orden: (fecha desc, id desc). Filtros opcionales: desde, hasta, cliente_id,
+# total_min, total_max. Paginación: limit y cursor (el next_cursor de la respuesta anterior).
+# Con ?stream=1 o Accept: application/x-ndjson se emiten todas las facturas filtradas
+# en streaming (NDJSON), sin paginar.
 @facturas_bp.route('/', methods=['GET'])
+@condicional('factura', 'cliente')
 def get_facturas():
     try:
-        facturas_query = db.session.query(Factura, Cliente.nombre, Cliente.apellido)\
-                        .join(Cliente, Factura.cliente_id == Cliente.id)\
-                        .order_by(Factura.fecha.desc())\
-                        .all()
-
-        facturas_list = []
-        for factura, cliente_nombre, cliente_apellido in facturas_query:
-            parts = [cliente_nombre, cliente_apellido]
-            nombre_completo = " ".join(filter(None, parts)).strip()
-            if not nombre_completo and factura.cliente:
-                nombre_completo = f"Cliente ID: {factura.cliente_id}"
-            elif not nombre_completo:
-                nombre_completo = "Cliente Desconocido"
-
-            facturas_list.append({
-                "id": factura.id,
-                "fecha": factura.fecha.isoformat() if factura.fecha else None,
-                "cliente_id": factura.cliente_id,
-                "cliente_nombre_completo": nombre_completo,
-                "total": float(factura.total) if factura.total is not None else 0.0
-            })
-
-        return jsonify(facturas_list), 200
+        limite = leer_limite(request.args)
+        cursor = request.args.get('cursor')
+        clave_cursor = decodificar_cursor(cursor) if cursor else None
+
+        # Años archivados que alcanza el rango pedido: se consultan por lotes
+        # (archivo.primeras_facturas) y sus filas se mezclan con las de la principal
+        archivados = _archivos_listado(request.args, clave_cursor)
+
+        if pide_stream(request):
+            if not archivados:
+                return respuesta_ndjson(_consulta_listado(Factura, request.args, clave_cursor),
+                                        _factura_resumen_dict)
+            args = request.args
+            return respuesta_ndjson(lambda: _recorrer_listado(args, clave_cursor, archivados),
+                                    _factura_resumen_dict)
+
+        # Pedimos una fila de más para saber si hay página siguiente
+        filas = primeras_facturas(lambda factura: _consulta_listado(factura, request.args, clave_cursor),
+                                  archivados, limite + 1)
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        facturas_list = [_factura_resumen_dict(fila) for fila in filas]
+
+        next_cursor = codificar_cursor(filas[-1].fecha, filas[-1].id) if hay_mas else None
+        return jsonify({"facturas": facturas_list, "next_cursor": next_cursor}), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         print(f"Error al obtener facturas: {e}")
         return jsonify({"error": "Error interno al obtener las facturas"}), 500
 
+def _consulta_listado(factura, args, clave_cursor):
+    """SELECT del listado sobre 'factura' (Factura o la unión con archivos), filtrado y ordenado."""
+    query = _filtrar_facturas(
+        select(factura.id, factura.fecha, factura.cliente_id, factura.total_centimos,
+               Cliente.nombre, Cliente.apellido)
+        .join(Cliente, factura.cliente_id == Cliente.id),
+        args, factura)
+    if clave_cursor:
+        fecha_cursor, id_cursor = clave_cursor
+        # Keyset: filas estrictamente "después" de la última clave devuelta
+        query = query.filter(or_(factura.fecha < fecha_cursor,
+                                 and_(factura.fecha == fecha_cursor, factura.id < id_cursor)))
+    return query.order_by(factura.fecha.desc(), factura.id.desc())
+
+def _archivos_listado(args, clave_cursor):
+    """Años archivados que alcanza el rango de fechas pedido (y el cursor)."""
+    desde = leer_fecha(args, 'desde')
+    hasta = leer_fecha(args, 'hasta', fin_de_dia=True)
+    if clave_cursor:
+        hasta = min(hasta, clave_cursor[0]) if hasta else clave_cursor[0]
+    return archivos(desde, hasta)
+
+def _recorrer_listado(args, clave_cursor, archivados):
+    """Todas las filas del listado, principal y años archivados, por páginas keyset de TAMANO_LOTE."""
+    while True:
+        filas = primeras_facturas(lambda factura: _consulta_listado(factura, args, clave_cursor),
+                                  archivados, TAMANO_LOTE)
+        yield from filas
+        if len(filas) < TAMANO_LOTE:
+            return
+        clave_cursor = (filas[-1].fecha, filas[-1].id)
+
+def _filtrar_facturas(query, args, factura=Factura):
+    """Aplica a la query los filtros de rango de fechas, cliente y total."""
+    desde = leer_fecha(args, 'desde')
+    hasta = leer_fecha(args, 'hasta', fin_de_dia=True)
+    cliente_id = leer_entero(args, 'cliente_id')
+    total_min = leer_importe(args, 'total_min')
+    total_max = leer_importe(args, 'total_max')
+
+    if desde is not None:
+        query = query.filter(factura.fecha >= desde)
+    if hasta is not None:
+        query = query.filter(factura.fecha < hasta)
+    if cliente_id is not None:
+        query = query.filter(factura.cliente_id == cliente_id)
+    if total_min is not None:
+        query = query.filter(factura.total_centimos >= a_centimos(total_min))
+    if total_max is not None:
+        query = query.filter(factura.total_centimos <= a_centimos(total_max))
+    return query
+
+def _factura_resumen_dict(fila):
+    """Fila (id, fecha, cliente_id, total, nombre, apellido) del listado -> dict."""
+    id, fecha, cliente_id, total, nombre, apellido = fila
+    return {
+        "id": id,
+        "fecha": fecha,
+        "cliente_id": cliente_id,
+        "cliente_nombre_completo": _nombre_completo(nombre, apellido, cliente_id),
+        "total": a_euros(total)
+    }
+
+def _nombre_completo(nombre, apellido, cliente_id):
+    nombre_completo = " ".join(filter(None, [nombre, apellido])).strip()
+    return nombre_completo or f"Cliente ID: {cliente_id}"
+
 # [GET] Obtener una factura específica por ID (con detalles)
 @facturas_bp.route('/<int:id>', methods=['GET'])
+@condicional('factura', 'detalle_factura', 'cliente', 'producto')
 def get_factura(id):
     try:
-        factura = Factura.query.get(id)
-        if not factura:
+        datos = _factura_detalle(id)
+        if not datos:
             return jsonify({"error": "Factura no encontrada"}), 404
-
-        cliente_data = { "id": None, "nombre": "N/A", "apellido": "", "email": "N/A", "telefono": "", "direccion": "" }
-        if factura.cliente:
-            cliente_data = {
-                "id": factura.cliente.id,
-                "nombre": factura.cliente.nombre,
-                "apellido": factura.cliente.apellido or "",
-                "email": factura.cliente.email,
-                "telefono": factura.cliente.telefono or "",
-                "direccion": factura.cliente.direccion or ""
-            }
-
-        detalles_list = []
-        for d in factura.detalles:
-            nombre_producto = "Producto no encontrado/eliminado"
-            # MODIFICACIÓN AQUÍ: Añadir descripción del producto
-            descripcion_producto = "Descripción no disponible"
-            if d.producto:
-                nombre_producto = d.producto.nombre
-                # Asumimos que tu modelo Producto tiene un campo 'descripcion'
-                descripcion_producto = d.producto.descripcion or "Descripción no disponible"
-
-            detalles_list.append({
-                "id": d.id,
-                "producto_id": d.producto_id,
-                "nombre_producto": nombre_producto,
-                "descripcion_producto": descripcion_producto, # <-- CAMPO AÑADIDO
-                "cantidad": d.cantidad,
-                "precio_unitario": float(d.precio_unitario) if d.precio_unitario is not None else 0.0,
-                "subtotal_linea": float(d.subtotal_linea) if d.subtotal_linea is not None else 0.0
-            })
-
-        return jsonify({
-            "id": factura.id,
-            "fecha": factura.fecha.isoformat() if factura.fecha else None,
-            "cliente_id": factura.cliente_id,
-            "cliente": cliente_data,
-            "subtotal": float(factura.subtotal) if factura.subtotal is not None else 0.0,
-            "iva": float(factura.iva) if factura.iva is not None else 0.0,
-            "total": float(factura.total) if factura.total is not None else 0.0,
-            "detalles": detalles_list
-        }), 200
+        return jsonify(datos), 200
     except Exception as e:
         print(f"Error al obtener factura {id}: {e}")
         return jsonify({"error": "Error interno al obtener la factura"}), 500
 
+# [GET] PDF de una factura, generado en el servidor (mismo diseño que el frontend)
+# Se cachea en disco por hash del contenido; el hash es el ETag.
+@facturas_bp.route('/<int:id>/pdf', methods=['GET'])
+def get_factura_pdf(id):
+    try:
+        datos = _factura_detalle(id)
+        if not datos:
+            return jsonify({"error": "Factura no encontrada"}), 404
+        clave = clave_factura(datos)
+
+        if request.if_none_match.contains(clave):
+            respuesta = make_response('', 304) # El cliente ya tiene esta versión
+        else:
+            respuesta = send_file(obtener_pdf(datos, clave), mimetype='application/pdf',
+                                  download_name=f"Factura-{id}.pdf", conditional=False)
+        respuesta.set_etag(clave)
+        respuesta.cache_control.private = True
+        respuesta.cache_control.no_cache = True # Revalidar siempre (barato: 304 si no cambió)
+        return respuesta
+    except Exception as e:
+        print(f"Error al generar PDF de factura {id}: {e}")
+        return jsonify({"error": "Error interno al generar el PDF de la factura"}), 500
+
+# [GET] ZIP con el PDF de cada factura de un rango de fechas (cierre de mes)
+# ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD, ambos requeridos (hasta incluido).
+# Los PDF se generan en un pool de procesos y el ZIP se envía a medida que
+# terminan, sin montarlo entero en memoria (ver paquete_pdf.py).
+@facturas_bp.route('/pdf-bundle', methods=['GET'])
+def get_facturas_pdf_zip():
+    try:
+        desde = leer_fecha(request.args, 'desde')
+        hasta = leer_fecha(request.args, 'hasta', fin_de_dia=True)
+        if desde is None or hasta is None:
+            raise ValueError("desde y hasta son requeridos")
+        total = contar_facturas(desde, hasta)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        print(f"Error al preparar el paquete de PDF: {e}")
+        return jsonify({"error": "Error interno al preparar el paquete de PDF"}), 500
+    if total == 0:
+        return jsonify({"error": "No hay facturas en ese rango de fechas"}), 404
+    if total > MAX_FACTURAS_PAQUETE:
+        return jsonify({"error": f"El rango tiene {total} facturas; como máximo {MAX_FACTURAS_PAQUETE} por paquete"}), 400
+
+    # Una vez empezado el envío ya no se puede responder con un error: las
+    # validaciones van antes. Sin Content-Length (el tamaño no se conoce)
+    respuesta = Response(stream_with_context(generar_zip(_lotes_detalle(desde, hasta))),
+                         mimetype='application/zip')
+    respuesta.headers['Content-Disposition'] = \
+        f"attachment; filename=Facturas-{request.args['desde']}_{request.args['hasta']}.zip"
+    respuesta.headers['X-Total-Facturas'] = str(total)
+    return respuesta
+
+def _lotes_detalle(desde, hasta):
+    """
+    Dicts de detalle de las facturas en [desde, hasta) por lotes de
+    TAMANO_LOTE_PAQUETE (keyset por fecha, id), de los años archivados a la
+    base de datos principal. Entre lotes se cierra la transacción de lectura.
+    """
+    for factura, detalle, archivado in fuentes_facturas(desde, hasta):
+        ultima = None
+        while True:
+            if archivado is not None:
+                adjuntar([archivado])
+            condiciones = en_rango(factura, desde, hasta)
+            if ultima is not None:
+                condiciones.append(or_(factura.c.fecha > ultima[0],
+                                       and_(factura.c.fecha == ultima[0], factura.c.id > ultima[1])))
+            lote = _facturas_detalle_dicts(factura, detalle, condiciones,
+                                           (factura.c.fecha, factura.c.id), TAMANO_LOTE_PAQUETE)
+            db.session.rollback()
+            if not lote:
+                break
+            yield lote
+            ultima = (lote[-1]["fecha"], lote[-1]["id"])
+
+def _factura_detalle(id):
+    """Dict de detalle de la factura, de la base de datos principal o de su archivo; None si no existe."""
+    factura = _cargar_factura_completa(id)
+    if factura:
+        return _factura_detalle_dict(factura)
+    return _factura_archivada_dict(id)
+
+def _cargar_factura_completa(id):
+    """
+    Carga la factura con su cliente, detalles y productos en dos consultas:
+    cabecera + cliente (JOIN) y detalles + productos (SELECT IN con JOIN),
+    en lugar de una consulta perezosa por relación y por línea.
+    """
+    return Factura.query.options(
+        joinedload(Factura.cliente),
+        selectinload(Factura.detalles).joinedload(DetalleFactura.producto)
+    ).filter(Factura.id == id).first()
+
+def _factura_detalle_dict(factura):
+    """Factura con cliente y detalles ya cargados -> dict de la respuesta de detalle."""
+    datos = FACTURA.uno(factura)
+    datos["cliente"] = CLIENTE_EN_FACTURA.uno(factura.cliente) if factura.cliente else dict(CLIENTE_NO_DISPONIBLE)
+    datos["detalles"] = [
+        _con_producto(DETALLE_FACTURA.uno(d), d.producto.nombre if d.producto else None,
+                      d.producto.descripcion if d.producto else None)
+        for d in factura.detalles
+    ]
+    return datos
+
+def _factura_archivada_dict(id):
+    """
+    Igual que _factura_detalle_dict para una factura de un año archivado: se
+    adjunta su fichero y se lee con tres consultas (cabecera, cliente y líneas).
+    """
+    for archivado in archivos_con_id(id):
+        adjuntar([archivado])
+        factura, detalle = tablas_archivo(archivado)
+        encontradas = _facturas_detalle_dicts(factura, detalle, [factura.c.id == id])
+        if encontradas:
+            return encontradas[0]
+    return None
+
+def _facturas_detalle_dicts(factura, detalle, condiciones, orden=None, limite=None):
+    """
+    Dicts de detalle (como _factura_detalle_dict) de las facturas de la tabla
+    'factura' (principal o archivada, con su tabla 'detalle') que cumplen
+    'condiciones', con tres consultas en total: cabeceras, clientes y líneas.
+    """
+    consulta = FACTURA.consulta(factura).where(*condiciones)
+    if orden is not None:
+        consulta = consulta.order_by(*orden)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    facturas = [FACTURA.fila(fila) for fila in db.session.execute(consulta)]
+    if not facturas:
+        return []
+
+    clientes = {cliente["id"]: cliente for cliente in CLIENTE_EN_FACTURA.filas(db.session.execute(
+        CLIENTE_EN_FACTURA.consulta().where(Cliente.id.in_({f["cliente_id"] for f in facturas}))))}
+    detalles = {f["id"]: [] for f in facturas}
+    for l in db.session.execute(
+            DETALLE_FACTURA.consulta(detalle).add_columns(detalle.c.factura_id, Producto.nombre, Producto.descripcion)
+            .join_from(detalle, Producto, detalle.c.producto_id == Producto.id, isouter=True)
+            .where(detalle.c.factura_id.in_(list(detalles))).order_by(detalle.c.id)):
+        detalles[l[-3]].append(_con_producto(DETALLE_FACTURA.fila(l[:-3]), l[-2], l[-1]))
+
+    for datos in facturas:
+        cliente = clientes.get(datos["cliente_id"])
+        datos["cliente"] = dict(cliente) if cliente else dict(CLIENTE_NO_DISPONIBLE)
+        datos["detalles"] = detalles[datos["id"]]
+    return facturas
+
+CLIENTE_NO_DISPONIBLE = { "id": None, "nombre": "N/A", "apellido": "", "email": "N/A", "telefono": "", "direccion": "" }
+
+def _con_producto(detalle, nombre, descripcion):
+    """Añade al dict de una línea el nombre y la descripción de su producto (o un aviso si ya no existe)."""
+    if nombre is not None:
+        detalle["nombre_producto"] = nombre
+        detalle["descripcion_producto"] = descripcion or "Descripción no disponible"
+    else:
+        detalle["nombre_producto"] = "Producto no encontrado/eliminado"
+        detalle["descripcion_producto"] = "Descripción no disponible"
+    return detalle
+
 # [DELETE] Eliminar una factura por ID
 @facturas_bp.route('/<int:id>', methods=['DELETE'])
 def delete_factura(id):
     try:
         factura = Factura.query.get(id)
         if not factura:
+            if _factura_archivada_dict(id):
+                return jsonify({"error": "La factura está archivada (ejercicio cerrado) y no se puede eliminar"}), 409
             return jsonify({"error": "Factura no encontrada"}), 404
+        acumular_factura_orm(factura, signo=-1) # Restar de los resúmenes de reportes
+        liberar_stock(cantidades_por_producto((d.producto_id, d.cantidad) for d in factura.detalles))
         db.session.delete(factura)
         db.session.commit()
+        invalidar_pdf(id)
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -120,117 +344,254 @@ def create_factura():
     if not data or not data.get('cliente_id') or not data.get('detalles'):
         return jsonify({"error": "cliente_id y detalles son requeridos"}), 400
 
-    cliente_id = data['cliente_id']
     detalles_data = data['detalles']
+    try:
+        # Entero desde aquí: es el que se guarda, se suma en los reportes y se devuelve
+        cliente_id = int(data['cliente_id'])
+    except (ValueError, TypeError):
+        return jsonify({"error": "cliente_id debe ser un número entero válido"}), 400
 
     if not isinstance(detalles_data, list) or not detalles_data:
         return jsonify({"error": "Detalles debe ser una lista no vacía de productos"}), 400
 
-    cliente = Cliente.query.get(cliente_id)
-    if not cliente:
+    if not catalogo.cliente(cliente_id):
         return jsonify({"error": f"Cliente con id {cliente_id} no encontrado"}), 404
 
     try:
-        total_factura_subtotal = Decimal('0.00')
-        detalles_para_crear_info = []
-
-        for item in detalles_data:
-            producto_id = item.get('producto_id')
-            cantidad = item.get('cantidad')
-
-            if not producto_id or cantidad is None:
-                raise ValueError("Cada detalle debe tener producto_id y cantidad")
-            try:
-                cantidad = int(cantidad)
-                if cantidad <= 0:
-                    raise ValueError(f"La cantidad para el producto ID {producto_id} debe ser positiva")
-            except (ValueError, TypeError):
-                raise ValueError(f"La cantidad para el producto ID {producto_id} debe ser un número entero válido")
-
-            producto = Producto.query.get(producto_id)
-            if not producto:
-                raise ValueError(f"Producto con id {producto_id} no encontrado")
-
-            precio_unitario_actual = Decimal(str(producto.precio))
-            subtotal_linea = precio_unitario_actual * Decimal(cantidad)
-            total_factura_subtotal += subtotal_linea
-
-            detalles_para_crear_info.append({
-                "producto_id": producto_id,
-                "cantidad": cantidad,
-                "precio_unitario": precio_unitario_actual,
-                "subtotal_linea": subtotal_linea,
-                "producto_obj": producto # Guardamos el objeto para obtener nombre y descripción
-            })
-
-        iva_calculado = (total_factura_subtotal * IVA_RATE).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        total_calculado = (total_factura_subtotal + iva_calculado).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        lineas = _leer_lineas(detalles_data)
+        productos_por_id = _productos_por_id({producto_id for producto_id, _ in lineas})
+        total_factura_subtotal, iva_calculado, total_calculado, detalles_para_crear_info = \
+            _calcular_factura(lineas, productos_por_id)
+        reservar_stock(cantidades_por_producto(lineas)) # Primera escritura: abre la transacción
 
         nueva_factura = Factura(
             cliente_id=cliente_id,
-            subtotal=total_factura_subtotal,
-            iva=iva_calculado,
-            total=total_calculado,
+            subtotal_centimos=total_factura_subtotal,
+            iva_centimos=iva_calculado,
+            total_centimos=total_calculado,
             fecha=datetime.utcnow()
         )
         db.session.add(nueva_factura)
         db.session.flush() # Obtener ID de nueva_factura
+        factura_id = nueva_factura.id
 
         for detalle_info in detalles_para_crear_info:
             detalle = DetalleFactura(
-                factura_id=nueva_factura.id,
+                factura_id=factura_id,
                 producto_id=detalle_info['producto_id'],
                 cantidad=detalle_info['cantidad'],
-                precio_unitario=detalle_info['precio_unitario'],
-                subtotal_linea=detalle_info['subtotal_linea']
+                precio_unitario_centimos=detalle_info['precio_unitario'],
+                subtotal_linea_centimos=detalle_info['subtotal_linea']
             )
             db.session.add(detalle)
 
+        acumular_facturas([_datos_reporte(nueva_factura.fecha, cliente_id, total_factura_subtotal, iva_calculado,
+                                          total_calculado, detalles_para_crear_info)])
         db.session.commit()
 
         # --- Respuesta ---
-        cliente_resp = {
-            "id": cliente.id, "nombre": cliente.nombre, "apellido": cliente.apellido or "",
-            "email": cliente.email, "telefono": cliente.telefono or "", "direccion": cliente.direccion or ""
-        }
-
-        detalles_resp = []
-        db.session.refresh(nueva_factura) # Asegurar que la relación 'detalles' esté actualizada
-        for d in nueva_factura.detalles: # Iterar sobre los detalles recién creados
-            nombre_producto = "Producto no encontrado/eliminado"
-            # MODIFICACIÓN AQUÍ: Añadir descripción del producto
-            descripcion_producto = "Descripción no disponible"
-            if d.producto:
-                nombre_producto = d.producto.nombre
-                # Asumimos que tu modelo Producto tiene un campo 'descripcion'
-                descripcion_producto = d.producto.descripcion or "Descripción no disponible"
-
-            detalles_resp.append({
-                "id": d.id,
-                "producto_id": d.producto_id,
-                "nombre_producto": nombre_producto,
-                "descripcion_producto": descripcion_producto, # <-- CAMPO AÑADIDO
-                "cantidad": d.cantidad,
-                "precio_unitario": float(d.precio_unitario),
-                "subtotal_linea": float(d.subtotal_linea)
-            })
-
-        response_data = {
-            "id": nueva_factura.id,
-            "fecha": nueva_factura.fecha.isoformat(),
-            "cliente_id": nueva_factura.cliente_id,
-            "cliente": cliente_resp,
-            "subtotal": float(nueva_factura.subtotal),
-            "iva": float(nueva_factura.iva),
-            "total": float(nueva_factura.total),
-            "detalles": detalles_resp
-        }
-        return jsonify(response_data), 201
+        # Misma lectura acotada que get_factura (sin refresh ni cargas perezosas por línea)
+        return jsonify(_factura_detalle_dict(_cargar_factura_completa(factura_id))), 201
 
     except ValueError as ve:
         db.session.rollback()
         return jsonify({"error": str(ve)}), 400
+    except StockInsuficiente as si:
+        db.session.rollback()
+        return jsonify({"error": str(si), "faltantes": si.faltantes}), 409
     except Exception as e:
         db.session.rollback()
         print(f"Error inesperado al crear factura: {e}")
-        return jsonify({"error": "Error interno al crear la factura"}), 500
\ No newline at end of file
+        return jsonify({"error": "Error interno al crear la factura"}), 500
+
+# [POST] Crear varias facturas en una sola petición (importaciones)
+# Body: {"facturas": [{"cliente_id": 1, "detalles": [...], "fecha": "2025-01-31"}, ...]}
+# 'fecha' es opcional. Las facturas válidas se insertan juntas en una transacción;
+# las inválidas se informan en 'resultados' sin afectar al resto.
+@facturas_bp.route('/batch', methods=['POST'])
+def create_facturas_batch():
+    data = request.get_json()
+    facturas_data = data.get('facturas') if isinstance(data, dict) else None
+
+    if not isinstance(facturas_data, list) or not facturas_data:
+        return jsonify({"error": "facturas debe ser una lista no vacía"}), 400
+    if len(facturas_data) > MAX_FACTURAS_BATCH:
+        return jsonify({"error": f"Como máximo {MAX_FACTURAS_BATCH} facturas por petición"}), 400
+
+    resultados = [None] * len(facturas_data)
+    pendientes = [] # (indice, cliente_id, fecha, lineas) de las facturas con formato válido
+    cerrados = ejercicios_archivados() # Sus ficheros son de solo lectura
+
+    for indice, factura_data in enumerate(facturas_data):
+        try:
+            if not isinstance(factura_data, dict) or not factura_data.get('cliente_id') or not factura_data.get('detalles'):
+                raise ValueError("cliente_id y detalles son requeridos")
+            try:
+                cliente_id = int(factura_data['cliente_id'])
+            except (ValueError, TypeError):
+                raise ValueError("cliente_id debe ser un número entero válido")
+            if not isinstance(factura_data['detalles'], list):
+                raise ValueError("Detalles debe ser una lista no vacía de productos")
+            fecha = datetime.utcnow()
+            if factura_data.get('fecha'):
+                try:
+                    fecha = datetime.fromisoformat(factura_data['fecha'])
+                except (ValueError, TypeError):
+                    raise ValueError("fecha debe ser una fecha ISO válida")
+                if fecha.year in cerrados:
+                    raise ValueError(f"El ejercicio {fecha.year} está archivado: no admite facturas nuevas")
+            pendientes.append((indice, cliente_id, fecha, _leer_lineas(factura_data['detalles'])))
+        except ValueError as ve:
+            resultados[indice] = {"indice": indice, "ok": False, "error": str(ve)}
+
+    try:
+        # Clientes y productos de la caché; los que falten, con una consulta IN por tabla
+        clientes_existentes = set(catalogo.clientes({cliente_id for _, cliente_id, _, _ in pendientes}))
+        productos_por_id = _productos_por_id(
+            {producto_id for _, _, _, lineas in pendientes for producto_id, _ in lineas})
+
+        aceptadas = [] # (indice, cabecera, detalles_info, lineas) listas para insertar
+        for indice, cliente_id, fecha, lineas in pendientes:
+            try:
+                if cliente_id not in clientes_existentes:
+                    raise ValueError(f"Cliente con id {cliente_id} no encontrado")
+                subtotal, iva, total, detalles_info = _calcular_factura(lineas, productos_por_id)
+            except ValueError as ve:
+                resultados[indice] = {"indice": indice, "ok": False, "error": str(ve)}
+                continue
+            aceptadas.append((indice, {"cliente_id": cliente_id, "fecha": fecha, "subtotal_centimos": subtotal,
+                                       "iva_centimos": iva, "total_centimos": total}, detalles_info, lineas))
+
+        # Stock de todas las facturas aceptadas con un solo UPDATE. Si no llega para
+        # todas, se reserva factura a factura, en orden, para saber cuáles se quedan fuera
+        try:
+            reservar_stock(cantidades_por_producto(
+                linea for _, _, _, lineas in aceptadas for linea in lineas))
+        except StockInsuficiente:
+            reservadas = []
+            for aceptada in aceptadas:
+                indice, lineas = aceptada[0], aceptada[3]
+                try:
+                    reservar_stock(cantidades_por_producto(lineas)) # Si falla, no deja nada descontado
+                except StockInsuficiente as si:
+                    resultados[indice] = {"indice": indice, "ok": False, "error": str(si), "faltantes": si.faltantes}
+                    continue
+                reservadas.append(aceptada)
+            aceptadas = reservadas
+
+        indices_validos = [indice for indice, _, _, _ in aceptadas]
+        cabeceras = [cabecera for _, cabecera, _, _ in aceptadas]
+        lineas_por_factura = [detalles_info for _, _, detalles_info, _ in aceptadas]
+
+        if cabeceras:
+            # Cabeceras y luego líneas. SQLite no garantiza el orden de RETURNING:
+            # con sort_by_parameter_order los ids vuelven en el orden de las
+            # cabeceras (en SQLite SQLAlchemy hace un INSERT por factura, todos en
+            # la misma transacción); las líneas van en un solo executemany
+            ids_facturas = db.session.scalars(
+                insert(Factura).returning(Factura.id, sort_by_parameter_order=True), cabeceras).all()
+            db.session.execute(insert(DetalleFactura), [
+                {
+                    "factura_id": factura_id,
+                    "producto_id": info['producto_id'],
+                    "cantidad": info['cantidad'],
+                    "precio_unitario_centimos": info['precio_unitario'],
+                    "subtotal_linea_centimos": info['subtotal_linea']
+                }
+                for factura_id, detalles_info in zip(ids_facturas, lineas_por_factura)
+                for info in detalles_info
+            ])
+            acumular_facturas([
+                _datos_reporte(c['fecha'], c['cliente_id'], c['subtotal_centimos'], c['iva_centimos'],
+                               c['total_centimos'], detalles_info)
+                for c, detalles_info in zip(cabeceras, lineas_por_factura)
+            ])
+            db.session.commit()
+
+            for indice, factura_id, cabecera in zip(indices_validos, ids_facturas, cabeceras):
+                resultados[indice] = {"indice": indice, "ok": True, "id": factura_id,
+                                      "total": a_euros(cabecera['total_centimos'])}
+        else:
+            db.session.rollback() # Nada que insertar: cerrar la transacción abierta por la reserva
+
+        creadas = len(cabeceras)
+        return jsonify({
+            "creadas": creadas,
+            "errores": len(facturas_data) - creadas,
+            "resultados": resultados
+        }), 201 if creadas else 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error inesperado al crear facturas en lote: {e}")
+        return jsonify({"error": "Error interno al crear las facturas"}), 500
+
+# --- Cálculo de facturas (compartido por create_factura y create_facturas_batch) ---
+
+def _leer_lineas(detalles_data):
+    """Valida los detalles recibidos y devuelve una lista de (producto_id, cantidad)."""
+    if not isinstance(detalles_data, list) or not detalles_data:
+        raise ValueError("Detalles debe ser una lista no vacía de productos")
+
+    lineas = []
+    for item in detalles_data:
+        producto_id = item.get('producto_id') if isinstance(item, dict) else None
+        cantidad = item.get('cantidad') if isinstance(item, dict) else None
+
+        if not producto_id or cantidad is None:
+            raise ValueError("Cada detalle debe tener producto_id y cantidad")
+        try:
+            producto_id = int(producto_id)
+        except (ValueError, TypeError):
+            raise ValueError(f"El producto_id {producto_id} debe ser un número entero válido")
+        try:
+            cantidad = int(cantidad)
+        except (ValueError, TypeError):
+            raise ValueError(f"La cantidad para el producto ID {producto_id} debe ser un número entero válido")
+        if cantidad <= 0:
+            raise ValueError(f"La cantidad para el producto ID {producto_id} debe ser positiva")
+
+        lineas.append((producto_id, cantidad))
+    return lineas
+
+def _datos_reporte(fecha, cliente_id, subtotal, iva, total, detalles_info):
+    """Datos de una factura nueva en el formato de reportes.acumular_facturas."""
+    return {
+        "fecha": fecha, "cliente_id": cliente_id, "subtotal": subtotal, "iva": iva, "total": total,
+        "lineas": [(info['producto_id'], info['cantidad'], info['subtotal_linea']) for info in detalles_info]
+    }
+
+def _productos_por_id(ids_productos):
+    """
+    Productos indicados desde la caché de catálogo (los que falten, con una
+    sola consulta IN). Devuelve {id: ProductoCacheado}.
+    """
+    return catalogo.productos(ids_productos)
+
+def _calcular_factura(lineas, productos_por_id):
+    """
+    Calcula importes en céntimos (enteros) a partir de las líneas (producto_id, cantidad).
+    Devuelve (subtotal, iva, total, detalles_info). Lanza ValueError si falta un producto.
+    """
+    total_factura_subtotal = 0
+    detalles_info = []
+
+    for producto_id, cantidad in lineas:
+        producto = productos_por_id.get(producto_id)
+        if not producto:
+            raise ValueError(f"Producto con id {producto_id} no encontrado")
+
+        precio_unitario_actual = producto.precio_centimos
+        subtotal_linea = precio_unitario_actual * cantidad
+        total_factura_subtotal += subtotal_linea
+
+        detalles_info.append({
+            "producto_id": producto_id,
+            "cantidad": cantidad,
+            "precio_unitario": precio_unitario_actual,
+            "subtotal_linea": subtotal_linea,
+            "producto_obj": producto # Copia de la caché: nombre y descripción
+        })
+
+    iva_calculado = porcentaje(total_factura_subtotal, IVA_PORCENTAJE)
+    total_calculado = total_factura_subtotal + iva_calculado
+    return total_factura_subtotal, iva_calculado, total_calculado, detalles_info
@@ -0,0 +1,12 @@
+# backend/routes/metricas.py
+
+from flask import Blueprint, Response
+from metricas import texto_prometheus
+
+# Crear un Blueprint para las métricas (formato de texto de Prometheus)
+metricas_bp = Blueprint('metricas', __name__, url_prefix='/api/_metrics')
+
+# [GET] Latencias, peticiones y consultas SQL por endpoint desde el arranque
+@metricas_bp.route('', methods=['GET'])
+def get_metricas():
+    return Response(texto_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,8 +1,15 @@
 # backend/routes/productos.py
 
 from flask import Blueprint, request, jsonify
-from models import db, Producto # Importar db y el modelo Producto
+from models import db, Producto, DetalleFactura # Importar db y los modelos
 from sqlalchemy.exc import IntegrityError
+from streaming import pide_stream, respuesta_ndjson
+from versiones import condicional
+from serializadores import PRODUCTO, respuesta_lista_json
+from dinero import a_centimos
+from importacion import importar_csv, lector_de_peticion
+from archivo import referenciado_en_archivo
+from busqueda import leer_parametros_busqueda, buscar_productos
 
 # Crear un Blueprint para las rutas de productos
 productos_bp = Blueprint('productos', __name__, url_prefix='/api/productos')
@@ -19,10 +26,10 @@ def create_producto():
 
     # Validar que el precio sea un número positivo
     try:
-        precio = float(data['precio'])
-        if precio < 0:
+        precio_centimos = a_centimos(data['precio'])
+        if precio_centimos < 0:
             return jsonify({"error": "El precio no puede ser negativo"}), 400
-    except (ValueError, TypeError):
+    except ValueError:
         return jsonify({"error": "El precio debe ser un número válido"}), 400
 
     # Validar stock si se proporciona
@@ -35,66 +42,70 @@ def create_producto():
                 return jsonify({"error": "El stock no puede ser negativo"}), 400
         except (ValueError, TypeError):
             return jsonify({"error": "El stock debe ser un número entero válido"}), 400
-    # Si stock_val era None, stock_int seguirá siendo None (si tu modelo lo permite)
-    # Si tu modelo NO permite None para stock, deberías asignar un valor por defecto aquí, ej: 0
+    # Si stock_val era None, stock_int seguirá siendo None: el producto no gestiona
+    # inventario y las facturas no lo descuentan (stock.py)
 
     nuevo_producto = Producto(
         nombre=data['nombre'],
         descripcion=data.get('descripcion'), # Permite None si no se envía
-        precio=precio,
+        precio_centimos=precio_centimos,
         stock=stock_int # Usar el valor validado (puede ser None o int)
     )
     try:
         db.session.add(nuevo_producto)
         db.session.commit()
         # Devolver el objeto creado completo
-        return jsonify({
-            "id": nuevo_producto.id,
-            "nombre": nuevo_producto.nombre,
-            "descripcion": nuevo_producto.descripcion,
-            "precio": nuevo_producto.precio,
-            "stock": nuevo_producto.stock
-        }), 201
+        return jsonify(PRODUCTO.uno(nuevo_producto)), 201
     except Exception as e:
         db.session.rollback()
         print(f"Error al guardar producto: {e}") # Log para el desarrollador
         return jsonify({"error": "Error interno al guardar el producto"}), 500
 
+# [POST] Importar productos desde un CSV (campo 'archivo' o cuerpo text/csv)
+# Cabecera: nombre,descripcion,precio,stock.
+# Las filas con errores se omiten y se devuelven en el informe.
+@productos_bp.route('/importar', methods=['POST'])
+def importar_productos():
+    try:
+        informe = importar_csv('productos', lector_de_peticion(request))
+        return jsonify(informe), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Error al importar los productos", "details": str(e)}), 500
+
 # [GET] Obtener todos los productos
+# Con ?stream=1 o Accept: application/x-ndjson se emiten en streaming (NDJSON)
+# Con ?q=texto se buscan por nombre o descripción (FTS5), ordenados por relevancia.
+# Opcionales: prefijo=1 (búsqueda mientras se escribe) y limit.
 @productos_bp.route('/', methods=['GET'])
+@condicional('producto')
 def get_productos():
     try:
-        productos = Producto.query.all()
-        # Usar list comprehension para crear la lista de diccionarios
-        productos_list = [
-            {
-                "id": p.id,
-                "nombre": p.nombre,
-                "descripcion": p.descripcion,
-                "precio": p.precio,
-                "stock": p.stock
-            } for p in productos
-        ]
-        return jsonify(productos_list), 200
+        if 'q' in request.args:
+            consulta, limite = leer_parametros_busqueda(request.args)
+            return jsonify(PRODUCTO.muchos(buscar_productos(consulta, limite))), 200
+        if pide_stream(request):
+            return respuesta_ndjson(PRODUCTO.consulta_json().order_by(Producto.id))
+        # SQLite codifica cada fila en JSON: sin objetos Producto ni dicts intermedios
+        return respuesta_lista_json(PRODUCTO.consulta_json()), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         print(f"Error al obtener productos: {e}") # Log para el desarrollador
         return jsonify({"error": "Error interno al obtener los productos"}), 500
 
 # [GET] Obtener un producto por ID
 @productos_bp.route('/<int:id>', methods=['GET'])
+@condicional('producto')
 def get_producto(id):
     try:
         # Usar get_or_404 es una alternativa más concisa si prefieres
         # producto = Producto.query.get_or_404(id)
         producto = Producto.query.get(id)
         if producto:
-            return jsonify({
-                "id": producto.id,
-                "nombre": producto.nombre,
-                "descripcion": producto.descripcion,
-                "precio": producto.precio,
-                "stock": producto.stock
-            }), 200
+            return jsonify(PRODUCTO.uno(producto)), 200
         else:
             return jsonify({"error": "Producto no encontrado"}), 404
     except Exception as e:
@@ -121,11 +132,11 @@ def update_producto(id):
             producto.descripcion = data['descripcion']
         if 'precio' in data:
             try:
-                precio = float(data['precio'])
-                if precio < 0:
+                precio_centimos = a_centimos(data['precio'])
+                if precio_centimos < 0:
                     return jsonify({"error": "El precio no puede ser negativo"}), 400
-                producto.precio = precio
-            except (ValueError, TypeError):
+                producto.precio_centimos = precio_centimos
+            except ValueError:
                 return jsonify({"error": "El precio debe ser un número válido"}), 400
         if 'stock' in data:
             stock_val = data.get('stock')
@@ -143,13 +154,7 @@ def update_producto(id):
 
         db.session.commit()
         # Devolver el objeto actualizado
-        return jsonify({
-            "id": producto.id,
-            "nombre": producto.nombre,
-            "descripcion": producto.descripcion,
-            "precio": producto.precio,
-            "stock": producto.stock
-        }), 200
+        return jsonify(PRODUCTO.uno(producto)), 200
     except Exception as e:
         db.session.rollback()
         print(f"Error al actualizar producto {id}: {e}") # Log para el desarrollador
@@ -162,6 +167,12 @@ def delete_producto(id):
     if producto is None:
         return jsonify({"error": "Producto no encontrado"}), 404
 
+    # Las facturas archivadas no tienen clave foránea: se comprueban aparte
+    if referenciado_en_archivo(DetalleFactura.producto_id, id):
+        return jsonify({
+            "error": "No se puede eliminar el producto porque está asociado a una o más facturas."
+        }), 409
+
     try:
         # Intenta eliminar y confirmar
         db.session.delete(producto)
@@ -0,0 +1,110 @@
+# backend/routes/reportes.py
+
+from flask import Blueprint, request, jsonify
+from models import db, Cliente, Producto, ResumenMensual, ResumenCliente, ResumenProducto
+from dinero import a_euros
+from paginacion import leer_fecha, leer_mes
+from reportes import totales_facturas
+
+# Crear un Blueprint para las rutas de reportes
+# Todas leen las tablas de resumen: el coste depende del número de grupos
+# (meses, clientes, productos), no del número de facturas.
+reportes_bp = Blueprint('reportes', __name__, url_prefix='/api/reportes')
+
+def _leer_limite(args):
+    valor = args.get('limit')
+    if valor is None:
+        return None
+    limite = int(valor) # ValueError se traduce a 400 en cada ruta
+    if limite <= 0:
+        raise ValueError("limit debe ser positivo")
+    return limite
+
+# [GET] Totales por mes. Filtros opcionales: desde, hasta (formato 'YYYY-MM', incluidos)
+@reportes_bp.route('/mensual', methods=['GET'])
+def get_reporte_mensual():
+    try:
+        desde, hasta = leer_mes(request.args, 'desde'), leer_mes(request.args, 'hasta')
+        query = ResumenMensual.query
+        if desde:
+            query = query.filter(ResumenMensual.mes >= desde)
+        if hasta:
+            query = query.filter(ResumenMensual.mes <= hasta)
+        return jsonify([{
+            "mes": r.mes,
+            "num_facturas": r.num_facturas,
+            "subtotal": a_euros(r.subtotal_centimos),
+            "iva": a_euros(r.iva_centimos),
+            "total": a_euros(r.total_centimos)
+        } for r in query.order_by(ResumenMensual.mes)]), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        print(f"Error al obtener reporte mensual: {e}")
+        return jsonify({"error": "Error interno al obtener el reporte mensual"}), 500
+
+# [GET] Totales por cliente, de mayor a menor facturación. Opcional: limit
+@reportes_bp.route('/clientes', methods=['GET'])
+def get_reporte_clientes():
+    try:
+        limite = _leer_limite(request.args)
+        query = db.session.query(ResumenCliente, Cliente.nombre, Cliente.apellido)\
+                          .outerjoin(Cliente, Cliente.id == ResumenCliente.cliente_id)\
+                          .order_by(ResumenCliente.total_centimos.desc())
+        if limite:
+            query = query.limit(limite)
+        return jsonify([{
+            "cliente_id": r.cliente_id,
+            "cliente_nombre_completo": " ".join(filter(None, [nombre, apellido])).strip() or f"Cliente ID: {r.cliente_id}",
+            "num_facturas": r.num_facturas,
+            "subtotal": a_euros(r.subtotal_centimos),
+            "iva": a_euros(r.iva_centimos),
+            "total": a_euros(r.total_centimos)
+        } for r, nombre, apellido in query]), 200
+    except ValueError:
+        return jsonify({"error": "limit debe ser un número entero positivo"}), 400
+    except Exception as e:
+        print(f"Error al obtener reporte por clientes: {e}")
+        return jsonify({"error": "Error interno al obtener el reporte por clientes"}), 500
+
+# [GET] Unidades e ingresos (sin IVA) por producto, de mayor a menor. Opcional: limit
+@reportes_bp.route('/productos', methods=['GET'])
+def get_reporte_productos():
+    try:
+        limite = _leer_limite(request.args)
+        query = db.session.query(ResumenProducto, Producto.nombre)\
+                          .outerjoin(Producto, Producto.id == ResumenProducto.producto_id)\
+                          .order_by(ResumenProducto.ingresos_centimos.desc())
+        if limite:
+            query = query.limit(limite)
+        return jsonify([{
+            "producto_id": r.producto_id,
+            "nombre_producto": nombre or "Producto no encontrado/eliminado",
+            "num_lineas": r.num_lineas,
+            "unidades": r.unidades,
+            "ingresos": a_euros(r.ingresos_centimos)
+        } for r, nombre in query]), 200
+    except ValueError:
+        return jsonify({"error": "limit debe ser un número entero positivo"}), 400
+    except Exception as e:
+        print(f"Error al obtener reporte por productos: {e}")
+        return jsonify({"error": "Error interno al obtener el reporte por productos"}), 500
+
+# [GET] Totales exactos de las facturas. Filtros opcionales: desde, hasta (fechas ISO)
+# Se calculan con SUM() directamente sobre la tabla factura (importes en céntimos).
+@reportes_bp.route('/totales', methods=['GET'])
+def get_reporte_totales():
+    try:
+        num_facturas, subtotal, iva, total = totales_facturas(
+            leer_fecha(request.args, 'desde'), leer_fecha(request.args, 'hasta', fin_de_dia=True))
+        return jsonify({
+            "num_facturas": num_facturas,
+            "subtotal": a_euros(subtotal),
+            "iva": a_euros(iva),
+            "total": a_euros(total)
+        }), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        print(f"Error al obtener totales de facturas: {e}")
+        return jsonify({"error": "Error interno al obtener los totales"}), 500
@@ -0,0 +1,158 @@
+# backend/serializadores.py
+
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import DateTime, Integer, func, select, type_coerce
+from sqlalchemy.sql import FromClause
+from models import db, Cliente, Producto, Factura, DetalleFactura
+from dinero import a_euros
+
+try:
+    import orjson # Opcional: si no está instalado se usa el JSON estándar de Flask
+except ImportError:
+    orjson = None
+
+# --- Serializadores de los modelos ---
+# Los extractores de campos (attrgetter) se construyen una sola vez al importar
+# el módulo. Para listados se consultan solo las columnas necesarias y se
+# convierten las tuplas directamente, sin crear objetos del ORM. Los listados
+# completos de clientes y productos ni siquiera pasan por dicts: SQLite
+# devuelve cada fila ya codificada (json_object) y solo se unen los textos.
+
+def _o_vacio(valor):
+    return valor or ""
+
+# Equivalente en SQL de cada conversión, para consulta_json()
+_CONVERSIONES_SQL = {
+    a_euros: lambda columna: func.coalesce(type_coerce(columna, Integer), 0) / 100.0,
+    _o_vacio: lambda columna: func.coalesce(columna, ''),
+}
+
+class Serializador:
+    """
+    Convierte instancias (o filas de columnas) de un modelo en dicts.
+    'campos' es una lista de nombres de atributo, tuplas (atributo, conversión)
+    o tuplas (clave en el JSON, atributo, conversión).
+    """
+
+    def __init__(self, modelo, campos):
+        campos = [self._normalizar(c) for c in campos]
+        self.claves = tuple(clave for clave, _, _ in campos)
+        atributos = tuple(atributo for _, atributo, _ in campos)
+        self.columnas = tuple(getattr(modelo, atributo) for atributo in atributos)
+        self._extraer = attrgetter(*atributos)
+        self._conversiones = tuple((i, conversion) for i, (_, _, conversion) in enumerate(campos) if conversion)
+
+    @staticmethod
+    def _normalizar(campo):
+        if not isinstance(campo, tuple):
+            return (campo, campo, None)
+        if len(campo) == 2:
+            return (campo[0], campo[0], campo[1])
+        return campo
+
+    def consulta(self, origen=None):
+        """
+        SELECT de solo las columnas serializadas (para usar con .filas()). Con
+        'origen' las toma de otra tabla con las mismas columnas (facturas
+        archivadas) o de un alias del modelo.
+        """
+        if origen is None:
+            return select(*self.columnas)
+        if isinstance(origen, FromClause):
+            return select(*(origen.c[columna.key] for columna in self.columnas))
+        return select(*(getattr(origen, columna.key) for columna in self.columnas))
+
+    def consulta_json(self, origen=None):
+        """
+        Como consulta(), pero cada fila es una sola columna con el objeto JSON
+        ya codificado por SQLite (json_object), con las mismas claves y valores
+        que daría fila(). Solo para serializadores sin fechas y con conversiones
+        que tengan equivalente en _CONVERSIONES_SQL.
+        """
+        conversiones = dict(self._conversiones)
+        pares = []
+        for i, (clave, columna) in enumerate(zip(self.claves, self.consulta(origen).selected_columns)):
+            if i in conversiones:
+                if conversiones[i] not in _CONVERSIONES_SQL:
+                    raise ValueError(f"El campo '{clave}' no se puede codificar en SQL")
+                columna = _CONVERSIONES_SQL[conversiones[i]](columna)
+            elif isinstance(columna.type, DateTime):
+                # SQLite las guarda como 'AAAA-MM-DD HH:MM:SS.ffffff', no en ISO 8601
+                raise ValueError(f"El campo '{clave}' no se puede codificar en SQL")
+            pares += [clave, columna]
+        return select(func.json_object(*pares))
+
+    def fila(self, valores):
+        """Tupla de valores en el orden de 'claves' -> dict."""
+        if self._conversiones:
+            valores = list(valores)
+            for i, conversion in self._conversiones:
+                valores[i] = conversion(valores[i])
+        return dict(zip(self.claves, valores))
+
+    def filas(self, filas):
+        return [self.fila(f) for f in filas]
+
+    def uno(self, obj):
+        return self.fila(self._extraer(obj))
+
+    def muchos(self, objs):
+        return [self.uno(obj) for obj in objs]
+
+CLIENTE = Serializador(Cliente, ['id', 'nombre', 'apellido', 'email', 'telefono', 'direccion'])
+
+# Cliente dentro del detalle de una factura (opcionales como "" en lugar de null)
+CLIENTE_EN_FACTURA = Serializador(Cliente, [
+    'id', 'nombre', ('apellido', _o_vacio), 'email', ('telefono', _o_vacio), ('direccion', _o_vacio)])
+
+PRODUCTO = Serializador(Producto, ['id', 'nombre', 'descripcion', ('precio', 'precio_centimos', a_euros), 'stock'])
+
+FACTURA = Serializador(Factura, [
+    'id', 'fecha', 'cliente_id', ('subtotal', 'subtotal_centimos', a_euros),
+    ('iva', 'iva_centimos', a_euros), ('total', 'total_centimos', a_euros)])
+
+DETALLE_FACTURA = Serializador(DetalleFactura, [
+    'id', 'producto_id', 'cantidad', ('precio_unitario', 'precio_unitario_centimos', a_euros),
+    ('subtotal_linea', 'subtotal_linea_centimos', a_euros)])
+
+def respuesta_lista_json(consulta):
+    """Respuesta con la lista JSON de una consulta_json(): las filas ya son JSON, solo se unen."""
+    return current_app.response_class('[' + ','.join(db.session.scalars(consulta)) + ']',
+                                      mimetype=current_app.json.mimetype)
+
+# --- Proveedor JSON de la app ---
+
+def _por_defecto(obj):
+    """Tipos que el JSON estándar no conoce. Fechas siempre en ISO 8601."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Objeto de tipo {type(obj).__name__} no serializable a JSON")
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON instalado en la app (app.json). Con orjson codifica en C,
+    con fechas nativas y sin ordenar claves; sin orjson usa el codificador
+    estándar, pero igualmente con fechas en ISO 8601 en vez de formato HTTP.
+    """
+    sort_keys = False
+    default = staticmethod(_por_defecto)
+
+    if orjson is not None:
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # Los bytes de orjson van directos a la respuesta, sin pasar por str
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                orjson.dumps(obj, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS),
+                mimetype=self.mimetype)
@@ -0,0 +1,70 @@
+# backend/stock.py
+
+from collections import defaultdict
+from sqlalchemy import case, or_, select, update
+from models import db, Producto
+
+# --- Reserva de stock atómica ---
+# El stock se descuenta con un UPDATE condicional en SQL (stock = stock - n
+# WHERE stock >= n) dentro de la transacción de la factura, nunca leyendo y
+# escribiendo desde Python, así dos peticiones simultáneas no pueden vender
+# las mismas unidades. Un producto con stock NULL no gestiona inventario.
+# El stock no está en la caché de catálogo: estos UPDATE no la invalidan.
+
+class StockInsuficiente(Exception):
+    """Alguna línea pide más unidades de las disponibles."""
+    def __init__(self, faltantes):
+        # faltantes: lista de dicts {producto_id, nombre, solicitado, disponible}
+        self.faltantes = faltantes
+        detalle = ", ".join(f"{f['nombre']} (pedido {f['solicitado']}, disponible {f['disponible']})"
+                            for f in faltantes)
+        super().__init__(f"Stock insuficiente: {detalle}")
+
+def cantidades_por_producto(lineas):
+    """Suma las cantidades de lineas [(producto_id, cantidad), ...] por producto."""
+    cantidades = defaultdict(int)
+    for producto_id, cantidad in lineas:
+        cantidades[producto_id] += cantidad
+    return dict(cantidades)
+
+def reservar_stock(cantidades):
+    """
+    Descuenta {producto_id: cantidad} con un único UPDATE condicional.
+    Si algún producto no tiene stock suficiente deshace lo descontado por esta
+    llamada y lanza StockInsuficiente; el resto de la transacción no se toca.
+    """
+    if not cantidades:
+        return
+    solicitado = case(cantidades, value=Producto.id)
+    aplicados = set(db.session.scalars(
+        update(Producto)
+        .where(Producto.id.in_(cantidades.keys()),
+               or_(Producto.stock.is_(None), Producto.stock >= solicitado))
+        .values(stock=Producto.stock - solicitado)
+        .returning(Producto.id)
+        .execution_options(synchronize_session=False, invalida_catalogo=False)))
+
+    faltan = set(cantidades) - aplicados
+    if faltan:
+        liberar_stock({pid: cantidades[pid] for pid in aplicados})
+        actuales = {id: (nombre, stock) for id, nombre, stock in db.session.execute(
+            select(Producto.id, Producto.nombre, Producto.stock).where(Producto.id.in_(faltan)))}
+        raise StockInsuficiente([
+            {
+                "producto_id": id,
+                "nombre": actuales.get(id, (f"Producto ID {id}", 0))[0], # Puede haberse eliminado
+                "solicitado": cantidades[id],
+                "disponible": actuales.get(id, (None, 0))[1]
+            } for id in sorted(faltan)
+        ])
+
+def liberar_stock(cantidades):
+    """Devuelve al stock {producto_id: cantidad} (al eliminar una factura)."""
+    if not cantidades:
+        return
+    devuelto = case(cantidades, value=Producto.id)
+    db.session.execute(
+        update(Producto)
+        .where(Producto.id.in_(cantidades.keys()), Producto.stock.is_not(None))
+        .values(stock=Producto.stock + devuelto)
+        .execution_options(synchronize_session=False, invalida_catalogo=False))
@@ -0,0 +1,55 @@
+# backend/streaming.py
+
+from operator import itemgetter
+from flask import Response, current_app, stream_with_context
+from models import db
+
+# Tipo MIME para JSON delimitado por saltos de línea (un objeto por línea)
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Filas que se traen de la base de datos en cada lote mientras se emite la respuesta
+TAMANO_LOTE = 500
+
+def pide_stream(request):
+    """True si el cliente pide el modo streaming (?stream=1 o Accept: application/x-ndjson)."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    # Solo si lo pide explícitamente: un Accept: */* sigue recibiendo JSON normal
+    return any(tipo == NDJSON_MIMETYPE and calidad > 0 for tipo, calidad in request.accept_mimetypes)
+
+def respuesta_ndjson(consulta, a_dict=None, tamano_lote=TAMANO_LOTE):
+    """
+    Devuelve una respuesta NDJSON que recorre la consulta (un select()) por
+    lotes con yield_per. Cada fila se convierte con a_dict y cada lote se envía
+    en cuanto está listo, así la memoria no depende del tamaño de la tabla y el
+    primer byte sale antes de que termine la consulta.
+    'consulta' también puede ser una función sin argumentos que devuelve un
+    iterable de filas; se llama dentro del generador, donde la sesión puede
+    tener otra conexión del pool que la que usó la vista (ej: para recorrer
+    los años archivados, que se adjuntan en la conexión que los consulta).
+    Sin a_dict, cada fila ya trae su objeto JSON en la primera columna
+    (Serializador.consulta_json) y se emite tal cual.
+    """
+    if a_dict is None:
+        a_linea = itemgetter(0)
+    else:
+        codificar = current_app.json.dumps
+        a_linea = lambda fila: codificar(a_dict(fila))
+
+    def generar():
+        if callable(consulta):
+            filas = consulta()
+        else:
+            filas = db.session.execute(consulta.execution_options(yield_per=tamano_lote))
+        lineas = []
+        for fila in filas:
+            lineas.append(a_linea(fila))
+            if len(lineas) >= tamano_lote:
+                yield '\n'.join(lineas) + '\n'
+                lineas = []
+        if lineas:
+            yield '\n'.join(lineas) + '\n'
+
+    respuesta = Response(stream_with_context(generar()), mimetype=NDJSON_MIMETYPE)
+    respuesta.headers['Vary'] = 'Accept'
+    return respuesta
@@ -0,0 +1,63 @@
+# backend/tests/conftest.py
+
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+# --- App de pruebas ---
+# app.py crea la base de datos al importarse: la carpeta de datos temporal
+# tiene que estar en el entorno antes. Cada prueba empieza con las tablas
+# vacías y sin ficheros de archivo, exportaciones ni PDF en caché.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ['FACTURAAPP_DATA_DIR'] = tempfile.mkdtemp(prefix='facturaapp-pruebas-')
+
+from app import app as aplicacion # noqa: E402
+from models import db # noqa: E402
+import catalogo # noqa: E402
+from archivo import CARPETA_ARCHIVO # noqa: E402
+from exportaciones import CARPETA_EXPORTACIONES # noqa: E402
+
+CARPETAS_GENERADAS = [CARPETA_ARCHIVO, CARPETA_EXPORTACIONES, 'pdf_cache']
+
+@pytest.fixture
+def app():
+    yield aplicacion
+    with aplicacion.app_context():
+        db.session.rollback()
+        for tabla in reversed(db.metadata.sorted_tables):
+            db.session.execute(tabla.delete())
+        db.session.commit()
+        db.engine.dispose() # Suelta los ficheros de archivo adjuntados en el pool
+    catalogo.PRODUCTOS.invalidar()
+    catalogo.CLIENTES.invalidar()
+    for carpeta in CARPETAS_GENERADAS:
+        shutil.rmtree(os.path.join(aplicacion.config['APP_DATA_DIR'], carpeta), ignore_errors=True)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def crear(client):
+    """Atajos para crear clientes, productos y facturas por la API (fallan si la respuesta no es 201)."""
+    class Crear:
+        def _post(self, url, datos):
+            r = client.post(url, json=datos)
+            assert r.status_code == 201, r.get_data(as_text=True)
+            return r.get_json()
+
+        def cliente(self, n=0, **datos):
+            return self._post('/api/clientes/', {'nombre': f'Cliente {n}', 'apellido': 'Prueba',
+                                                 'email': f'cliente{n}@pruebas.local', **datos})
+
+        def producto(self, n=0, **datos):
+            return self._post('/api/productos/', {'nombre': f'Producto {n}', 'precio': 10 + n, **datos})
+
+        def factura(self, cliente_id, detalles):
+            return self._post('/api/facturas/', {'cliente_id': cliente_id, 'detalles': [
+                {'producto_id': producto_id, 'cantidad': cantidad} for producto_id, cantidad in detalles]})
+    return Crear()
@@ -0,0 +1,16 @@
+# backend/tests/test_ajustes_servidor.py
+
+from ajustes_servidor import CONEXIONES_EXTRA, cargar_ajustes_servidor, opciones_engine
+
+def test_pool_segun_el_modo(monkeypatch):
+    monkeypatch.delenv('FACTURAAPP_SERVIDOR_MODO', raising=False)
+    monkeypatch.delenv('FACTURAAPP_SERVIDOR_HILOS', raising=False)
+
+    escritorio = {}
+    cargar_ajustes_servidor(escritorio)
+    assert opciones_engine(escritorio) == {} # werkzeug no limita los hilos: pool por defecto
+
+    produccion = {'SERVIDOR_MODO': 'produccion', 'SERVIDOR_HILOS': 16}
+    cargar_ajustes_servidor(produccion)
+    opciones = opciones_engine(produccion)
+    assert (opciones['pool_size'], opciones['max_overflow']) == (16, CONEXIONES_EXTRA)
@@ -0,0 +1,120 @@
+# backend/tests/test_archivo.py
+
+import os
+import threading
+import pytest
+import archivo
+from archivo import archivar, ruta_archivo
+from models import db, ArchivoAnual, Factura
+
+ANIOS = (2019, 2020, 2021, 2022)
+
+@pytest.fixture
+def historico(client, crear):
+    """Un cliente con 3 facturas en cada año de ANIOS y una del año en curso (la última creada)."""
+    cliente = crear.cliente()
+    productos = [crear.producto(0), crear.producto(1)]
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'{anio}-{mes:02d}-10T09:30:00',
+         'detalles': [{'producto_id': productos[mes % 2]['id'], 'cantidad': mes}]}
+        for anio in ANIOS for mes in (2, 6, 11)]})
+    assert r.status_code == 201, r.get_data(as_text=True)
+    crear.factura(cliente['id'], [(productos[0]['id'], 1)])
+    return cliente, productos
+
+def _listado(client, consulta=''):
+    filas, cursor = [], None
+    while True:
+        r = client.get('/api/facturas/?limit=4' + consulta + (f'&cursor={cursor}' if cursor else ''))
+        assert r.status_code == 200, r.get_data(as_text=True)
+        filas += r.get_json()['facturas']
+        cursor = r.get_json()['next_cursor']
+        if not cursor:
+            return filas
+
+def _lecturas(client, cliente):
+    return {
+        'listado': _listado(client),
+        'rango': _listado(client, '&desde=2020-03-01&hasta=2021-12-31'),
+        'stream': client.get('/api/facturas/?stream=1').data,
+        'extracto': client.get(f"/api/clientes/{cliente['id']}/facturas?limit=100").get_json(),
+        'resumen': client.get(f"/api/clientes/resumen?ids={cliente['id']}").get_json(),
+        'totales': client.get('/api/reportes/totales?desde=2020-01-01&hasta=2021-12-31').get_json(),
+        'detalle': client.get('/api/facturas/1').get_json(),
+    }
+
+def test_las_facturas_archivadas_se_siguen_leyendo(app, client, historico):
+    cliente, _ = historico
+    antes = _lecturas(client, cliente)
+    with app.app_context():
+        assert archivar(2023, informar=lambda texto: None) == {anio: 3 for anio in ANIOS}
+        assert db.session.query(Factura).count() == 1
+    assert _lecturas(client, cliente) == antes
+
+def test_mas_anios_que_adjuntos_se_consultan_por_lotes(app, client, historico, monkeypatch):
+    cliente, _ = historico
+    antes = _lecturas(client, cliente)
+    with app.app_context():
+        archivar(2023, informar=lambda texto: None)
+    monkeypatch.setattr(archivo, 'MAX_ADJUNTOS', 2) # 4 años: dos lotes
+    assert _lecturas(client, cliente) == antes
+
+def test_no_se_borra_lo_archivado_ni_lo_que_referencia(app, client, historico):
+    cliente, productos = historico
+    with app.app_context():
+        archivar(2023, informar=lambda texto: None)
+    assert client.delete('/api/facturas/1').status_code == 409
+    assert client.delete(f"/api/clientes/{cliente['id']}").status_code == 409
+    assert client.delete(f"/api/productos/{productos[1]['id']}").status_code == 409
+
+def test_archivado_interrumpido_no_pierde_facturas(app, client, historico, monkeypatch):
+    cliente, _ = historico
+    antes = _lecturas(client, cliente)
+
+    def falla(*args, **kwargs):
+        raise RuntimeError("corte de luz")
+    # Falla en la segunda transacción: la copia del primer año ya está confirmada
+    monkeypatch.setattr(archivo, 'sqlite_insert', falla)
+    with app.app_context(), pytest.raises(RuntimeError):
+        archivar(2023, informar=lambda texto: None)
+    with app.app_context():
+        assert os.path.exists(ruta_archivo('facturas-2019.db'))
+        assert db.session.query(ArchivoAnual).count() == 0
+        assert db.session.query(Factura).count() == 13
+    assert _lecturas(client, cliente) == antes
+
+    monkeypatch.undo()
+    with app.app_context():
+        assert archivar(2023, informar=lambda texto: None) == {anio: 3 for anio in ANIOS}
+    assert _lecturas(client, cliente) == antes
+
+def test_se_pueden_crear_facturas_mientras_se_archiva(app, historico, monkeypatch):
+    cliente, productos = historico
+    copiar_anio = archivo._copiar_anio
+    respuestas = []
+
+    def crear_durante_la_copia():
+        http = app.test_client()
+        # Una del año que se está copiando (obliga a copiarlo otra vez) y una del año en curso
+        respuestas.append(http.post('/api/facturas/batch', json={'facturas': [
+            {'cliente_id': cliente['id'], 'fecha': '2019-12-20',
+             'detalles': [{'producto_id': productos[0]['id'], 'cantidad': 1}]}]}).status_code)
+        respuestas.append(http.post('/api/facturas/', json={'cliente_id': cliente['id'], 'detalles': [
+            {'producto_id': productos[1]['id'], 'cantidad': 1}]}).status_code)
+
+    def copiar_y_crear(conexion, anio, *args):
+        resultado = copiar_anio(conexion, anio, *args)
+        if anio == 2019 and not respuestas:
+            # Otro hilo, como otra petición: con la escritura reservada se quedaría esperando
+            hilo = threading.Thread(target=crear_durante_la_copia)
+            hilo.start()
+            hilo.join(timeout=3)
+            assert not hilo.is_alive()
+        return resultado
+
+    monkeypatch.setattr(archivo, '_copiar_anio', copiar_y_crear)
+    with app.app_context():
+        assert archivar(2023, informar=lambda texto: None) == {2019: 4, 2020: 3, 2021: 3, 2022: 3}
+        assert respuestas == [201, 201]
+        assert db.session.get(ArchivoAnual, 2019).num_facturas == 4
+        assert db.session.query(Factura).count() == 2 # Las dos del año en curso
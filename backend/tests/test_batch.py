@@ -0,0 +1,57 @@
+# backend/tests/test_batch.py
+
+from test_detalle_factura import contar_sentencias
+
+def _lote(cliente, productos, n, cantidad=1):
+    return {'facturas': [{'cliente_id': cliente['id'], 'detalles': [
+        {'producto_id': p['id'], 'cantidad': cantidad} for p in productos]} for _ in range(n)]}
+
+def test_solo_las_cabeceras_crecen_con_el_numero_de_facturas(app, client, crear):
+    cliente = crear.cliente()
+    productos = [crear.producto(0, stock=1000), crear.producto(1)]
+    client.post('/api/facturas/batch', json=_lote(cliente, productos, 1)) # Cliente y productos a la caché
+    sentencias = {}
+    for n in (10, 100):
+        with contar_sentencias(app) as ejecutadas:
+            r = client.post('/api/facturas/batch', json=_lote(cliente, productos, n))
+        assert r.status_code == 201 and r.get_json()['creadas'] == n
+        sentencias[n] = len(ejecutadas)
+    # Solo crece el INSERT de cabeceras (uno por factura, para recibir los ids en orden)
+    assert sentencias[100] - sentencias[10] == 90, sentencias
+    assert client.get(f"/api/productos/{productos[0]['id']}").get_json()['stock'] == 889
+
+def test_sin_stock_para_todas_se_aceptan_en_orden(client, crear):
+    cliente = crear.cliente()
+    escaso = crear.producto(0, stock=7)
+    r = client.post('/api/facturas/batch', json=_lote(cliente, [escaso], 5, cantidad=2))
+    assert r.status_code == 201
+    resultados = r.get_json()['resultados']
+    assert [resultado['ok'] for resultado in resultados] == [True, True, True, False, False]
+    assert resultados[3]['faltantes'] == [{'producto_id': escaso['id'], 'nombre': 'Producto 0',
+                                           'solicitado': 2, 'disponible': 1}]
+    assert client.get(f"/api/productos/{escaso['id']}").get_json()['stock'] == 1
+
+def test_cada_resultado_lleva_el_id_de_su_factura(client, crear):
+    cliente = crear.cliente()
+    producto = crear.producto()
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'detalles': [{'producto_id': producto['id'], 'cantidad': n}]}
+        for n in range(1, 21)]})
+    for n, resultado in enumerate(r.get_json()['resultados'], start=1):
+        detalle = client.get(f"/api/facturas/{resultado['id']}").get_json()
+        assert detalle['detalles'][0]['cantidad'] == n and detalle['total'] == resultado['total']
+
+def test_cliente_id_como_texto_se_guarda_como_entero(client, crear):
+    cliente = crear.cliente()
+    producto = crear.producto()
+    r = client.post('/api/facturas/', json={'cliente_id': str(cliente['id']), 'detalles': [
+        {'producto_id': producto['id'], 'cantidad': 1}]})
+    assert r.status_code == 201
+    assert r.get_json()['cliente']['id'] == cliente['id']
+    assert client.get('/api/facturas/').get_json()['facturas'][0]['cliente_id'] == cliente['id']
+    [resumen] = client.get('/api/reportes/clientes').get_json()
+    assert resumen['cliente_id'] == cliente['id']
+
+    r = client.post('/api/facturas/', json={'cliente_id': 'uno', 'detalles': [
+        {'producto_id': producto['id'], 'cantidad': 1}]})
+    assert r.status_code == 400
@@ -0,0 +1,60 @@
+# backend/tests/test_catalogo.py
+
+from sqlalchemy import update
+import catalogo
+from models import db, Producto
+
+def precio_unitario(client, factura):
+    return client.get(f"/api/facturas/{factura['id']}").get_json()['detalles'][0]['precio_unitario']
+
+def test_cambio_de_precio_invalida_la_cache(client, crear):
+    cliente = crear.cliente()
+    producto = crear.producto(precio='10')
+    assert precio_unitario(client, crear.factura(cliente['id'], [(producto['id'], 1)])) == 10.0
+    assert producto['id'] in catalogo.PRODUCTOS.entradas
+
+    r = client.put(f"/api/productos/{producto['id']}", json={'precio': '12.5'})
+    assert r.status_code == 200
+    assert producto['id'] not in catalogo.PRODUCTOS.entradas
+    assert precio_unitario(client, crear.factura(cliente['id'], [(producto['id'], 1)])) == 12.5
+
+def test_cambio_de_stock_no_invalida(client, crear):
+    cliente = crear.cliente()
+    producto = crear.producto(stock=10)
+    crear.factura(cliente['id'], [(producto['id'], 1)])
+    generacion = catalogo.PRODUCTOS.generacion
+
+    # Ni el descuento de stock de otra factura ni un PUT solo del stock tocan la caché
+    crear.factura(cliente['id'], [(producto['id'], 1)])
+    assert client.put(f"/api/productos/{producto['id']}", json={'stock': 50}).status_code == 200
+    assert catalogo.PRODUCTOS.generacion == generacion
+    assert producto['id'] in catalogo.PRODUCTOS.entradas
+
+def test_cliente_borrado_deja_de_existir(app, client, crear):
+    cliente = crear.cliente()
+    producto = crear.producto()
+    with app.app_context():
+        assert catalogo.cliente(cliente['id']) is not None # En caché
+
+    assert client.delete(f"/api/clientes/{cliente['id']}").status_code == 204
+    r = client.post('/api/facturas/', json={'cliente_id': cliente['id'], 'detalles': [
+        {'producto_id': producto['id'], 'cantidad': 1}]})
+    assert r.status_code == 404
+
+def test_update_masivo_y_rollback(app, crear):
+    productos = [crear.producto(n) for n in range(3)]
+    ids = [p['id'] for p in productos]
+    with app.app_context():
+        catalogo.productos(ids)
+        assert set(catalogo.PRODUCTOS.entradas) == set(ids)
+
+        # Cambios descartados: la caché sigue igual
+        db.session.execute(update(Producto).values(precio_centimos=1))
+        db.session.rollback()
+        assert set(catalogo.PRODUCTOS.entradas) == set(ids)
+
+        # UPDATE masivo confirmado: se vacía la tabla entera
+        db.session.execute(update(Producto).where(Producto.id == ids[0]).values(precio_centimos=1))
+        db.session.commit()
+        assert not catalogo.PRODUCTOS.entradas
+        assert catalogo.productos(ids)[ids[0]].precio_centimos == 1
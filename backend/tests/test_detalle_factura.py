@@ -0,0 +1,35 @@
+# backend/tests/test_detalle_factura.py
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from models import db
+
+@contextmanager
+def contar_sentencias(app):
+    sentencias = []
+    with app.app_context():
+        motor = db.engine
+    def anotar(conexion, cursor, sql, parametros, contexto, executemany):
+        sentencias.append(sql)
+    event.listen(motor, 'before_cursor_execute', anotar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(motor, 'before_cursor_execute', anotar)
+
+def test_detalle_con_numero_fijo_de_consultas(app, client, crear):
+    cliente = crear.cliente()
+    productos = [crear.producto(n) for n in range(40)]
+    pequena = crear.factura(cliente['id'], [(p['id'], 1) for p in productos[:2]])
+    grande = crear.factura(cliente['id'], [(p['id'], n + 1) for n, p in enumerate(productos)])
+
+    consultas = {}
+    for factura in (pequena, grande):
+        with contar_sentencias(app) as sentencias:
+            r = client.get(f"/api/facturas/{factura['id']}")
+        assert r.status_code == 200
+        consultas[factura['id']] = sentencias
+
+    assert len(r.get_json()['detalles']) == 40
+    # Factura con su cliente y luego las líneas con sus productos, sin una consulta por línea
+    assert len(consultas[pequena['id']]) == len(consultas[grande['id']]) == 2, consultas[grande['id']]
@@ -0,0 +1,63 @@
+# backend/tests/test_ejercicios_cerrados.py
+
+from datetime import datetime
+import pytest
+from archivo import archivar_en_segundo_plano, archivar_ejercicios_cerrados, archivar_facturas_comando
+from models import db, ArchivoAnual, Factura
+
+ANIO = datetime.utcnow().year
+
+@pytest.fixture
+def ejercicios(app, client, crear, monkeypatch):
+    """Dos facturas en cada uno de los cuatro últimos ejercicios; se dejan abiertos los dos últimos."""
+    monkeypatch.setitem(app.config, 'EJERCICIOS_ABIERTOS', 2)
+    cliente = crear.cliente()
+    producto = crear.producto()
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'{anio}-{mes:02d}-01T12:00:00',
+         'detalles': [{'producto_id': producto['id'], 'cantidad': 1}]}
+        for anio in range(ANIO - 3, ANIO) for mes in (3, 9)]})
+    assert r.status_code == 201, r.get_data(as_text=True)
+    crear.factura(cliente['id'], [(producto['id'], 1)])
+    crear.factura(cliente['id'], [(producto['id'], 1)])
+    return cliente, producto
+
+def _anios_en_principal(app):
+    with app.app_context():
+        return sorted({f.year for f in db.session.scalars(db.select(Factura.fecha))})
+
+def test_archiva_los_ejercicios_cerrados(app, client, ejercicios):
+    antes = client.get('/api/facturas/?limit=100').get_json()
+    with app.app_context():
+        assert archivar_ejercicios_cerrados(app.config, informar=lambda texto: None) == {ANIO - 3: 2, ANIO - 2: 2}
+        assert archivar_ejercicios_cerrados(app.config, informar=lambda texto: None) == {} # Nada más que mover
+        assert sorted(db.session.scalars(db.select(ArchivoAnual.anio))) == [ANIO - 3, ANIO - 2]
+    assert _anios_en_principal(app) == [ANIO - 1, ANIO]
+    assert client.get('/api/facturas/?limit=100').get_json() == antes
+
+def test_sin_ejercicios_abiertos_no_archiva(app, ejercicios, monkeypatch):
+    monkeypatch.setitem(app.config, 'EJERCICIOS_ABIERTOS', 0)
+    with app.app_context():
+        assert archivar_ejercicios_cerrados(app.config) == {}
+    assert _anios_en_principal(app) == [ANIO - 3, ANIO - 2, ANIO - 1, ANIO]
+
+def test_en_segundo_plano_y_desde_la_linea_de_comandos(app, ejercicios):
+    archivar_en_segundo_plano(app).join(timeout=30)
+    assert _anios_en_principal(app) == [ANIO - 1, ANIO]
+
+    resultado = app.test_cli_runner().invoke(archivar_facturas_comando, ['--sin-vacuum'])
+    assert resultado.exit_code == 0, resultado.output
+    assert f"No hay facturas anteriores a {ANIO - 1}" in resultado.output
+
+def test_un_ejercicio_archivado_no_admite_facturas(app, client, ejercicios):
+    cliente, producto = ejercicios
+    with app.app_context():
+        archivar_ejercicios_cerrados(app.config, informar=lambda texto: None)
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'{ANIO - 2}-05-05T10:00:00',
+         'detalles': [{'producto_id': producto['id'], 'cantidad': 1}]},
+        {'cliente_id': cliente['id'], 'fecha': f'{ANIO - 1}-05-05T10:00:00',
+         'detalles': [{'producto_id': producto['id'], 'cantidad': 1}]}]})
+    assert r.status_code == 201
+    assert [resultado['ok'] for resultado in r.get_json()['resultados']] == [False, True]
+    assert 'archivado' in r.get_json()['resultados'][0]['error']
@@ -0,0 +1,48 @@
+# backend/tests/test_estaticos.py
+
+import gzip
+import pytest
+from estaticos import CACHE_INMUTABLE, Manifiesto, brotli, comprimir_carpeta
+
+@pytest.fixture
+def build(tmp_path):
+    """Carpeta como la que deja el build de Vite, ya precomprimida."""
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text('<!doctype html><div id="root"></div>' * 50)
+    (tmp_path / 'assets' / 'app-3f2a1b.js').write_text('console.log("factura");\n' * 200)
+    (tmp_path / 'favicon.ico').write_bytes(b'\x00' * 100)
+    # index.html y el .js (.gz y, con brotli, .br); el icono es demasiado pequeño
+    assert comprimir_carpeta(tmp_path) == (4 if brotli else 2)
+    return Manifiesto(str(tmp_path))
+
+def servir(app, manifiesto, ruta, **cabeceras):
+    with app.test_request_context(f'/{ruta}', headers=cabeceras):
+        respuesta = manifiesto.servir(ruta)
+        respuesta.direct_passthrough = False # send_file: para poder leer el cuerpo
+        return respuesta
+
+def test_manifiesto_sin_variantes_en_la_lista(build):
+    assert set(build.ficheros) == {'index.html', 'assets/app-3f2a1b.js', 'favicon.ico'}
+    assert build.ficheros['assets/app-3f2a1b.js']['inmutable']
+    assert not build.ficheros['favicon.ico']['inmutable']
+
+def test_assets_inmutables_y_precomprimidos(app, build):
+    r = servir(app, build, 'assets/app-3f2a1b.js', **{'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert r.headers['Cache-Control'] == CACHE_INMUTABLE
+    assert 'Accept-Encoding' in r.vary
+    assert gzip.decompress(r.get_data()) == b'console.log("factura");\n' * 200
+
+    sin_comprimir = servir(app, build, 'assets/app-3f2a1b.js')
+    assert 'Content-Encoding' not in sin_comprimir.headers
+    assert sin_comprimir.get_etag()[0] != r.get_etag()[0]
+
+def test_rutas_de_react_reciben_index_revalidable(app, build):
+    r = servir(app, build, 'facturas/15')
+    assert r.status_code == 200 and r.mimetype == 'text/html'
+    assert r.cache_control.no_cache
+    etag = r.get_etag()[0]
+    assert servir(app, build, 'index.html', **{'If-None-Match': f'"{etag}"'}).status_code == 304
+
+def test_sin_build(app, tmp_path):
+    assert servir(app, Manifiesto(str(tmp_path / 'no-existe')), '').status_code == 404
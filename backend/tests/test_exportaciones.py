@@ -0,0 +1,78 @@
+# backend/tests/test_exportaciones.py
+
+import csv
+import io
+import json
+import os
+import time
+import pytest
+import exportaciones
+
+def _esperar(client, url):
+    for _ in range(200):
+        datos = client.get(url).get_json()
+        if datos['estado'] not in ('pendiente', 'en_curso'):
+            return datos
+        time.sleep(0.02)
+    raise AssertionError(f"La exportación no termina: {datos}")
+
+@pytest.fixture
+def facturas(client, crear):
+    cliente = crear.cliente()
+    productos = [crear.producto(0), crear.producto(1)]
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'2025-0{mes}-15T10:00:00',
+         'detalles': [{'producto_id': p['id'], 'cantidad': mes} for p in productos]} for mes in (1, 2, 3)]})
+    assert r.status_code == 201, r.get_data(as_text=True)
+
+def test_ciclo_de_vida_csv(client, facturas):
+    r = client.post('/api/exports', json={'formato': 'CSV', 'desde': '2025-02-01'})
+    assert r.status_code == 202
+    assert r.get_json()['estado'] in ('pendiente', 'en_curso', 'terminado')
+
+    datos = _esperar(client, r.headers['Location'])
+    assert datos['estado'] == 'terminado', datos
+    assert (datos['total_facturas'], datos['facturas_procesadas'], datos['lineas'], datos['progreso']) == (2, 2, 4, 1.0)
+
+    descarga = client.get(datos['descarga'])
+    assert descarga.status_code == 200
+    assert descarga.headers['Content-Disposition'].startswith('attachment')
+    filas = list(csv.DictReader(io.StringIO(descarga.data.decode('utf-8-sig'))))
+    assert len(filas) == 4 and {fila['fecha'][:7] for fila in filas} == {'2025-02', '2025-03'}
+
+def test_exportacion_json(client, facturas):
+    r = client.post('/api/exports?formato=json')
+    datos = _esperar(client, r.headers['Location'])
+    facturas = json.loads(client.get(datos['descarga']).data)
+    assert [len(f['detalles']) for f in facturas] == [2, 2, 2]
+
+def test_no_se_descarga_hasta_terminar(client, monkeypatch):
+    monkeypatch.setattr(exportaciones, '_iniciar_hilos', lambda: None) # Se queda en la cola
+    monkeypatch.setattr(exportaciones, '_cola', exportaciones.queue.Queue())
+    trabajo = client.post('/api/exports', json={'formato': 'csv'}).get_json()
+    assert trabajo['estado'] == 'pendiente'
+    assert client.get(f"/api/exports/{trabajo['id']}/descarga").status_code == 409
+    assert client.get('/api/exports/noexiste').status_code == 404
+
+@pytest.mark.parametrize('cuerpo', [[{'formato': 'csv'}], {'formato': 5}, {'formato': 'pdf'},
+                                    {'formato': 'csv', 'desde': 20250101}, {'hasta': 'ayer'}])
+def test_peticiones_no_validas(client, cuerpo):
+    r = client.post('/api/exports', json=cuerpo)
+    assert r.status_code == 400
+    assert 'error' in r.get_json()
+
+def test_los_hilos_no_retrasan_la_salida():
+    exportaciones._iniciar_hilos()
+    assert all(hilo.daemon for hilo in exportaciones._hilos)
+
+def test_se_purgan_los_ficheros_de_otra_ejecucion(app):
+    with app.app_context():
+        os.makedirs(exportaciones.directorio_exportaciones(), exist_ok=True)
+        viejo = os.path.join(exportaciones.directorio_exportaciones(), 'abc123.csv.parcial')
+        reciente = os.path.join(exportaciones.directorio_exportaciones(), 'def456.csv')
+        for ruta in (viejo, reciente):
+            open(ruta, 'w').close()
+        hace_dos_dias = time.time() - 2 * 24 * 3600
+        os.utime(viejo, (hace_dos_dias, hace_dos_dias))
+        exportaciones._purgar()
+        assert not os.path.exists(viejo) and os.path.exists(reciente)
@@ -0,0 +1,79 @@
+# backend/tests/test_importacion.py
+
+import io
+from importacion import importar_csv, leer_csv
+
+def test_informe_de_errores_de_clientes(client, crear):
+    crear.cliente(0) # cliente0@pruebas.local ya existe
+    csv = ('nombre,apellido,email\n'
+           'Ana,López,ana@pruebas.local\n'
+           ',Sin nombre,nadie@pruebas.local\n'
+           'Repetida,Existente,cliente0@pruebas.local\n'
+           'Ana bis,López,ana@pruebas.local\n'
+           f"{'x' * 101},Larga,larga@pruebas.local\n"
+           'Luis,,luis@pruebas.local\n')
+    r = client.post('/api/clientes/importar', data=csv, content_type='text/csv')
+    assert r.status_code == 200, r.get_data(as_text=True)
+    informe = r.get_json()
+
+    assert (informe['filas'], informe['importadas'], informe['con_error']) == (6, 2, 4)
+    assert informe['errores'] == [
+        {'fila': 3, 'error': "El campo 'nombre' es requerido"},
+        {'fila': 4, 'error': "El email ya está registrado"},
+        {'fila': 5, 'error': "Email repetido en el fichero"},
+        {'fila': 6, 'error': "El campo 'nombre' supera los 100 caracteres"},
+    ]
+    assert informe['errores_omitidos'] == 0
+    emails = {c['email'] for c in client.get('/api/clientes/').get_json()}
+    assert emails == {'cliente0@pruebas.local', 'ana@pruebas.local', 'luis@pruebas.local'}
+
+def test_informe_de_errores_de_productos_con_delimitador(client):
+    csv = ('nombre;precio;stock\n'
+           'Tornillo;0,25;100\n'
+           'Tuerca;gratis;5\n'
+           'Arandela;1;-1\n'
+           'Clavo;-2;\n').encode('utf-8-sig') # BOM como los CSV de Excel
+    r = client.post('/api/productos/importar?delimitador=;', data={'archivo': (io.BytesIO(csv), 'productos.csv')},
+                    content_type='multipart/form-data')
+    assert r.status_code == 200, r.get_data(as_text=True)
+    informe = r.get_json()
+
+    assert (informe['importadas'], informe['con_error']) == (1, 3)
+    assert [(e['fila'], e['error']) for e in informe['errores']] == [
+        (3, "El precio debe ser un número válido"),
+        (4, "El stock no puede ser negativo"),
+        (5, "El precio no puede ser negativo"),
+    ]
+    [producto] = client.get('/api/productos/').get_json()
+    assert (producto['nombre'], producto['precio'], producto['stock']) == ('Tornillo', 0.25, 100)
+
+def test_cabecera_incompleta_o_sin_fichero(client):
+    r = client.post('/api/clientes/importar', data='nombre,apellido\nAna,López\n', content_type='text/csv')
+    assert r.status_code == 400
+    assert 'email' in r.get_json()['error']
+
+    assert client.post('/api/productos/importar', json={}).status_code == 400
+    assert client.post('/api/productos/importar?delimitador=;;', data='nombre',
+                       content_type='text/csv').status_code == 400
+
+def test_repetidos_en_lotes_distintos(app, crear):
+    crear.cliente(1)
+    csv = ('nombre,email\n'
+           'A,cliente1@pruebas.local\n' # Ya registrado: se anota al guardar el lote
+           ',b@pruebas.local\n'         # Sin nombre: se anota al leer la fila
+           'C,c@pruebas.local\n'
+           'D,c@pruebas.local\n'        # Repetido en el lote anterior
+           'E,e@pruebas.local\n')
+    with app.app_context():
+        informe = importar_csv('clientes', leer_csv(io.BytesIO(csv.encode())), tamano_lote=2)
+    assert (informe['importadas'], informe['con_error']) == (2, 3)
+    # Ordenados por línea aunque los de email registrado se anoten después
+    assert [e['fila'] for e in informe['errores']] == [2, 3, 5]
+
+def test_csv_corrupto_conserva_lo_confirmado(app):
+    datos = b'nombre,precio\nA,1\nB,2\nC,3\n\xff\xfe,4\n'
+    with app.app_context():
+        informe = importar_csv('productos', leer_csv(io.BytesIO(datos)), tamano_lote=2)
+    assert informe['detenida'] is True
+    assert informe['importadas'] == 2
+    assert informe['errores'][-1]['error'].startswith('CSV no válido')
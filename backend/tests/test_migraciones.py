@@ -0,0 +1,39 @@
+# backend/tests/test_migraciones.py
+
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from alembic.script import ScriptDirectory
+from conftest import BACKEND_DIR
+
+def _flask_db_upgrade(carpeta):
+    return subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'upgrade'], cwd=BACKEND_DIR,
+                          env=dict(os.environ, FACTURAAPP_DATA_DIR=str(carpeta)), capture_output=True, text=True)
+
+def _revision(carpeta):
+    with sqlite3.connect(carpeta / 'database.db') as conexion:
+        return conexion.execute("SELECT version_num FROM alembic_version").fetchone()[0]
+
+def _cabeza():
+    return ScriptDirectory(os.path.join(BACKEND_DIR, 'migrations')).get_current_head()
+
+def test_upgrade_desde_la_base_de_datos_original(tmp_path):
+    shutil.copy(os.path.join(BACKEND_DIR, 'database.db'), tmp_path)
+    resultado = _flask_db_upgrade(tmp_path)
+    assert resultado.returncode == 0, resultado.stderr
+    assert _revision(tmp_path) == _cabeza()
+    with sqlite3.connect(tmp_path / 'database.db') as conexion:
+        # Los resúmenes se rellenan con las facturas existentes
+        assert conexion.execute("SELECT sum(num_facturas) FROM resumen_mensual").fetchone()[0] == \
+            conexion.execute("SELECT count(*) FROM factura").fetchone()[0]
+
+def test_upgrade_tras_arrancar_la_app(tmp_path):
+    shutil.copy(os.path.join(BACKEND_DIR, 'database.db'), tmp_path)
+    # El arranque deja el esquema al día sin pasar por alembic
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=BACKEND_DIR, check=True, capture_output=True,
+                   env=dict(os.environ, FACTURAAPP_DATA_DIR=str(tmp_path)))
+    resultado = _flask_db_upgrade(tmp_path)
+    assert resultado.returncode == 0, resultado.stderr
+    assert _revision(tmp_path) == _cabeza()
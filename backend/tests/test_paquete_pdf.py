@@ -0,0 +1,41 @@
+# backend/tests/test_paquete_pdf.py
+
+import io
+import zipfile
+from archivo import archivar
+
+URL = '/api/facturas/pdf-bundle'
+
+def test_zip_con_un_pdf_por_factura(app, client, crear):
+    cliente = crear.cliente()
+    productos = [crear.producto(n) for n in range(3)]
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'{anio}-{mes:02d}-10',
+         'detalles': [{'producto_id': p['id'], 'cantidad': mes} for p in productos[:mes % 3 + 1]]}
+        for anio in (2022, 2023) for mes in (11, 12, 1, 2)]})
+    assert r.status_code == 201
+    with app.app_context():
+        archivar(2023, informar=lambda texto: None) # El rango abarca un año archivado
+
+    r = client.get(f'{URL}?desde=2022-12-01&hasta=2023-02-28')
+    assert r.status_code == 200 and r.mimetype == 'application/zip'
+    assert r.is_streamed and 'Content-Length' not in r.headers
+    trozos = list(r.response)
+    assert len(trozos) > 1
+
+    paquete = zipfile.ZipFile(io.BytesIO(b''.join(trozos)))
+    assert paquete.testzip() is None
+    nombres = paquete.namelist()
+    assert len(nombres) == int(r.headers['X-Total-Facturas']) == 3 # dic 2022 (archivada), ene y feb 2023
+    for nombre in nombres:
+        id = int(nombre.removeprefix('Factura-').removesuffix('.pdf'))
+        assert paquete.read(nombre) == client.get(f'/api/facturas/{id}/pdf').data
+
+    # La segunda vez salen de la caché de disco, con el mismo contenido
+    repetido = zipfile.ZipFile(io.BytesIO(client.get(f'{URL}?desde=2022-12-01&hasta=2023-02-28').data))
+    assert {n: repetido.read(n) for n in repetido.namelist()} == {n: paquete.read(n) for n in nombres}
+
+def test_paquete_rango_no_valido(client):
+    assert client.get(f'{URL}?desde=2023-01-01').status_code == 400
+    assert client.get(f'{URL}?desde=x&hasta=2023-01-01').status_code == 400
+    assert client.get(f'{URL}?desde=2001-01-01&hasta=2001-02-01').status_code == 404
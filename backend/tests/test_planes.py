@@ -0,0 +1,60 @@
+# backend/tests/test_planes.py
+
+import os
+import sys
+from contextlib import closing
+from sqlalchemy import event
+from models import db
+
+# Los escenarios y la siembra son los de los benchmarks (benchmarks/plan_consultas.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from bench_endpoints import ESCENARIOS, _ejecutar # noqa: E402
+from plan_consultas import PERMITIDOS, recorridos_completos, _SIN_PLAN # noqa: E402
+from sembrar import sembrar # noqa: E402
+
+FACTURAS = 2000
+
+def _explicar(motor, sentencias):
+    """Filas de EXPLAIN QUERY PLAN de cada sentencia, en una conexión aparte (el plan no depende de los datos)."""
+    planes = {}
+    with closing(motor.raw_connection()) as conexion:
+        for sentencia, parametros in sentencias:
+            if sentencia not in planes:
+                filas = conexion.execute('EXPLAIN QUERY PLAN ' + sentencia, parametros).fetchall()
+                planes[sentencia] = [fila[-1] for fila in filas]
+    return planes
+
+def test_ninguna_ruta_recorre_tablas_grandes_enteras(app, client):
+    with app.app_context():
+        motor = db.engine
+        ruta_db = motor.url.database
+    ctx = sembrar(ruta_db, FACTURAS)
+    ctx['n'] = FACTURAS
+    with app.app_context():
+        from reportes import reconstruir
+        reconstruir()
+
+    sentencias = []
+    def anotar(conexion, cursor, sentencia, parametros, contexto, executemany):
+        inicio = sentencia.lstrip().upper()
+        # INSERT ... VALUES no recorre tablas
+        if inicio.startswith(_SIN_PLAN) or (inicio.startswith('INSERT') and 'VALUES' in inicio):
+            return
+        sentencias.append((sentencia, parametros[0] if executemany else parametros))
+
+    recorridos = []
+    for nombre, _, _, preparar, peticion in ESCENARIOS:
+        preparado = preparar(client, ctx, 0) if preparar else None # Sus consultas no cuentan
+        del sentencias[:]
+        event.listen(motor, 'before_cursor_execute', anotar)
+        try:
+            estado = _ejecutar(client, *peticion(ctx, 0, preparado))
+        finally:
+            event.remove(motor, 'before_cursor_execute', anotar)
+        assert estado < 400, nombre
+
+        for sentencia, plan in _explicar(motor, sentencias).items():
+            recorridos += [(nombre, tabla, ' '.join(sentencia.split())) for tabla in recorridos_completos(plan)
+                           if (nombre, tabla) not in PERMITIDOS]
+
+    assert recorridos == []
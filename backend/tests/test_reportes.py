@@ -0,0 +1,42 @@
+# backend/tests/test_reportes.py
+
+from sqlalchemy import event
+from archivo import archivar
+from models import db
+from reportes import reconstruir
+
+URLS = ('/api/reportes/mensual', '/api/reportes/clientes', '/api/reportes/productos', '/api/reportes/totales')
+
+def test_reconstruir_con_anios_archivados_en_una_transaccion(app, client, crear):
+    clientes = [crear.cliente(n) for n in range(2)]
+    productos = [crear.producto(n) for n in range(3)]
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': clientes[mes % 2]['id'], 'fecha': f'{anio}-{mes:02d}-05',
+         'detalles': [{'producto_id': p['id'], 'cantidad': mes} for p in productos[:mes % 3 + 1]]}
+        for anio in (2020, 2021, 2022) for mes in (1, 4, 7, 10)]})
+    assert r.status_code == 201
+    crear.factura(clientes[0]['id'], [(productos[0]['id'], 2)])
+    with app.app_context():
+        archivar(2022, informar=lambda texto: None)
+    antes = [client.get(url).get_json() for url in URLS]
+
+    confirmaciones = []
+    with app.app_context():
+        event.listen(db.session(), 'after_commit', confirmaciones.append)
+        reconstruir()
+    assert len(confirmaciones) == 1 # Nunca se ven los resúmenes sin los años archivados
+    assert [client.get(url).get_json() for url in URLS] == antes
+
+def test_mensual_valida_el_formato_de_mes(client, crear):
+    cliente, producto = crear.cliente(), crear.producto()
+    r = client.post('/api/facturas/batch', json={'facturas': [
+        {'cliente_id': cliente['id'], 'fecha': f'2024-{mes:02d}-10',
+         'detalles': [{'producto_id': producto['id'], 'cantidad': 1}]} for mes in (1, 2, 11)]})
+    assert r.status_code == 201
+
+    r = client.get('/api/reportes/mensual?desde=2024-02&hasta=2024-11')
+    assert [fila['mes'] for fila in r.get_json()] == ['2024-02', '2024-11']
+    for consulta in ('desde=2024-1', 'hasta=2024-01-15', 'desde=2024-13', 'hasta=enero'):
+        r = client.get(f'/api/reportes/mensual?{consulta}')
+        assert r.status_code == 400, consulta
+        assert 'YYYY-MM' in r.get_json()['error']
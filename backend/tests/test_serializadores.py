@@ -0,0 +1,49 @@
+# backend/tests/test_serializadores.py
+
+import json
+import pytest
+from models import db, Cliente, Producto
+from serializadores import CLIENTE, CLIENTE_EN_FACTURA, FACTURA, PRODUCTO
+
+PRECIOS = ('0', '0.01', '0.1', '0.3', '1.15', '10', '19.99', '1234.56', '99999999.99')
+
+@pytest.fixture
+def catalogo(crear):
+    crear.cliente(0, nombre='Íñigo "el rápido"', apellido='Muñoz\\Pérez', direccion='Calle 1\nBajo')
+    crear.cliente(1, nombre='Zoë', telefono='600 000 000')
+    for n, precio in enumerate(PRECIOS):
+        crear.producto(n, nombre=f'Producto {n} ✓', precio=precio, **({'stock': n} if n % 2 else {}))
+
+def test_listados_iguales_a_los_serializadores(app, client, catalogo):
+    with app.app_context():
+        esperado = {
+            '/api/clientes/': CLIENTE.filas(db.session.execute(CLIENTE.consulta())),
+            '/api/productos/': PRODUCTO.filas(db.session.execute(PRODUCTO.consulta())),
+        }
+        for url, filas in esperado.items():
+            r = client.get(url)
+            assert r.status_code == 200 and r.mimetype == 'application/json'
+            # Mismos bytes que con dicts + ProveedorJSON, no solo el mismo JSON
+            assert r.data == app.json.dumps(filas).encode('utf-8'), url
+
+            r = client.get(url + '?stream=1')
+            assert r.get_data(as_text=True).splitlines() == [app.json.dumps(fila) for fila in filas]
+
+    precios = [p['precio'] for p in client.get('/api/productos/').get_json()]
+    assert precios == [float(p) for p in PRECIOS]
+
+def test_conversiones_en_sql(app, catalogo):
+    with app.app_context():
+        consulta = CLIENTE_EN_FACTURA.consulta().order_by(Cliente.id)
+        filas = CLIENTE_EN_FACTURA.filas(db.session.execute(consulta))
+        textos = db.session.scalars(CLIENTE_EN_FACTURA.consulta_json().order_by(Cliente.id)).all()
+        assert [json.loads(t) for t in textos] == filas
+        assert filas[0]['telefono'] == ''
+
+        # Alias del modelo, como en consulta()
+        alias = db.aliased(Producto)
+        assert len(db.session.scalars(PRODUCTO.consulta_json(alias)).all()) == len(PRECIOS)
+
+def test_fechas_no_se_codifican_en_sql():
+    with pytest.raises(ValueError):
+        FACTURA.consulta_json()
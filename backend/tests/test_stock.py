@@ -0,0 +1,54 @@
+# backend/tests/test_stock.py
+
+import threading
+
+def test_producto_sin_stock_no_gestiona_inventario(client, crear):
+    cliente = crear.cliente()
+    servicio = crear.producto(nombre='Servicio', precio=10)
+    assert servicio['stock'] is None
+
+    crear.factura(cliente['id'], [(servicio['id'], 1)])
+    crear.factura(cliente['id'], [(servicio['id'], 1000)])
+    assert client.get(f"/api/productos/{servicio['id']}").get_json()['stock'] is None
+
+def test_importar_csv_sin_stock_lo_deja_vacio(client):
+    r = client.post('/api/productos/importar', data='nombre,precio,stock\nHora de soporte,40,\nCaja,2,5\n',
+                    content_type='text/csv')
+    assert r.status_code == 200, r.get_data(as_text=True)
+    stocks = {p['nombre']: p['stock'] for p in client.get('/api/productos/').get_json()}
+    assert stocks == {'Hora de soporte': None, 'Caja': 5}
+
+def test_stock_insuficiente_no_descuenta_nada(client, crear):
+    cliente = crear.cliente()
+    escaso = crear.producto(0, stock=3)
+    otro = crear.producto(1, stock=10)
+
+    r = client.post('/api/facturas/', json={'cliente_id': cliente['id'], 'detalles': [
+        {'producto_id': otro['id'], 'cantidad': 2}, {'producto_id': escaso['id'], 'cantidad': 4}]})
+    assert r.status_code == 409
+    assert client.get(f"/api/productos/{escaso['id']}").get_json()['stock'] == 3
+    assert client.get(f"/api/productos/{otro['id']}").get_json()['stock'] == 10
+
+def test_reservas_concurrentes_no_venden_de_mas(app, crear):
+    cliente = crear.cliente()
+    caliente = crear.producto(stock=50)
+    respuestas = []
+
+    def trabajador():
+        http = app.test_client()
+        while True:
+            r = http.post('/api/facturas/', json={'cliente_id': cliente['id'], 'detalles': [
+                {'producto_id': caliente['id'], 'cantidad': 2}]})
+            respuestas.append(r.status_code)
+            if r.status_code != 201:
+                return
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert set(respuestas) == {201, 409}
+    assert respuestas.count(201) == 25
+    assert app.test_client().get(f"/api/productos/{caliente['id']}").get_json()['stock'] == 0
@@ -0,0 +1,94 @@
+# backend/versiones.py
+
+import hashlib
+import threading
+import uuid
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event
+
+# --- Contadores de versión por tabla ---
+# Cada commit que inserta, modifica o borra filas de una tabla versionada
+# incrementa su contador. Las rutas GET derivan su ETag de los contadores de
+# las tablas que leen, así pueden responder 304 sin ejecutar ninguna consulta.
+# Los contadores viven en memoria: el token de arranque hace que un ETag de
+# una ejecución anterior nunca coincida. Las escrituras hechas desde otro
+# proceso (comandos flask) no se detectan hasta reiniciar la app.
+
+TABLAS_VERSIONADAS = ('cliente', 'producto', 'factura', 'detalle_factura')
+
+_versiones = dict.fromkeys(TABLAS_VERSIONADAS, 0)
+_bloqueo = threading.Lock()
+_token_arranque = uuid.uuid4().hex
+
+def version(tabla):
+    return _versiones[tabla]
+
+def _incrementar(tablas):
+    with _bloqueo:
+        for tabla in tablas:
+            _versiones[tabla] += 1
+
+def registrar_eventos(session):
+    """
+    Registra los eventos de sesión que detectan qué tablas cambian. Las tablas se
+    anotan al hacer flush (o al ejecutar INSERT/UPDATE/DELETE masivos del ORM) y
+    los contadores solo suben tras el commit: así ningún lector puede asociar la
+    versión nueva a datos todavía sin confirmar.
+    """
+    def anotar(sesion, tablas):
+        sesion.info.setdefault('tablas_modificadas', set()).update(tablas)
+
+    @event.listens_for(session, 'after_flush')
+    def tras_flush(sesion, flush_context):
+        anotar(sesion, {
+            obj.__table__.name
+            for obj in list(sesion.new) + list(sesion.dirty) + list(sesion.deleted)
+            if obj.__table__.name in TABLAS_VERSIONADAS
+        })
+
+    @event.listens_for(session, 'do_orm_execute')
+    def tras_ejecutar(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+                and mapper is not None and mapper.local_table.name in TABLAS_VERSIONADAS:
+            anotar(orm_execute_state.session, {mapper.local_table.name})
+
+    @event.listens_for(session, 'after_commit')
+    def tras_commit(sesion):
+        _incrementar(sesion.info.pop('tablas_modificadas', ()))
+
+    @event.listens_for(session, 'after_soft_rollback')
+    def tras_rollback(sesion, transaccion_previa):
+        sesion.info.pop('tablas_modificadas', None)
+
+# --- GET condicional ---
+
+def etag_actual(tablas):
+    """ETag débil para la petición actual a partir de las versiones de las tablas que lee."""
+    partes = [_token_arranque, request.full_path, request.headers.get('Accept', '')]
+    partes += [f"{tabla}:{_versiones[tabla]}" for tabla in tablas]
+    return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()
+
+def condicional(*tablas):
+    """
+    Decorador para rutas GET: añade un ETag débil derivado de las versiones de
+    'tablas' y responde 304 a If-None-Match sin llamar a la vista.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Se calcula antes de consultar: si hay un commit mientras tanto, el
+            # ETag queda "viejo" y la siguiente petición simplemente recibe un 200.
+            etag = etag_actual(tablas)
+            if request.if_none_match.contains_weak(etag):
+                respuesta = make_response('', 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag, weak=True)
+            respuesta.cache_control.no_cache = True # El navegador revalida siempre con If-None-Match
+            return respuesta
+        return envoltura
+    return decorador
@@ -15,6 +15,8 @@ function Facturas() {
     const [facturaAEliminar, setFacturaAEliminar] = useState(null);
     const [isDeleting, setIsDeleting] = useState(false); // Estado para carga de eliminación
     const [deleteError, setDeleteError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null); // Cursor de la siguiente página (null = no hay más)
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // --- Funciones (Lógica sin cambios, solo formato de fecha) ---
 
@@ -33,17 +35,38 @@ function Facturas() {
         setError(null);
         try {
             const response = await apiClient.get('/facturas/');
-            setFacturas(Array.isArray(response.data) ? response.data : []); // Asegurar array
+            const data = response.data || {};
+            setFacturas(Array.isArray(data.facturas) ? data.facturas : []); // Asegurar array
+            setNextCursor(data.next_cursor || null);
         } catch (err) {
             console.error("Error fetching facturas:", err);
             const errorMessage = err.response?.data?.error || err.message || "Ocurrió un error al cargar las facturas.";
             setError(errorMessage);
             setFacturas([]); // Limpiar en caso de error
+            setNextCursor(null);
         } finally {
             setLoading(false);
         }
     };
 
+    // Carga la siguiente página usando el cursor devuelto por la API
+    const fetchMasFacturas = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const response = await apiClient.get('/facturas/', { params: { cursor: nextCursor } });
+            const data = response.data || {};
+            setFacturas(prevFacturas => [...prevFacturas, ...(Array.isArray(data.facturas) ? data.facturas : [])]);
+            setNextCursor(data.next_cursor || null);
+        } catch (err) {
+            console.error("Error fetching more facturas:", err);
+            const errorMessage = err.response?.data?.error || err.message || "Ocurrió un error al cargar más facturas.";
+            setError(errorMessage);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         fetchFacturas();
     }, []);
@@ -174,6 +197,15 @@ function Facturas() {
                                 </Table>
                             </div>
                         )}
+                        {/* Paginación por cursor */}
+                        {nextCursor && (
+                            <div className="text-center mt-3">
+                                <Button variant="outline-primary" onClick={fetchMasFacturas} disabled={loadingMore}>
+                                    {loadingMore ? <Spinner as="span" animation="border" size="sm" className="me-2" /> : null}
+                                    Cargar más
+                                </Button>
+                            </div>
+                        )}
                     </Card.Body>
                 </Card>
             )}